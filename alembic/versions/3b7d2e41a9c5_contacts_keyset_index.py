@@ -0,0 +1,33 @@
+"""Contacts keyset index
+
+Revision ID: 3b7d2e41a9c5
+Revises: 9081cf8359f8
+Create Date: 2026-10-18 10:12:03.518204
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '3b7d2e41a9c5'
+down_revision: Union[str, None] = '9081cf8359f8'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_index(
+        'ix_contacts_user_keyset',
+        'contacts',
+        ['user_id', 'last_name', 'first_name', 'id'],
+        unique=False,
+    )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index('ix_contacts_user_keyset', table_name='contacts')
@@ -0,0 +1,42 @@
+"""Contacts birthday month/day column
+
+Revision ID: 8c4f0d2b6e17
+Revises: 5e1c9a7f3d20
+Create Date: 2026-10-18 13:05:51.227640
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '8c4f0d2b6e17'
+down_revision: Union[str, None] = '5e1c9a7f3d20'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.add_column('contacts', sa.Column('birthday_md', sa.SmallInteger(), nullable=True))
+    if op.get_bind().dialect.name == 'sqlite':
+        op.execute(
+            "UPDATE contacts SET birthday_md = "
+            "CAST(strftime('%m', birthday) AS INTEGER) * 100 + CAST(strftime('%d', birthday) AS INTEGER) "
+            "WHERE birthday IS NOT NULL"
+        )
+    else:
+        op.execute(
+            "UPDATE contacts SET birthday_md = "
+            "EXTRACT(MONTH FROM birthday) * 100 + EXTRACT(DAY FROM birthday) "
+            "WHERE birthday IS NOT NULL"
+        )
+    op.create_index('ix_contacts_user_birthday_md', 'contacts', ['user_id', 'birthday_md'], unique=False)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index('ix_contacts_user_birthday_md', table_name='contacts')
+    op.drop_column('contacts', 'birthday_md')
@@ -0,0 +1,36 @@
+"""Contacts updated_at and version columns
+
+Revision ID: b2e7c4a91f36
+Revises: 8c4f0d2b6e17
+Create Date: 2026-10-18 16:42:10.518304
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'b2e7c4a91f36'
+down_revision: Union[str, None] = '8c4f0d2b6e17'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    # SQLite cannot add a column with a non-constant default, so backfill instead.
+    op.add_column('contacts', sa.Column('updated_at', sa.DateTime(timezone=True), nullable=True))
+    op.add_column('contacts', sa.Column('version', sa.Integer(), server_default='1', nullable=False))
+    op.execute("UPDATE contacts SET updated_at = CURRENT_TIMESTAMP")
+    if op.get_bind().dialect.name != 'sqlite':
+        op.alter_column('contacts', 'updated_at', nullable=False)
+    op.create_index('ix_contacts_user_updated_at', 'contacts', ['user_id', 'updated_at'], unique=False)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index('ix_contacts_user_updated_at', table_name='contacts')
+    op.drop_column('contacts', 'version')
+    op.drop_column('contacts', 'updated_at')
@@ -0,0 +1,35 @@
+"""Keyset index on coalesced names, so NULL names do not end pagination
+
+Revision ID: c5d2e8f47a13
+Revises: f3b8a2d61c95
+Create Date: 2026-10-18 21:06:44.107395
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'c5d2e8f47a13'
+down_revision: Union[str, None] = 'f3b8a2d61c95'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.drop_index('ix_contacts_user_keyset', table_name='contacts')
+    op.create_index(
+        'ix_contacts_user_keyset',
+        'contacts',
+        ['user_id', sa.text("coalesce(last_name, '')"), sa.text("coalesce(first_name, '')"), 'id'],
+        unique=False,
+    )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index('ix_contacts_user_keyset', table_name='contacts')
+    op.create_index('ix_contacts_user_keyset', 'contacts', ['user_id', 'last_name', 'first_name', 'id'], unique=False)
@@ -0,0 +1,53 @@
+"""Contacts change sequence and tombstones
+
+Revision ID: d41a9e5c7b20
+Revises: b2e7c4a91f36
+Create Date: 2026-10-18 17:20:44.102837
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'd41a9e5c7b20'
+down_revision: Union[str, None] = 'b2e7c4a91f36'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.add_column('contacts', sa.Column('change_seq', sa.BigInteger(), nullable=True))
+    op.create_index('ix_contacts_user_change_seq', 'contacts', ['user_id', 'change_seq'], unique=False)
+    op.create_table('contact_tombstones',
+    sa.Column('id', sa.Integer(), nullable=False),
+    sa.Column('user_id', sa.Integer(), nullable=False),
+    sa.Column('contact_id', sa.Integer(), nullable=False),
+    sa.Column('change_seq', sa.BigInteger(), nullable=False),
+    sa.Column('deleted_at', sa.DateTime(timezone=True), nullable=False),
+    sa.PrimaryKeyConstraint('id')
+    )
+    op.create_index('ix_contact_tombstones_user_change_seq', 'contact_tombstones', ['user_id', 'change_seq'], unique=False)
+    op.create_table('contact_change_counters',
+    sa.Column('user_id', sa.Integer(), autoincrement=False, nullable=False),
+    sa.Column('last_seq', sa.BigInteger(), nullable=False),
+    sa.PrimaryKeyConstraint('user_id')
+    )
+    # Existing rows: ids are increasing per user too, so they serve as the initial sequence.
+    op.execute("UPDATE contacts SET change_seq = id")
+    op.execute(
+        "INSERT INTO contact_change_counters (user_id, last_seq) "
+        "SELECT user_id, MAX(change_seq) FROM contacts WHERE user_id IS NOT NULL GROUP BY user_id"
+    )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_table('contact_change_counters')
+    op.drop_index('ix_contact_tombstones_user_change_seq', table_name='contact_tombstones')
+    op.drop_table('contact_tombstones')
+    op.drop_index('ix_contacts_user_change_seq', table_name='contacts')
+    op.drop_column('contacts', 'change_seq')
@@ -0,0 +1,135 @@
+"""Hash-partition contacts on user_id, per-user email uniqueness
+
+Revision ID: d9c3f1a6b8e4
+Revises: d41a9e5c7b20
+Create Date: 2026-10-18 18:05:37.220941
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+from src.conf.config import CONTACTS_PARTITIONS
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'd9c3f1a6b8e4'
+down_revision: Union[str, None] = 'd41a9e5c7b20'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+# Indexes of contacts as of this revision, rebuilt after the data is copied.
+INDEXES = [
+    ('ix_contacts_id', ['id']),
+    ('ix_contacts_first_name', ['first_name']),
+    ('ix_contacts_last_name', ['last_name']),
+    ('ix_contacts_email', ['email']),
+    ('ix_contacts_phone', ['phone']),
+    ('ix_contacts_user_keyset', ['user_id', 'last_name', 'first_name', 'id']),
+    ('ix_contacts_user_birthday_md', ['user_id', 'birthday_md']),
+    ('ix_contacts_user_updated_at', ['user_id', 'updated_at']),
+    ('ix_contacts_user_change_seq', ['user_id', 'change_seq']),
+]
+TRGM_COLUMNS = ('first_name', 'last_name', 'email')
+
+
+def _scalar(conn, sql):
+    return conn.exec_driver_sql(sql).scalar()
+
+
+def _rebuild(conn, partitions):
+    """
+    Replace ``contacts`` with a copy of itself, hash-partitioned into
+    ``partitions`` tables, or a plain table when ``partitions`` is None.
+    """
+    old = 'contacts_partitioned' if partitions is None else 'contacts_unpartitioned'
+    conn.exec_driver_sql(f'ALTER TABLE contacts RENAME TO {old}')
+    sequence = _scalar(conn, f"SELECT pg_get_serial_sequence('{old}', 'id')")
+    # Columns, NOT NULLs and the id default (nextval) come along; constraints and indexes are rebuilt below.
+    if partitions is None:
+        conn.exec_driver_sql(f'CREATE TABLE contacts (LIKE {old} INCLUDING DEFAULTS)')
+    else:
+        conn.exec_driver_sql(f'CREATE TABLE contacts (LIKE {old} INCLUDING DEFAULTS) PARTITION BY HASH (user_id)')
+        for remainder in range(partitions):
+            conn.exec_driver_sql(
+                f'CREATE TABLE contacts_p{remainder:02d} PARTITION OF contacts '
+                f'FOR VALUES WITH (MODULUS {partitions}, REMAINDER {remainder})'
+            )
+
+    conn.exec_driver_sql(f'INSERT INTO contacts SELECT * FROM {old}')
+    moved, expected = _scalar(conn, 'SELECT count(*) FROM contacts'), _scalar(conn, f'SELECT count(*) FROM {old}')
+    if moved != expected:
+        raise RuntimeError(f'Copied {moved} of {expected} contacts')
+    if sequence:
+        conn.exec_driver_sql(f'ALTER SEQUENCE {sequence} OWNED BY contacts.id')
+    conn.exec_driver_sql(f'DROP TABLE {old}')
+
+    primary_key = '(id)' if partitions is None else '(user_id, id)'
+    conn.exec_driver_sql(f'ALTER TABLE contacts ADD CONSTRAINT contacts_pkey PRIMARY KEY {primary_key}')
+    conn.exec_driver_sql(
+        'ALTER TABLE contacts ADD CONSTRAINT contacts_user_id_fkey FOREIGN KEY (user_id) REFERENCES users (id)'
+    )
+    for name, columns in INDEXES:
+        unique = 'UNIQUE ' if partitions is None and name == 'ix_contacts_email' else ''
+        conn.exec_driver_sql(f'CREATE {unique}INDEX {name} ON contacts ({", ".join(columns)})')
+    if partitions is not None:
+        conn.exec_driver_sql('CREATE UNIQUE INDEX uq_contacts_user_email ON contacts (user_id, email)')
+    if _scalar(conn, "SELECT count(*) FROM pg_extension WHERE extname = 'pg_trgm'"):
+        for column in TRGM_COLUMNS:
+            conn.exec_driver_sql(
+                f'CREATE INDEX ix_contacts_{column}_trgm ON contacts USING gin ({column} gin_trgm_ops)'
+            )
+    conn.exec_driver_sql('ANALYZE contacts')
+
+
+def move_to_partitioned(conn, partitions: int = CONTACTS_PARTITIONS) -> None:
+    """
+    Copy contacts into a table hash-partitioned on user_id.
+
+    Runs inside the migration transaction, so a failure leaves the old
+    table in place. The copy holds an exclusive lock on contacts for its
+    whole duration; schedule it in a maintenance window on large tables.
+    """
+    orphans = _scalar(conn, 'SELECT count(*) FROM contacts WHERE user_id IS NULL')
+    if orphans:
+        raise RuntimeError(f'{orphans} contacts have no user_id; assign or delete them before partitioning')
+    _rebuild(conn, partitions)
+
+
+def move_to_unpartitioned(conn) -> None:
+    """
+    Copy contacts back into a single table with a global unique email.
+    """
+    shared = _scalar(
+        conn, 'SELECT count(*) FROM (SELECT email FROM contacts GROUP BY email HAVING count(*) > 1) AS dupes'
+    )
+    if shared:
+        raise RuntimeError(f'{shared} emails are used by more than one user; cannot restore global uniqueness')
+    _rebuild(conn, None)
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    conn = op.get_bind()
+    if conn.dialect.name == 'postgresql':
+        # user_id becomes NOT NULL through the (user_id, id) primary key.
+        move_to_partitioned(conn)
+    else:
+        # SQLite: no partitioning, only the per-user uniqueness. A unique index
+        # avoids a table rebuild, which would drop the FTS triggers.
+        op.drop_index('ix_contacts_email', table_name='contacts')
+        op.create_index('ix_contacts_email', 'contacts', ['email'], unique=False)
+        op.create_index('uq_contacts_user_email', 'contacts', ['user_id', 'email'], unique=True)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    conn = op.get_bind()
+    if conn.dialect.name == 'postgresql':
+        move_to_unpartitioned(conn)
+        op.alter_column('contacts', 'user_id', existing_type=sa.Integer(), nullable=True)
+    else:
+        op.drop_index('uq_contacts_user_email', table_name='contacts')
+        op.drop_index('ix_contacts_email', table_name='contacts')
+        op.create_index('ix_contacts_email', 'contacts', ['email'], unique=True)
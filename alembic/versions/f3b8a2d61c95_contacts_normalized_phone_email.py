@@ -0,0 +1,38 @@
+"""Normalized phone and email columns for contact lookups
+
+Revision ID: f3b8a2d61c95
+Revises: d9c3f1a6b8e4
+Create Date: 2026-10-18 19:42:13.518204
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+from src.repository.database.backfill import backfill_normalized
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'f3b8a2d61c95'
+down_revision: Union[str, None] = 'd9c3f1a6b8e4'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.add_column('contacts', sa.Column('phone_e164', sa.String(), nullable=True))
+    op.add_column('contacts', sa.Column('email_lower', sa.String(), nullable=True))
+    # Filled before indexing, so each row is written once rather than once per index.
+    backfill_normalized(op.get_bind())
+    op.create_index('ix_contacts_user_phone_e164', 'contacts', ['user_id', 'phone_e164'], unique=False)
+    op.create_index('ix_contacts_user_email_lower', 'contacts', ['user_id', 'email_lower'], unique=False)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index('ix_contacts_user_email_lower', table_name='contacts')
+    op.drop_index('ix_contacts_user_phone_e164', table_name='contacts')
+    op.drop_column('contacts', 'email_lower')
+    op.drop_column('contacts', 'phone_e164')
@@ -0,0 +1,89 @@
+"""
+Benchmark GET /contacts/birthdays' query at scale.
+
+Seeds a throwaway SQLite database (or the one in --url) with --contacts rows
+spread over --users owners and times ``contacts.get_upcoming_birthdays`` for
+random users::
+
+    python -m benchmarks.bench_birthdays --contacts 1000000 --users 1000
+"""
+import argparse
+import os
+import random
+import statistics
+import tempfile
+import time
+from datetime import date, timedelta
+
+from sqlalchemy import create_engine, insert
+from sqlalchemy.orm import sessionmaker
+
+from src.repository import contacts
+from src.repository.database.models import Base, Contact, User, birthday_key
+
+
+def seed(engine, n_contacts: int, n_users: int, batch: int = 20000):
+    Base.metadata.create_all(bind=engine)
+    with engine.begin() as conn:
+        conn.execute(insert(User), [
+            {"id": i, "username": f"user{i}", "email": f"user{i}@bench.local", "hashed_password": "x"}
+            for i in range(1, n_users + 1)
+        ])
+        rng = random.Random(42)
+        epoch = date(1950, 1, 1)
+        for start in range(0, n_contacts, batch):
+            rows = []
+            for i in range(start, min(start + batch, n_contacts)):
+                birthday = epoch + timedelta(days=rng.randrange(365 * 60))
+                rows.append({
+                    "first_name": f"F{i}", "last_name": f"L{i}", "email": f"c{i}@bench.local",
+                    "phone": str(i), "birthday": birthday, "birthday_md": birthday_key(birthday),
+                    "user_id": rng.randint(1, n_users),
+                })
+            conn.execute(insert(Contact), rows)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--contacts", type=int, default=1_000_000)
+    parser.add_argument("--users", type=int, default=1000)
+    parser.add_argument("--days", type=int, default=7)
+    parser.add_argument("--iterations", type=int, default=500)
+    parser.add_argument("--url", help="Existing database to use instead of a temporary SQLite file")
+    args = parser.parse_args()
+
+    path = None
+    if args.url:
+        url = args.url
+    else:
+        fd, path = tempfile.mkstemp(suffix=".db")
+        os.close(fd)
+        url = f"sqlite:///{path}"
+    engine = create_engine(url)
+    try:
+        started = time.perf_counter()
+        seed(engine, args.contacts, args.users)
+        print(f"seeded {args.contacts} contacts / {args.users} users in {time.perf_counter() - started:.1f}s")
+
+        db = sessionmaker(bind=engine)()
+        rng = random.Random(7)
+        timings, rows = [], 0
+        for _ in range(args.iterations):
+            today = date(2026, 1, 1) + timedelta(days=rng.randrange(365))
+            started = time.perf_counter()
+            rows += len(contacts.get_upcoming_birthdays(db, rng.randint(1, args.users), args.days, today))
+            timings.append((time.perf_counter() - started) * 1000)
+            db.expunge_all()
+        timings.sort()
+        print(f"days={args.days} iterations={args.iterations} avg rows={rows / args.iterations:.1f}")
+        print(f"p50={statistics.median(timings):.2f}ms "
+              f"p95={timings[int(len(timings) * 0.95) - 1]:.2f}ms max={timings[-1]:.2f}ms")
+        db.close()
+    finally:
+        engine.dispose()
+        if path:
+            os.remove(path)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,82 @@
+"""
+Cost of fetching and serializing a large contact list, old path against new::
+
+    python -m benchmarks.bench_json --contacts 10000 --rounds 5
+
+``jsonable_encoder`` is what a route without ``response_model`` did with ORM
+entities; ``response_model`` validates ContactResponse from entities and
+renders with orjson; ``columns+orjson`` is the list route: column rows turned
+into dicts and rendered by orjson without a model.
+"""
+import argparse
+import os
+import time
+from datetime import date
+
+os.environ.setdefault("DATABASE_URL", "sqlite://")
+os.environ.setdefault("SECRET_KEY", "bench-secret")
+
+from fastapi.encoders import jsonable_encoder
+from fastapi.responses import JSONResponse, ORJSONResponse
+from pydantic import TypeAdapter
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+
+from src.repository import contacts
+from src.repository.database.models import Base, Contact
+from src.schemas import ContactCreate, ContactResponse
+
+
+def seed(db, n: int):
+    batch = [
+        ContactCreate(first_name=f"First{i}", last_name=f"Last{i % 97}", email=f"c{i}@example.com",
+                      phone=f"+1555{i:07d}", birthday=date(1970 + i % 40, 1 + i % 12, 1 + i % 28),
+                      additional_info="imported" if i % 3 else None)
+        for i in range(n)
+    ]
+    for start in range(0, n, 500):
+        contacts.bulk_insert_contacts(db, 1, batch[start:start + 500])
+
+
+def measure(fn, rounds: int) -> tuple[float, int]:
+    best, size = float("inf"), 0
+    for _ in range(rounds):
+        start = time.perf_counter()
+        size = len(fn())
+        best = min(best, time.perf_counter() - start)
+    return best * 1000, size
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--contacts", type=int, default=10000)
+    parser.add_argument("--rounds", type=int, default=5)
+    args = parser.parse_args()
+
+    engine = create_engine("sqlite://")
+    Base.metadata.create_all(bind=engine)
+    db = sessionmaker(bind=engine)()
+    seed(db, args.contacts)
+    adapter = TypeAdapter(list[ContactResponse])
+
+    def entities():
+        db.expunge_all()
+        return db.query(Contact).filter(Contact.user_id == 1).order_by(Contact.last_name, Contact.first_name, Contact.id).all()
+
+    def rows():
+        return contacts.get_contacts_page(db, 1, limit=args.contacts)[0]
+
+    paths = {
+        "jsonable_encoder": lambda: JSONResponse(jsonable_encoder(entities())).body,
+        "response_model": lambda: ORJSONResponse(adapter.dump_python(adapter.validate_python(entities()), mode="json")).body,
+        "columns+orjson": lambda: ORJSONResponse([row._asdict() for row in rows()]).body,
+    }
+    baseline = None
+    for name, fn in paths.items():
+        ms, size = measure(fn, args.rounds)
+        baseline = baseline or ms
+        print(f"{name:>16}: {ms:8.1f} ms  {size / 1024:8.0f} KiB  {baseline / ms:5.1f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,57 @@
+"""
+Measure the cost of the Prometheus instrumentation.
+
+Runs ``benchmarks.load`` in fresh subprocesses with METRICS_ENABLED on and off,
+alternating ``--rounds`` times to spread out noise, and prints the median
+change in p50/p95 latency and throughput per scenario::
+
+    python -m benchmarks.bench_metrics --rounds 3 --requests 300
+
+Extra arguments after ``--`` are passed to ``benchmarks.load``.
+"""
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+
+FIELDS = ("p50_ms", "p95_ms", "throughput_rps")
+
+
+def run_load(enabled: bool, output: str, load_args: list[str]) -> dict:
+    env = {**os.environ, "METRICS_ENABLED": "true" if enabled else "false"}
+    subprocess.run([sys.executable, "-m", "benchmarks.load", "--output", output, *load_args],
+                   env=env, check=True, stdout=subprocess.DEVNULL)
+    with open(output) as f:
+        return json.load(f)["results"]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--rounds", type=int, default=3)
+    parser.add_argument("--requests", type=int, default=300)
+    parser.add_argument("load_args", nargs=argparse.REMAINDER)
+    args = parser.parse_args()
+    load_args = ["--requests", str(args.requests), *[a for a in args.load_args if a != "--"]]
+
+    runs = {True: [], False: []}
+    with tempfile.TemporaryDirectory() as tmpdir:
+        for i in range(args.rounds):
+            for enabled in (False, True):
+                output = os.path.join(tmpdir, f"{enabled}-{i}.json")
+                runs[enabled].append(run_load(enabled, output, load_args))
+
+    for scenario in runs[False][0]:
+        cells = []
+        for field in FIELDS:
+            off = statistics.median(r[scenario][field] for r in runs[False])
+            on = statistics.median(r[scenario][field] for r in runs[True])
+            change = (on - off) / off * 100 if off else 0.0
+            cells.append(f"{field} {off:.2f} -> {on:.2f} ({change:+.1f}%)")
+        print(f"{scenario:>7}: " + "  ".join(cells))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,75 @@
+"""
+Measure the per-request overhead of the shared rate limiter.
+
+Drives two copies of a trivial route through the ASGI stack, one undecorated
+and one with the same per-user + per-IP limits the contacts routes use, and
+prints the difference per request::
+
+    python -m benchmarks.bench_rate_limit --storage memory://
+    python -m benchmarks.bench_rate_limit --storage redis://localhost:6379/0
+"""
+import argparse
+import asyncio
+import time
+
+import httpx
+from fastapi import FastAPI, Request
+from slowapi import Limiter
+from slowapi.middleware import SlowAPIMiddleware
+from slowapi.util import get_remote_address
+
+from src.services import auth
+from src.services.limiter import RATE_LIMIT_STRATEGY, user_key
+
+
+def build_app(storage_uri: str) -> FastAPI:
+    limiter = Limiter(key_func=get_remote_address, default_limits=["1000000/minute"],
+                      storage_uri=storage_uri, strategy=RATE_LIMIT_STRATEGY, key_style="endpoint")
+    app = FastAPI()
+    app.state.limiter = limiter
+    app.add_middleware(SlowAPIMiddleware)
+
+    @app.get("/plain")
+    @limiter.exempt
+    async def plain(request: Request):
+        return {"ok": True}
+
+    @app.get("/limited")
+    @limiter.limit("1000000/minute", key_func=user_key, override_defaults=False)
+    async def limited(request: Request):
+        return {"ok": True}
+
+    return app
+
+
+async def drive(client: httpx.AsyncClient, path: str, n: int, headers: dict) -> float:
+    started = time.perf_counter()
+    for _ in range(n):
+        response = await client.get(path, headers=headers)
+        response.raise_for_status()
+    return (time.perf_counter() - started) / n * 1e6
+
+
+async def run(storage_uri: str, n: int):
+    app = build_app(storage_uri)
+    headers = {"Authorization": f"Bearer {auth.create_access_token({'sub': 'bench@example.com'})}"}
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://bench") as client:
+        await drive(client, "/plain", 200, headers)
+        await drive(client, "/limited", 200, headers)
+        plain = await drive(client, "/plain", n, headers)
+        limited = await drive(client, "/limited", n, headers)
+    print(f"storage={storage_uri} strategy={RATE_LIMIT_STRATEGY} requests={n}")
+    print(f"unlimited {plain:.1f}us/req  limited {limited:.1f}us/req  overhead {limited - plain:.1f}us/req")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--storage", default="memory://")
+    parser.add_argument("--requests", type=int, default=5000)
+    args = parser.parse_args()
+    asyncio.run(run(args.storage, args.requests))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,85 @@
+"""
+Import time and time-to-first-request of the app, each in a fresh process::
+
+    python -m benchmarks.bench_startup --runs 5 --top 15
+
+Every run starts a new interpreter with ``-X importtime`` that imports
+``main``, starts the lifespan through a TestClient and serves one request.
+Reported are the medians of: import of ``main``, startup (lifespan), the
+first request, and the total from interpreter start; then the packages
+that contribute most to the import, by self time summed per top-level
+package.
+"""
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+from collections import defaultdict
+
+CHILD = """
+import json, time
+start = time.perf_counter()
+from main import app
+imported = time.perf_counter()
+from fastapi.testclient import TestClient
+with TestClient(app) as client:
+    started = time.perf_counter()
+    status = client.get("/health/db").status_code
+    served = time.perf_counter()
+print(json.dumps({"import": imported - start, "startup": started - imported,
+                  "first_request": served - started, "status": status}))
+"""
+
+
+def run_once(env: dict) -> tuple[dict, dict]:
+    """
+    :param env: Environment of the child process
+    :return: Timings in seconds and self import time in microseconds per top-level package
+    """
+    proc = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", CHILD],
+        env=env, capture_output=True, text=True, check=True,
+    )
+    timings = json.loads(proc.stdout.strip().splitlines()[-1])
+    packages = defaultdict(int)
+    for line in proc.stderr.splitlines():
+        if not line.startswith("import time:") or "|" not in line:
+            continue
+        self_us, _, name = line[len("import time:"):].split("|")
+        if self_us.strip().isdigit():
+            packages[name.strip().split(".")[0]] += int(self_us)
+    return timings, packages
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--runs", type=int, default=5)
+    parser.add_argument("--top", type=int, default=15, help="number of packages to list")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        env = {
+            **os.environ,
+            "DATABASE_URL": os.getenv("DATABASE_URL", f"sqlite:///{tmp}/startup.db"),
+            "SECRET_KEY": os.getenv("SECRET_KEY", "bench-secret"),
+            "PYTHONDONTWRITEBYTECODE": "1",
+        }
+        runs = [run_once(env) for _ in range(args.runs)]
+
+    for key in ("import", "startup", "first_request"):
+        print(f"{key:>14}: {statistics.median(t[key] for t, _ in runs) * 1000:8.1f} ms")
+    total = statistics.median(sum(t[k] for k in ("import", "startup", "first_request")) for t, _ in runs)
+    print(f"{'total':>14}: {total * 1000:8.1f} ms  (status {runs[-1][0]['status']})")
+
+    names = {name for _, packages in runs for name in packages}
+    medians = {name: statistics.median(p.get(name, 0) for _, p in runs) for name in names}
+    print(f"\ntop {args.top} packages by import self time")
+    for name, us in sorted(medians.items(), key=lambda item: -item[1])[:args.top]:
+        print(f"{name:>24}: {us / 1000:8.1f} ms")
+
+
+if __name__ == "__main__":
+    main()
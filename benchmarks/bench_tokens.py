@@ -0,0 +1,46 @@
+"""
+Token verifications per second for each backend, with and without the cache::
+
+    python -m benchmarks.bench_tokens --tokens 1000 --rounds 20
+
+The uncached run verifies every token through the backend; the cached run
+uses one verifier per backend so all but the first round are cache hits.
+"""
+import argparse
+import time
+
+from src.services.tokens import BACKENDS, TokenVerifier
+
+
+def rate(verifier: TokenVerifier, tokens: list[str], rounds: int) -> float:
+    start = time.perf_counter()
+    for _ in range(rounds):
+        for token in tokens:
+            if verifier.verify(token) is None:
+                raise SystemExit("verification failed")
+    return rounds * len(tokens) / (time.perf_counter() - start)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--tokens", type=int, default=1000)
+    parser.add_argument("--rounds", type=int, default=20)
+    args = parser.parse_args()
+
+    keys = {"k1": "bench-secret"}
+    issuer = TokenVerifier("jose", keys=keys)
+    tokens = [issuer.issue({"sub": f"user{i}@example.com"}, 3600) for i in range(args.tokens)]
+
+    for name in BACKENDS:
+        try:
+            uncached = TokenVerifier(name, keys=keys, cache_size=0)
+        except ImportError as e:
+            print(f"{name:>6}: skipped ({e})")
+            continue
+        cached = TokenVerifier(name, keys=keys, cache_size=args.tokens)
+        print(f"{name:>6}: uncached {rate(uncached, tokens, args.rounds):>10,.0f}/s"
+              f"  cached {rate(cached, tokens, args.rounds):>10,.0f}/s")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,48 @@
+"""
+Diff two ``benchmarks.load`` JSON reports::
+
+    python -m benchmarks.compare base.json head.json [--threshold 10]
+
+Exits with status 1 when any scenario's p95 latency regressed by more than
+``--threshold`` percent.
+"""
+import argparse
+import json
+import sys
+
+METRICS = ("p50_ms", "p95_ms", "p99_ms", "throughput_rps")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("base")
+    parser.add_argument("head")
+    parser.add_argument("--threshold", type=float, default=10.0, help="allowed p95 regression in percent")
+    args = parser.parse_args()
+
+    with open(args.base) as f:
+        base = json.load(f)
+    with open(args.head) as f:
+        head = json.load(f)
+    print(f"base {base['meta']['commit']}  ->  head {head['meta']['commit']}")
+
+    regressed = []
+    for scenario, new in head["results"].items():
+        old = base["results"].get(scenario)
+        if not old:
+            continue
+        cells = []
+        for metric in METRICS:
+            change = (new[metric] - old[metric]) / old[metric] * 100 if old[metric] else 0.0
+            cells.append(f"{metric} {old[metric]:.2f} -> {new[metric]:.2f} ({change:+.1f}%)")
+            if metric == "p95_ms" and change > args.threshold:
+                regressed.append(scenario)
+        print(f"{scenario:>7}: " + "  ".join(cells))
+
+    if regressed:
+        print(f"p95 regression over {args.threshold}%: {', '.join(regressed)}")
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
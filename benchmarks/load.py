@@ -0,0 +1,205 @@
+"""
+Reproducible load test for the API.
+
+Seeds ``--users`` users and ``--contacts`` contacts per user through the
+repository layer, then drives the real ``main.app`` through httpx's ASGI
+transport (or a running server with ``--base-url``) and records p50/p95/p99
+latency and throughput for each scenario. Runs fully offline: SQLite in a
+temporary file and fakeredis in place of Redis::
+
+    python -m benchmarks.load --users 20 --contacts 500 --requests 300 --concurrency 8
+    python -m benchmarks.compare benchmarks/results/base.json benchmarks/results/head.json
+
+Results are written as JSON (``--output``, default
+``benchmarks/results/<git sha>.json``) so runs on two commits can be diffed.
+"""
+import argparse
+import asyncio
+import itertools
+import json
+import os
+import platform
+import random
+import statistics
+import subprocess
+import tempfile
+import time
+from datetime import date, datetime, timezone
+
+SCENARIOS = ("login", "refresh", "me", "list", "search", "create", "update")
+PASSWORD = "bench-password"
+_new_contact_ids = itertools.count()
+
+
+def git_sha() -> str:
+    try:
+        return subprocess.check_output(["git", "rev-parse", "--short", "HEAD"], text=True).strip()
+    except (OSError, subprocess.CalledProcessError):
+        return "unknown"
+
+
+def configure_env(db_path: str):
+    """Point the app at a throwaway SQLite file before any src module is imported."""
+    os.environ.setdefault("DATABASE_URL", f"sqlite:///{db_path}")
+    os.environ.setdefault("SECRET_KEY", "bench-secret")
+    os.environ.setdefault("RATE_LIMIT_ENABLED", "false")
+    os.environ.setdefault("RATE_LIMIT_STORAGE_URI", "memory://")
+
+
+def install_fake_redis():
+    import fakeredis
+    from src.services import cache
+
+    server = fakeredis.FakeServer()
+    cache.r = fakeredis.FakeRedis(server=server, decode_responses=True)
+    cache.results_r = fakeredis.FakeRedis(server=server, decode_responses=True)
+
+
+async def seed(n_users: int, n_contacts: int) -> list[dict]:
+    from src.repository import contacts, users
+    from src.repository.database.db import AsyncSessionLocal, Base, engine, run_with_session
+    from src.schemas import ContactCreate, UserCreate
+    from src.services.security import get_password_hash_async
+
+    Base.metadata.create_all(bind=engine)
+    hashed = await get_password_hash_async(PASSWORD)
+    accounts = []
+    async with AsyncSessionLocal() as db:
+        for u in range(n_users):
+            email = f"bench{u}@example.com"
+            user = await users.get_user_by_email_async(db, email)
+            if user is None:
+                data = UserCreate(id=0, username=f"bench{u}", email=email, password=PASSWORD)
+                user = await run_with_session(db, users.create_user, data, hashed)
+                batch = [
+                    ContactCreate(first_name=f"First{i}", last_name=f"Last{i % 97}", email=f"c{u}-{i}@example.com",
+                                  phone=f"+1555{i:07d}", birthday=date(1970 + i % 40, 1 + i % 12, 1 + i % 28))
+                    for i in range(n_contacts)
+                ]
+                for start in range(0, len(batch), 500):
+                    await contacts.bulk_insert_contacts_async(db, user.id, batch[start:start + 500])
+            ids = [c.id for c in await contacts.get_contacts_async(db, user.id)]
+            accounts.append({"email": email, "user_id": user.id, "contact_ids": ids})
+    return accounts
+
+
+def make_request(scenario: str, account: dict, rng: random.Random):
+    if scenario == "login":
+        return "POST", "/auth/login", {"data": {"username": account["email"], "password": PASSWORD}}
+    if scenario == "refresh":
+        from src.services.auth import issue_token_pair
+        # Every refresh token works once, so each request gets a fresh one.
+        return "POST", "/auth/refresh", {"json": {"refresh_token": issue_token_pair(account["email"])["refresh_token"]}}
+    if scenario == "me":
+        return "GET", "/auth/me", {}
+    if scenario == "list":
+        return "GET", "/contacts/", {"params": {"limit": 50}}
+    if scenario == "search":
+        return "GET", "/contacts/search", {"params": {"q": f"Last{rng.randrange(97)}", "limit": 20}}
+    if scenario == "create":
+        return "POST", "/contacts/", {"json": {
+            "first_name": "Load", "last_name": "Test", "email": f"new-{os.getpid()}-{next(_new_contact_ids)}@example.com",
+            "phone": "+15550000000", "birthday": "1990-01-01"}}
+    if scenario == "update":
+        contact_id = rng.choice(account["contact_ids"])
+        return "PUT", f"/contacts/{contact_id}", {"json": {"phone": f"+1555{rng.randrange(10**7):07d}"}}
+    raise ValueError(scenario)
+
+
+async def run_scenario(client, scenario: str, accounts: list[dict], tokens: dict, n: int, concurrency: int) -> dict:
+    rng = random.Random(scenario)
+    latencies, errors = [], 0
+    queue = asyncio.Queue()
+    for _ in range(n):
+        queue.put_nowait(rng.choice(accounts))
+
+    async def worker():
+        nonlocal errors
+        while not queue.empty():
+            account = queue.get_nowait()
+            method, url, kwargs = make_request(scenario, account, rng)
+            headers = {"Authorization": f"Bearer {tokens[account['email']]}"}
+            started = time.perf_counter()
+            response = await client.request(method, url, headers=headers, **kwargs)
+            latencies.append((time.perf_counter() - started) * 1000)
+            if response.status_code >= 400:
+                errors += 1
+
+    started = time.perf_counter()
+    await asyncio.gather(*(worker() for _ in range(concurrency)))
+    elapsed = time.perf_counter() - started
+    q = statistics.quantiles(latencies, n=100) if len(latencies) > 1 else latencies * 99
+    return {
+        "count": len(latencies),
+        "errors": errors,
+        "mean_ms": round(statistics.fmean(latencies), 3),
+        "p50_ms": round(q[49], 3),
+        "p95_ms": round(q[94], 3),
+        "p99_ms": round(q[98], 3),
+        "throughput_rps": round(len(latencies) / elapsed, 1),
+    }
+
+
+async def run(args) -> dict:
+    import httpx
+    from src.services.auth import create_access_token
+
+    accounts = await seed(args.users, args.contacts)
+    tokens = {a["email"]: create_access_token({"sub": a["email"]}) for a in accounts}
+    if args.base_url:
+        client = httpx.AsyncClient(base_url=args.base_url, timeout=60)
+    else:
+        from main import app
+        client = httpx.AsyncClient(transport=httpx.ASGITransport(app=app), base_url="http://bench", timeout=60)
+
+    results = {}
+    async with client:
+        for scenario in args.scenarios:
+            await run_scenario(client, scenario, accounts, tokens, min(args.warmup, args.requests), args.concurrency)
+            results[scenario] = await run_scenario(client, scenario, accounts, tokens, args.requests, args.concurrency)
+            r = results[scenario]
+            print(f"{scenario:>7}: p50 {r['p50_ms']:8.2f}ms  p95 {r['p95_ms']:8.2f}ms  p99 {r['p99_ms']:8.2f}ms  "
+                  f"{r['throughput_rps']:8.1f} req/s  errors {r['errors']}")
+    # aiosqlite keeps a worker thread per pooled connection; close them so the process can exit.
+    from src.repository.database.db import async_engine
+    await async_engine.dispose()
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--users", type=int, default=20)
+    parser.add_argument("--contacts", type=int, default=500, help="contacts per user")
+    parser.add_argument("--requests", type=int, default=300, help="measured requests per scenario")
+    parser.add_argument("--warmup", type=int, default=30)
+    parser.add_argument("--concurrency", type=int, default=8)
+    parser.add_argument("--scenarios", nargs="+", choices=SCENARIOS, default=list(SCENARIOS))
+    parser.add_argument("--base-url", help="hit a running server instead of the in-process app")
+    parser.add_argument("--output", help="JSON output path")
+    args = parser.parse_args()
+
+    tmpdir = tempfile.mkdtemp(prefix="contacts-bench-")
+    configure_env(os.path.join(tmpdir, "bench.db"))
+    install_fake_redis()
+    results = asyncio.run(run(args))
+
+    sha = git_sha()
+    report = {
+        "meta": {
+            "commit": sha,
+            "timestamp": datetime.now(timezone.utc).isoformat(timespec="seconds"),
+            "python": platform.python_version(),
+            "db_async": os.getenv("DB_ASYNC", "true"),
+            "params": {k: v for k, v in vars(args).items() if k != "output"},
+        },
+        "results": results,
+    }
+    output = args.output or os.path.join(os.path.dirname(__file__), "results", f"{sha}.json")
+    os.makedirs(os.path.dirname(os.path.abspath(output)), exist_ok=True)
+    with open(output, "w") as f:
+        json.dump(report, f, indent=2)
+    print(f"wrote {output}")
+
+
+if __name__ == "__main__":
+    main()
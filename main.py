@@ -1,30 +1,78 @@
-from fastapi import FastAPI, Request
-from src.api import contacts, auth
-from src.repository.database.db import engine, Base
-from slowapi import Limiter
-from slowapi.util import get_remote_address
+from contextlib import asynccontextmanager
+from fastapi import FastAPI
+from fastapi.responses import ORJSONResponse
+from starlette.concurrency import run_in_threadpool
+from src.api import contacts, auth, health
+from src.conf.config import Settings
+from src.repository.database.db import async_engine, async_replica_engines, engine, replica_engines, Base
+from slowapi import _rate_limit_exceeded_handler
+from slowapi.errors import RateLimitExceeded
 from slowapi.middleware import SlowAPIMiddleware
+from src.services.limiter import limiter
+from src.services.metrics import setup_metrics
+from src.services.security import shutdown_hashing_executor
 from fastapi.middleware.cors import CORSMiddleware
+from src.services.storage import AVATAR_LOCAL_DIR, AVATAR_LOCAL_URL, AVATAR_STORAGE
 from dotenv import load_dotenv
 
 load_dotenv()
 
-limiter = Limiter(key_func=get_remote_address)
+def make_lifespan(settings: Settings):
+    """
+    Startup and shutdown for an app built from ``settings``.
 
-app = FastAPI()
+    Nothing touches the database at import time: engines connect on the
+    first checkout, the schema is created (if enabled) when the server
+    starts, and every pool is closed when it stops.
 
-app.add_middleware(
-    CORSMiddleware,
-    allow_origins=["*"],
-    allow_credentials=True,
-    allow_methods=["*"],
-    allow_headers=["*"],
-)
+    :param settings: Application settings
+    :return: Lifespan context manager factory
+    """
+    @asynccontextmanager
+    async def lifespan(app: FastAPI):
+        if settings.create_schema:
+            await run_in_threadpool(Base.metadata.create_all, bind=engine)
+        yield
+        for sync_engine in (engine, *replica_engines):
+            sync_engine.dispose()
+        for aio_engine in (async_engine, *async_replica_engines):
+            await aio_engine.dispose()
+        await run_in_threadpool(shutdown_hashing_executor)
 
-app.state.limiter = limiter
-app.add_middleware(SlowAPIMiddleware)
+    return lifespan
 
-Base.metadata.create_all(bind=engine)
+def create_app(settings: Settings | None = None) -> FastAPI:
+    """
+    Build the application.
 
-app.include_router(auth.router)
-app.include_router(contacts.router)
+    :param settings: Application settings; read from the environment when omitted
+    :return: FastAPI application
+    """
+    settings = settings or Settings()
+    app = FastAPI(default_response_class=ORJSONResponse, lifespan=make_lifespan(settings))
+
+    app.add_middleware(
+        CORSMiddleware,
+        allow_origins=settings.cors_origins,
+        allow_credentials=True,
+        allow_methods=["*"],
+        allow_headers=["*"],
+    )
+
+    app.state.limiter = limiter
+    app.add_exception_handler(RateLimitExceeded, _rate_limit_exceeded_handler)
+    app.add_middleware(SlowAPIMiddleware)
+    if settings.metrics:
+        setup_metrics(app, [engine, async_engine, *replica_engines, *async_replica_engines])
+
+    app.include_router(auth.router)
+    app.include_router(contacts.router)
+    app.include_router(health.router)
+
+    if settings.serve_media and AVATAR_STORAGE == "local":
+        from fastapi.staticfiles import StaticFiles
+
+        app.mount(AVATAR_LOCAL_URL, StaticFiles(directory=AVATAR_LOCAL_DIR, check_dir=False), name="media")
+    return app
+
+app = create_app()
@@ -1,52 +1,78 @@
-from fastapi import APIRouter, Depends, HTTPException, Request, UploadFile, File
-from sqlalchemy.orm import Session
+from fastapi import APIRouter, Depends, HTTPException, Request, UploadFile
+from starlette.concurrency import run_in_threadpool
 from fastapi.security import OAuth2PasswordRequestForm
-from src.repository.database.db import get_db
+from src.repository.database.db import get_session
 from src.repository import users
 from src.schemas import UserCreate, UserBase, UserResponse  
-from src.services.auth import create_access_token, decode_token, get_current_user, upload_avatar
-from src.services.security import  verify_password
-from slowapi import Limiter
-from slowapi.util import get_remote_address
+from src.services.auth import decode_token, get_current_user, issue_token_pair, rotate_refresh_token
+from src.services.security import verify_and_update_async
 from src.repository.database.models import User
-from src.schemas import RequestPasswordReset, PasswordResetConfirm
+from src.schemas import RequestPasswordReset, PasswordResetConfirm, RefreshRequest
 from src.services import reset_password
+from src.services.cache import invalidate_user
+from src.services.jobs import get_job_queue
+from src.services.tasks import queue_avatar
+from src.services.avatars import InvalidImage, avatar_upload, check_image, read_limited
+from src.services.limiter import limiter, RATE_LIMIT_LOGIN, RATE_LIMIT_ME, RATE_LIMIT_REFRESH, RATE_LIMIT_SIGNUP
 from src.dependencies.roles import require_admin
 
-limiter = Limiter(key_func=get_remote_address)
-
 router = APIRouter(prefix="/auth", tags=["Auth"])
 
 @router.post("/signup", response_model=UserBase, status_code=201)
-def signup(user: UserCreate, db: Session = Depends(get_db)):
+@limiter.limit(RATE_LIMIT_SIGNUP)
+async def signup(request: Request, user: UserCreate, db = Depends(get_session)):
     """
     Sign up a new user.
 
+    :param request: HTTP request object
     :param user: User data
     :param db: SQLAlchemy database session
     :return: Created user
     """
-    if users.get_user_by_email(db, user.email):
+    if await users.get_user_by_email_async(db, user.email):
         raise HTTPException(status_code=409, detail="User already exists")
-    return users.create_user(db, user)
+    return await users.create_user_async(db, user)
 
 @router.post("/login")
-def login(form_data: OAuth2PasswordRequestForm = Depends(), db: Session = Depends(get_db)):
+@limiter.limit(RATE_LIMIT_LOGIN)
+async def login(request: Request, form_data: OAuth2PasswordRequestForm = Depends(), db = Depends(get_session)):
     """
     Log in a user and return an access token.
+    Stored hashes made with an outdated bcrypt cost are rehashed on success.
 
+    :param request: HTTP request object
     :param form_data: Form data containing username and password
     :param db: SQLAlchemy database session
-    :return: Access token and token type
+    :return: Access token, refresh token and token type
     """
-    user = users.get_user_by_email(db, form_data.username)
-    if not user or not verify_password(form_data.password, user.hashed_password):
+    user = await users.get_user_by_email_async(db, form_data.username)
+    if not user:
+        raise HTTPException(status_code=401, detail="Invalid credentials")
+    valid, new_hash = await verify_and_update_async(form_data.password, user.hashed_password)
+    if not valid:
         raise HTTPException(status_code=401, detail="Invalid credentials")
-    token = create_access_token({"sub": user.email})
-    return {"access_token": token, "token_type": "bearer"}
+    if new_hash:
+        await users.update_password_async(db, user.email, new_hash)
+    return issue_token_pair(user.email)
+
+@router.post("/refresh")
+@limiter.limit(RATE_LIMIT_REFRESH)
+async def refresh(request: Request, data: RefreshRequest):
+    """
+    Exchange a refresh token for a new access and refresh token.
+    The presented refresh token stops working.
+
+    :param request: HTTP request object
+    :param data: Request data containing the refresh token
+    :return: Access token, refresh token and token type
+    """
+    tokens = await run_in_threadpool(rotate_refresh_token, data.refresh_token)
+    if tokens is None:
+        raise HTTPException(status_code=401, detail="Invalid refresh token")
+    return tokens
 
 @router.get("/confirm")
-def confirm_email(token: str, db: Session = Depends(get_db)):
+async def confirm_email(token: str, db = Depends(get_session)):
     """
     Confirm a user's email address using a token.
 
@@ -57,16 +83,15 @@ def confirm_email(token: str, db: Session = Depends(get_db)):
     payload = decode_token(token)
     if not payload or "sub" not in payload:
         raise HTTPException(status_code=400, detail="Invalid token")
-    user = users.get_user_by_email(db, payload["sub"])
+    user = await users.confirm_email_async(db, payload["sub"])
     if not user:
         raise HTTPException(status_code=404, detail="User not found")
-    user.confirmed = True
-    db.commit()
+    await run_in_threadpool(invalidate_user, user.email)
     return {"message": "Email confirmed"}
 
 @router.get("/me", response_model=UserResponse)
-@limiter.limit("5/minute")
-def read_me(request: Request, current_user = Depends(get_current_user)):
+@limiter.limit(RATE_LIMIT_ME)
+async def read_me(request: Request, current_user = Depends(get_current_user)):
     """
     Get the current user's information.
 
@@ -76,52 +101,71 @@ def read_me(request: Request, current_user = Depends(get_current_user)):
     """
     return current_user
 
-@router.post("/avatar", response_model=dict)
-def update_avatar(
-    file: UploadFile = File(...),
+# The body is parsed by avatar_upload, so the form is described here for the docs.
+AVATAR_REQUEST_BODY = {"requestBody": {"required": True, "content": {"multipart/form-data": {"schema": {
+    "type": "object", "required": ["file"], "properties": {"file": {"type": "string", "format": "binary"}},
+}}}}}
+
+@router.post("/avatar", response_model=dict, status_code=202, openapi_extra=AVATAR_REQUEST_BODY)
+async def update_avatar(
+    request: Request,
     current_user: User = Depends(get_current_user),
-    db: Session = Depends(get_db)
+    file: UploadFile = Depends(avatar_upload),
+    queue = Depends(get_job_queue),
 ):
     """
-    Update the user's avatar.
+    Queue an avatar upload. The user is authenticated before the body is
+    read, and uploads over AVATAR_MAX_BYTES are rejected from Content-Length
+    or while streaming. The new URL shows up on /auth/me once a worker has
+    resized and stored the image.
 
+    :param request: HTTP request object; an Idempotency-Key header makes retries safe
     :param file: Uploaded file
     :param current_user: Current user object
-    :param db: SQLAlchemy database session
-    :return: URL of the uploaded avatar
+    :param queue: Job queue
+    :return: Job id, null when the idempotency key was already used
     """
     if file.content_type not in ["image/jpeg", "image/png"]:
         raise HTTPException(status_code=400, detail="Invalid file type. Only JPEG and PNG allowed.")
 
-    avatar_url = upload_avatar(file)
-    current_user.avatar = avatar_url
-    db.commit()
-    db.refresh(current_user)
-
-    return {"avatar_url": avatar_url}
-
-
-
-router = APIRouter(prefix="/auth", tags=["Auth"])
-
-@router.post("/request-password-reset")
-async def request_password_reset(data: RequestPasswordReset, db: Session = Depends(get_db)):
+    data = await read_limited(file)
+    try:
+        await run_in_threadpool(check_image, data)
+    except InvalidImage as e:
+        raise HTTPException(status_code=400, detail=f"Invalid image: {e}")
+    key = request.headers.get("Idempotency-Key")
+    job_id = await run_in_threadpool(
+        queue_avatar, queue, current_user.email, data, f"avatar:{current_user.email}:{key}" if key else None
+    )
+    return {"job_id": job_id}
+
+
+@router.post("/request-password-reset", status_code=202)
+async def request_password_reset(
+    request: Request, data: RequestPasswordReset, db = Depends(get_session), queue = Depends(get_job_queue)
+):
     """
-    Request a password reset link for the user.
+    Request a password reset link for the user. The email is sent by the worker.
 
+    :param request: HTTP request object; an Idempotency-Key header makes retries safe
     :param data: Request data containing the user's email
     :param db: SQLAlchemy database session
+    :param queue: Job queue
     :return: Success message
     """
-    user = users.get_user_by_email(db, data.email)
+    user = await users.get_user_by_email_async(db, data.email)
     if not user:
         raise HTTPException(status_code=404, detail="User not found")
     token = reset_password.generate_reset_token(data.email)
-    await reset_password.send_password_reset_email(data.email, token)
-    return {"message": "Password reset email sent"}
+    key = request.headers.get("Idempotency-Key")
+    await run_in_threadpool(
+        reset_password.queue_password_reset_email, queue, data.email, token,
+        f"reset:{data.email}:{key}" if key else None,
+    )
+    return {"message": "Password reset email queued"}
 
 @router.post("/reset-password")
-async def confirm_reset(data: PasswordResetConfirm, db: Session = Depends(get_db)):
+async def confirm_reset(data: PasswordResetConfirm, db = Depends(get_session)):
     """
     Confirm the password reset using the token and new password.
 
@@ -1,83 +1,406 @@
-from fastapi import APIRouter, Depends, HTTPException
-from sqlalchemy.orm import Session
-from src.repository.database.db import get_db
+from fastapi import APIRouter, Depends, HTTPException, Query, Request, Response
+from fastapi.responses import ORJSONResponse, StreamingResponse
+from pydantic import TypeAdapter
+from sqlalchemy.ext.asyncio import AsyncSession
+from starlette.concurrency import run_in_threadpool
+from src.repository.database.db import get_session, read_bind
 from src.repository import contacts
-from src.schemas import ContactCreate, ContactUpdate
+from src.schemas import (
+    BatchResults, ContactBatchDelete, ContactBatchUpdate, ContactChanges, ContactCreate, ContactLookup,
+    ContactLookupResults, ContactResponse, ContactUpdate,
+)
+from src.services import cache, etags, exporter, importer
 from src.services.auth import get_current_user
+from src.services.limiter import limit_per_user, RATE_LIMIT_CONTACTS
 from src.repository.database.models import User
 
 router = APIRouter(prefix="/contacts", tags=["Contacts"])
+_contact_list = TypeAdapter(list[ContactResponse])
 
-@router.post("/", response_model=ContactCreate)
-def create(contact: ContactCreate, db: Session = Depends(get_db), current_user: User = Depends(get_current_user)):
+def _fold(value: str | None) -> str | None:
+    """
+    Case-fold a filter so "Bob" and "bob" share a result cache entry. The
+    filters are ILIKE, so the query is unchanged; only ASCII is folded
+    because SQLite's LIKE ignores case for ASCII letters alone.
+
+    :param value: Filter value
+    :return: Value to key the cache on
+    """
+    return value.lower() if value and value.isascii() else value
+
+def _not_modified(request: Request, response: Response) -> Response:
+    """
+    :param request: HTTP request object
+    :param response: Response built or served from the result cache
+    :return: 304 when If-None-Match matches the response ETag, else the response
+    """
+    etag = response.headers.get("etag")
+    if response.status_code == 200 and etag and etags.none_match(request.headers.get("if-none-match"), etag):
+        return Response(status_code=304, headers={"ETag": etag})
+    return response
+
+@router.post("/", response_model=ContactResponse)
+@limit_per_user(RATE_LIMIT_CONTACTS)
+async def create(request: Request, contact: ContactCreate, db = Depends(get_session), current_user: User = Depends(get_current_user)):
     """
     Create a new contact.
 
+    :param request: HTTP request object
     :param contact: Contact data
     :param db: SQLAlchemy database session
     :param current_user: Current user
     :return: Created contact
     """
     try:
-        return contacts.create_contact(db, contact, user_id=current_user.id)
+        created = await contacts.create_contact_async(db, contact, user_id=current_user.id)
     except ValueError as e:
         raise HTTPException(status_code=400, detail=str(e))
+    await run_in_threadpool(cache.bump_generation, current_user.id)
+    return created
+
+@router.post("/import")
+@limit_per_user(RATE_LIMIT_CONTACTS)
+async def import_contacts(
+    request: Request,
+    format: str = Query(None, pattern="^(csv|ndjson)$"),
+    db = Depends(get_session),
+    current_user: User = Depends(get_current_user),
+):
+    """
+    Import contacts from a CSV (with header row) or NDJSON request body.
+
+    The body is read as a stream and written in batches, so uploads of any
+    size are handled with constant memory. The format is taken from the
+    ``format`` parameter or else from the Content-Type header.
+
+    :param request: Incoming request whose body is streamed
+    :param format: Optional "csv" or "ndjson"
+    :param db: SQLAlchemy database session
+    :param current_user: Current user
+    :return: Import report with inserted/failed counts and per-row errors
+    """
+    content_type = request.headers.get("content-type", "")
+    if format is None:
+        if "csv" in content_type:
+            format = "csv"
+        elif "ndjson" in content_type or "jsonl" in content_type:
+            format = "ndjson"
+        else:
+            raise HTTPException(status_code=415, detail="Send text/csv or application/x-ndjson")
+    parse = importer.iter_csv_records if format == "csv" else importer.iter_ndjson_records
+    try:
+        return await importer.import_contacts(db, current_user.id, parse(request.stream()))
+    except UnicodeDecodeError:
+        raise HTTPException(status_code=400, detail="Body must be UTF-8 encoded")
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    finally:
+        # Batches are committed as they go, so even a failed import may have added contacts.
+        await run_in_threadpool(cache.bump_generation, current_user.id)
+
+@router.patch("/batch", response_model=BatchResults)
+@limit_per_user(RATE_LIMIT_CONTACTS)
+async def update_batch(request: Request, batch: ContactBatchUpdate, db = Depends(get_session), current_user: User = Depends(get_current_user)):
+    """
+    Update many contacts in one request and one transaction.
 
-@router.get("/")
-def read(name: str = None, email: str = None, db: Session = Depends(get_db), current_user: User = Depends(get_current_user)):
+    :param request: HTTP request object
+    :param batch: Up to CONTACTS_BATCH_MAX items, each a contact ID with the fields to change
+    :param db: SQLAlchemy database session
+    :param current_user: Current user
+    :return: Per-item results in request order
+    """
+    results = await contacts.update_contacts_batch_async(db, current_user.id, batch.items)
+    await run_in_threadpool(cache.bump_generation, current_user.id)
+    return {"results": results}
+
+@router.post("/batch-delete", response_model=BatchResults)
+@limit_per_user(RATE_LIMIT_CONTACTS)
+async def delete_batch(request: Request, batch: ContactBatchDelete, db = Depends(get_session), current_user: User = Depends(get_current_user)):
+    """
+    Delete many contacts in one request and one transaction.
+
+    :param request: HTTP request object
+    :param batch: Up to CONTACTS_BATCH_MAX contact IDs
+    :param db: SQLAlchemy database session
+    :param current_user: Current user
+    :return: Per-item results in request order
+    """
+    results = await contacts.delete_contacts_batch_async(db, current_user.id, batch.ids)
+    await run_in_threadpool(cache.bump_generation, current_user.id)
+    return {"results": results}
+
+@router.get("/", response_model=list[ContactResponse])
+@limit_per_user(RATE_LIMIT_CONTACTS)
+async def read(
+    request: Request,
+    name: str = None,
+    email: str = None,
+    limit: int = Query(contacts.DEFAULT_PAGE_SIZE, ge=1, le=contacts.MAX_PAGE_SIZE),
+    cursor: str = None,
+    fields: str = None,
+    db = Depends(get_session),
+    current_user: User = Depends(get_current_user),
+):
     """
-    Get all contacts for the current user, optionally filtered by name or email.
+    Get a page of contacts for the current user, optionally filtered by name or email.
 
+    The cursor for the following page is returned in the ``X-Next-Cursor`` header;
+    the header is absent on the last page. The weak ETag is derived from the
+    count and latest ``updated_at`` of the matching contacts, so a 304 is sent
+    without reading the page. Rendered pages are kept in the result cache
+    until the user's contacts change.
+
+    :param request: HTTP request object
     :param name: Optional name to filter contacts by
     :param email: Optional email to filter contacts by
+    :param limit: Page size
+    :param cursor: Cursor from the previous page
+    :param fields: Optional comma-separated list of fields to return
     :param db: SQLAlchemy database session
     :param current_user: Current user
-    :return: List of contacts
+    :return: List of contacts, or 304 when If-None-Match matches the list ETag
+    """
+    field_list = [f.strip() for f in fields.split(",") if f.strip()] if fields else None
+    name, email = _fold(name), _fold(email)
+
+    async def build():
+        count, updated_at = await contacts.get_contacts_version_async(db, current_user.id, name, email)
+        etag = etags.list_etag(current_user.id, count, updated_at, name, email, limit, cursor, field_list)
+        if etags.none_match(request.headers.get("if-none-match"), etag):
+            return Response(status_code=304, headers={"ETag": etag})
+        try:
+            items, next_cursor = await contacts.get_contacts_page_async(
+                db, current_user.id, name, email, limit, cursor, field_list
+            )
+        except ValueError as e:
+            raise HTTPException(status_code=400, detail=str(e))
+        headers = {"ETag": etag}
+        if next_cursor:
+            headers["X-Next-Cursor"] = next_cursor
+        # Rows already have the ContactResponse columns; serialize them directly
+        # instead of validating a model per row.
+        content = items if field_list else [row._asdict() for row in items]
+        return ORJSONResponse(content, headers=headers)
+
+    params = {"name": name, "email": email, "limit": limit, "cursor": cursor, "fields": field_list}
+    return _not_modified(request, await cache.cached_response(current_user.id, "list", params, build, db))
+
+@router.get("/export")
+@limit_per_user(RATE_LIMIT_CONTACTS)
+async def export(
+    request: Request,
+    format: str = Query("csv", pattern="^(csv|ndjson|vcf)$"),
+    name: str = None,
+    email: str = None,
+    db = Depends(get_session),
+    current_user: User = Depends(get_current_user),
+):
     """
-    return contacts.get_contacts(db, current_user.id, name, email)
+    Stream the current user's contacts as CSV, NDJSON or vCard.
 
-@router.get("/{contact_id}")
-def read_one(contact_id: int, db: Session = Depends(get_db), current_user: User = Depends(get_current_user)):
+    Rows are read through a server-side cursor on a dedicated connection and
+    written as they arrive, so memory does not grow with the address book.
+
+    :param request: HTTP request object
+    :param format: "csv", "ndjson" or "vcf"
+    :param name: Optional name to filter contacts by
+    :param email: Optional email to filter contacts by
+    :param db: SQLAlchemy database session, used to find the engine
+    :param current_user: Current user
+    :return: Streaming response with the export file
+    """
+    if isinstance(db, AsyncSession):
+        rows = contacts.stream_contacts_async(read_bind(db), current_user.id, name, email)
+        body = exporter.export_chunks_async(rows, format)
+    else:
+        rows = contacts.stream_contacts(read_bind(db), current_user.id, name, email)
+        body = exporter.export_chunks(rows, format)
+    return StreamingResponse(
+        body,
+        media_type=exporter.MEDIA_TYPES[format],
+        headers={"Content-Disposition": f'attachment; filename="contacts.{format}"'},
+    )
+
+@router.get("/birthdays", response_model=list[ContactResponse])
+@limit_per_user(RATE_LIMIT_CONTACTS)
+async def upcoming_birthdays(
+    request: Request,
+    days: int = Query(7, ge=0, le=366),
+    db = Depends(get_session),
+    current_user: User = Depends(get_current_user),
+):
+    """
+    Get the current user's contacts with a birthday in the next ``days`` days.
+
+    :param request: HTTP request object
+    :param days: Size of the window in days, today included
+    :param db: SQLAlchemy database session
+    :param current_user: Current user
+    :return: List of contacts ordered by upcoming birthday
+    """
+    return await contacts.get_upcoming_birthdays_async(db, current_user.id, days)
+
+@router.get("/search", response_model=list[ContactResponse])
+@limit_per_user(RATE_LIMIT_CONTACTS)
+async def search(
+    request: Request,
+    q: str = Query(..., min_length=1),
+    limit: int = Query(contacts.DEFAULT_PAGE_SIZE, ge=1, le=contacts.MAX_PAGE_SIZE),
+    db = Depends(get_session),
+    current_user: User = Depends(get_current_user),
+):
+    """
+    Search the current user's contacts by name or email prefix, best matches first.
+    Results are served from the result cache until the user's contacts change.
+
+    :param request: HTTP request object
+    :param q: Search term
+    :param limit: Maximum number of contacts to return
+    :param db: SQLAlchemy database session
+    :param current_user: Current user
+    :return: List of matching contacts
+    """
+    q = _fold(q.strip())
+
+    async def build():
+        results = await contacts.search_contacts_async(db, current_user.id, q, limit)
+        return Response(_contact_list.dump_json(results), media_type="application/json")
+
+    return await cache.cached_response(current_user.id, "search", {"q": q, "limit": limit}, build, db)
+
+@router.get("/changes", response_model=ContactChanges)
+@limit_per_user(RATE_LIMIT_CONTACTS)
+async def changes(
+    request: Request,
+    since: int = Query(0, ge=0),
+    limit: int = Query(contacts.DEFAULT_PAGE_SIZE, ge=1, le=contacts.MAX_PAGE_SIZE),
+    db = Depends(get_session),
+    current_user: User = Depends(get_current_user),
+):
+    """
+    Get the contacts created, updated or deleted since a sync token.
+
+    Start with ``since=0`` and pass ``next_since`` back on the next call;
+    repeat while ``has_more`` is true.
+
+    :param request: HTTP request object
+    :param since: ``next_since`` from the previous response
+    :param limit: Maximum number of changes to return
+    :param db: SQLAlchemy database session
+    :param current_user: Current user
+    :return: Changed contacts, ids of deleted contacts, next token and has_more flag
+    """
+    upserted, deleted, next_since, has_more = await contacts.get_changes_async(db, current_user.id, since, limit)
+    return {"upserted": upserted, "deleted": deleted, "next_since": next_since, "has_more": has_more}
+
+@router.get("/lookup", response_model=list[ContactResponse])
+@limit_per_user(RATE_LIMIT_CONTACTS)
+async def lookup(
+    request: Request,
+    phone: str = None,
+    email: str = None,
+    db = Depends(get_session),
+    current_user: User = Depends(get_current_user),
+):
+    """
+    Find the current user's contacts with a phone number or email, e.g. for
+    caller ID. Formatting does not matter: "+1 (555) 010-2000" finds a
+    contact saved as "15550102000".
+
+    :param request: HTTP request object
+    :param phone: Phone number to look up
+    :param email: Email to look up
+    :param db: SQLAlchemy database session
+    :param current_user: Current user
+    :return: List of matching contacts
+    """
+    if (phone is None) == (email is None):
+        raise HTTPException(status_code=400, detail="Pass either phone or email")
+    return await contacts.lookup_contacts_async(db, current_user.id, phone, email)
+
+@router.post("/lookup", response_model=ContactLookupResults)
+@limit_per_user(RATE_LIMIT_CONTACTS)
+async def lookup_batch(request: Request, body: ContactLookup, db = Depends(get_session), current_user: User = Depends(get_current_user)):
+    """
+    Resolve up to CONTACTS_BATCH_MAX phone numbers and emails in one request.
+
+    :param request: HTTP request object
+    :param body: Phone numbers and emails to look up
+    :param db: SQLAlchemy database session
+    :param current_user: Current user
+    :return: Matching contacts keyed by each phone number and email as sent
+    """
+    phones, emails = await contacts.lookup_contacts_batch_async(db, current_user.id, body.phones, body.emails)
+    return {"phones": phones, "emails": emails}
+
+@router.get("/{contact_id}", response_model=ContactResponse)
+@limit_per_user(RATE_LIMIT_CONTACTS)
+async def read_one(request: Request, response: Response, contact_id: int, db = Depends(get_session), current_user: User = Depends(get_current_user)):
     """
     Get a specific contact by ID for the current user.
 
+    :param request: HTTP request object
+    :param response: Outgoing response, used to set the ETag header
     :param contact_id: ID of the contact
     :param db: SQLAlchemy database session
     :param current_user: Current user
-    :return: Contact object if found, None otherwise
+    :return: Contact object, or 304 when If-None-Match matches its ETag
     """
-    contact = contacts.get_contact(db, contact_id, current_user.id)
+    contact = await contacts.get_contact_async(db, contact_id, current_user.id)
     if not contact:
         raise HTTPException(status_code=404, detail="Contact not found")
+    etag = etags.contact_etag(contact.id, contact.version)
+    if etags.none_match(request.headers.get("if-none-match"), etag):
+        return Response(status_code=304, headers={"ETag": etag})
+    response.headers["ETag"] = etag
     return contact
 
-@router.put("/{contact_id}")
-def update(contact_id: int, contact_update: ContactUpdate, db: Session = Depends(get_db), current_user: User = Depends(get_current_user)):
+@router.put("/{contact_id}", response_model=ContactResponse)
+@limit_per_user(RATE_LIMIT_CONTACTS)
+async def update(request: Request, response: Response, contact_id: int, contact_update: ContactUpdate, db = Depends(get_session), current_user: User = Depends(get_current_user)):
     """
     Update a contact's information.
+    With If-Match the update only applies if the contact is still at one of the given versions.
 
+    :param request: HTTP request object
+    :param response: Outgoing response, used to set the new ETag
     :param contact_id: ID of the contact to update
     :param contact_update: Updated contact data
     :param db: SQLAlchemy database session
     :param current_user: Current user
     :return: Updated contact
     """
-    updated_contact = contacts.update_contact(db, contact_id, contact_update, current_user.id)
+    versions = etags.match_versions(request.headers.get("if-match"), contact_id)
+    try:
+        updated_contact = await contacts.update_contact_async(db, contact_id, contact_update, current_user.id, versions)
+    except contacts.StaleContact:
+        raise HTTPException(status_code=412, detail="Contact was modified")
     if not updated_contact:
         raise HTTPException(status_code=404, detail="Contact not found")
+    await run_in_threadpool(cache.bump_generation, current_user.id)
+    response.headers["ETag"] = etags.contact_etag(updated_contact.id, updated_contact.version)
     return updated_contact
 
 @router.delete("/{contact_id}")
-def delete(contact_id: int, db: Session = Depends(get_db), current_user: User = Depends(get_current_user)):
+@limit_per_user(RATE_LIMIT_CONTACTS)
+async def delete(request: Request, contact_id: int, db = Depends(get_session), current_user: User = Depends(get_current_user)):
     """
     Delete a contact by ID for the current user.
+    With If-Match the contact is only deleted if it is still at one of the given versions.
 
+    :param request: HTTP request object
     :param contact_id: ID of the contact to delete
     :param db: SQLAlchemy database session
     :param current_user: Current user
     :return: Confirmation message
     """
-    deleted_contact = contacts.delete_contact(db, contact_id, current_user.id)
+    versions = etags.match_versions(request.headers.get("if-match"), contact_id)
+    try:
+        deleted_contact = await contacts.delete_contact_async(db, contact_id, current_user.id, versions)
+    except contacts.StaleContact:
+        raise HTTPException(status_code=412, detail="Contact was modified")
     if not deleted_contact:
         raise HTTPException(status_code=404, detail="Contact not found")
+    await run_in_threadpool(cache.bump_generation, current_user.id)
     return {"detail": "Contact deleted"}
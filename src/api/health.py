@@ -0,0 +1,34 @@
+from fastapi import APIRouter, Request
+from fastapi.responses import JSONResponse
+from src.conf.config import DB_ASYNC
+from src.repository.database.db import async_engine, async_replicas, engine, pool_status, replicas
+from src.services.limiter import limiter
+
+router = APIRouter(prefix="/health", tags=["Health"])
+
+@router.get("/db")
+@limiter.exempt
+async def db_health(request: Request):
+    """
+    Report connection pool usage of the engine serving requests.
+
+    Only pool counters are read, so the probe never checks out a connection
+    and cannot add to the queue it is reporting on. Responds with 503 once
+    every connection the primary pool may open is in use.
+
+    :param request: HTTP request object
+    :return: Pool status of the active primary engine and its replicas
+    """
+    status = pool_status(async_engine if DB_ASYNC else engine)
+    saturated = status.get("saturation", 0.0) >= 1.0
+    status["status"] = "saturated" if saturated else "ok"
+    replica_set = async_replicas if DB_ASYNC else replicas
+    status["replicas"] = [
+        {
+            "url": replica.url.render_as_string(hide_password=True),
+            "ejected": replica_set.is_ejected(replica),
+            **pool_status(replica),
+        }
+        for replica in replica_set.engines
+    ]
+    return JSONResponse(status, status_code=503 if saturated else 200)
@@ -1,6 +1,59 @@
 import os
+from dataclasses import dataclass, field
 from dotenv import load_dotenv
 
 load_dotenv()
 
-DATABASE_URL = os.getenv("DATABASE_URL", "postgresql://postgres:pass@db:5432/postgres")
\ No newline at end of file
+DATABASE_URL = os.getenv("DATABASE_URL", "postgresql://postgres:pass@db:5432/postgres")
+
+# Async driver URL; derived from DATABASE_URL (asyncpg / aiosqlite) when not set explicitly.
+ASYNC_DATABASE_URL = os.getenv("ASYNC_DATABASE_URL")
+
+# When false the routes fall back to the blocking Session, run in the threadpool.
+DB_ASYNC = os.getenv("DB_ASYNC", "true").lower() in ("1", "true", "yes")
+
+# Connection pool. Sizes are ignored for SQLite; DB_STATEMENT_TIMEOUT_MS=0 disables the timeout.
+DB_POOL_SIZE = int(os.getenv("DB_POOL_SIZE", 5))
+DB_MAX_OVERFLOW = int(os.getenv("DB_MAX_OVERFLOW", 10))
+DB_POOL_TIMEOUT = float(os.getenv("DB_POOL_TIMEOUT", 30))
+DB_POOL_RECYCLE = int(os.getenv("DB_POOL_RECYCLE", 1800))
+DB_POOL_PRE_PING = os.getenv("DB_POOL_PRE_PING", "true").lower() in ("1", "true", "yes")
+DB_STATEMENT_TIMEOUT_MS = int(os.getenv("DB_STATEMENT_TIMEOUT_MS", 0))
+
+# Behind PgBouncer in transaction mode: no client-side pool and no prepared statements.
+DB_PGBOUNCER = os.getenv("DB_PGBOUNCER", "false").lower() in ("1", "true", "yes")
+
+# Comma-separated sync URLs of read replicas; empty keeps every query on the primary.
+DATABASE_REPLICA_URLS = [url.strip() for url in os.getenv("DATABASE_REPLICA_URLS", "").split(",") if url.strip()]
+# Seconds a replica is skipped after a connection failure.
+REPLICA_EJECT_SECONDS = float(os.getenv("REPLICA_EJECT_SECONDS", 30))
+
+# Maximum number of contacts in one PATCH /contacts/batch or POST /contacts/batch-delete request.
+CONTACTS_BATCH_MAX = int(os.getenv("CONTACTS_BATCH_MAX", 1000))
+
+# Hash partitions of the contacts table on Postgres; read by create_all and the partitioning migration.
+CONTACTS_PARTITIONS = int(os.getenv("CONTACTS_PARTITIONS", 16))
+
+# Country calling code given to phone numbers stored without one, e.g. "1" or "380".
+# Changing it only affects new writes; rerun src.repository.database.backfill afterwards.
+PHONE_DEFAULT_COUNTRY_CODE = os.getenv("PHONE_DEFAULT_COUNTRY_CODE", "1")
+
+# Run Base.metadata.create_all at startup. Turn off where alembic owns the schema.
+DB_CREATE_ALL = os.getenv("DB_CREATE_ALL", "true").lower() in ("1", "true", "yes")
+
+# Comma-separated origins allowed by CORS.
+CORS_ORIGINS = [origin.strip() for origin in os.getenv("CORS_ORIGINS", "*").split(",") if origin.strip()]
+
+@dataclass
+class Settings:
+    """
+    Options :func:`main.create_app` builds the application from. Defaults
+    come from the environment; tests and tools can override single fields.
+    """
+
+    create_schema: bool = DB_CREATE_ALL
+    cors_origins: list[str] = field(default_factory=lambda: list(CORS_ORIGINS))
+    # /metrics and the request middleware; METRICS_ENABLED=false still turns them off.
+    metrics: bool = True
+    # Mount AVATAR_LOCAL_URL when avatars are stored on local disk.
+    serve_media: bool = True
@@ -1,6 +1,90 @@
+import base64
+import calendar
+import json
+from collections import defaultdict
+from datetime import date, timedelta
+from sqlalchemy import Float, Integer, case, delete, event, func, insert, or_, select, text, tuple_, update
+from sqlalchemy.exc import IntegrityError
 from sqlalchemy.orm import Session
-from src.repository.database.models import Contact
-from src.schemas import ContactCreate, ContactUpdate
+from sqlalchemy.orm.exc import StaleDataError
+from src.repository.database.db import run_with_session
+from src.repository.database.models import (
+    Contact, ContactChangeCounter, ContactTombstone, birthday_key, name_sort_key, normalize_email, normalize_phone,
+    utcnow,
+)
+from src.schemas import ContactBatchUpdateItem, ContactCreate, ContactUpdate
+
+DEFAULT_PAGE_SIZE = 100
+MAX_PAGE_SIZE = 1000
+PROJECTABLE_FIELDS = ("id", "first_name", "last_name", "email", "phone", "birthday", "additional_info")
+EXPORT_FIELDS = PROJECTABLE_FIELDS
+# Columns of a full contact in API responses, see ContactResponse.
+RESPONSE_FIELDS = PROJECTABLE_FIELDS + ("updated_at", "version")
+EXPORT_BATCH_SIZE = 1000
+
+class StaleContact(Exception):
+    """
+    Raised when a contact changed since the version the client last saw.
+    """
+
+def _dialect_insert(db: Session):
+    """
+    :param db: SQLAlchemy database session
+    :return: The dialect's ``insert`` construct, which supports ON CONFLICT
+    """
+    dialect = db.get_bind().dialect.name
+    if dialect == "postgresql":
+        from sqlalchemy.dialects.postgresql import insert
+    elif dialect == "sqlite":
+        from sqlalchemy.dialects.sqlite import insert
+    else:
+        raise NotImplementedError(f"Upserts are not supported on {dialect}")
+    return insert
+
+def reserve_change_seq(db: Session, user_id: int, n: int = 1) -> int:
+    """
+    Reserve ``n`` consecutive change sequence numbers for a user.
+
+    The counter row stays locked until the transaction ends, so sequence
+    numbers of one user are committed in increasing order and a sync client
+    never skips a change that commits late.
+
+    :param db: SQLAlchemy database session
+    :param user_id: ID of the user
+    :param n: How many numbers to reserve
+    :return: The last reserved number; the range is ``last - n + 1 .. last``
+    """
+    upsert = _dialect_insert(db)
+    table = ContactChangeCounter.__table__
+    stmt = upsert(table).values(user_id=user_id, last_seq=n).on_conflict_do_update(
+        index_elements=[table.c.user_id], set_={"last_seq": table.c.last_seq + n}
+    )
+    return db.execute(stmt.returning(table.c.last_seq)).scalar_one()
+
+@event.listens_for(Session, "before_flush")
+def _track_contact_changes(session, flush_context, instances):
+    """
+    Stamp new and modified contacts with a change sequence number and
+    write a tombstone for every deleted one.
+    """
+    changes = defaultdict(list)
+    for obj in session.new:
+        if isinstance(obj, Contact) and obj.user_id is not None:
+            changes[obj.user_id].append(obj)
+    for obj in session.dirty:
+        if isinstance(obj, Contact) and obj.user_id is not None and session.is_modified(obj):
+            changes[obj.user_id].append(obj)
+    for obj in session.deleted:
+        if isinstance(obj, Contact) and obj.user_id is not None:
+            changes[obj.user_id].append(obj)
+    for user_id, objs in changes.items():
+        seq = reserve_change_seq(session, user_id, len(objs)) - len(objs)
+        for obj in objs:
+            seq += 1
+            if obj in session.deleted:
+                session.add(ContactTombstone(user_id=user_id, contact_id=obj.id, change_seq=seq))
+            else:
+                obj.change_seq = seq
 
 def create_contact(db: Session, contact: ContactCreate, user_id: int):
     """
@@ -26,6 +110,68 @@ def create_contact(db: Session, contact: ContactCreate, user_id: int):
         db.rollback()
         raise ValueError("Error: This email is already taken")
 
+def _contacts_filter(user_id: int, name: str = None, email: str = None) -> list:
+    """
+    Build the user-scoped WHERE criteria shared by list, page and export reads.
+
+    :param user_id: ID of the user
+    :param name: Optional name to filter contacts by
+    :param email: Optional email to filter contacts by
+    :return: List of SQL expressions
+    """
+    criteria = [Contact.user_id == user_id]
+    if name:
+        criteria.append((Contact.first_name.ilike(f"%{name}%")) | (Contact.last_name.ilike(f"%{name}%")))
+    if email:
+        criteria.append(Contact.email.ilike(f"%{email}%"))
+    return criteria
+
+def _contacts_query(db: Session, user_id: int, name: str = None, email: str = None, columns=None):
+    """
+    Build the user-scoped contacts ORM query.
+
+    :param db: SQLAlchemy database session
+    :param user_id: ID of the user
+    :param name: Optional name to filter contacts by
+    :param email: Optional email to filter contacts by
+    :param columns: Optional list of columns to select instead of full entities
+    :return: SQLAlchemy query
+    """
+    query = db.query(*columns) if columns else db.query(Contact)
+    return query.filter(*_contacts_filter(user_id, name, email))
+
+def bulk_insert_contacts(db: Session, user_id: int, contacts: list[ContactCreate]) -> set[str]:
+    """
+    Insert many contacts with a single multi-row INSERT ... ON CONFLICT DO NOTHING.
+
+    Rows whose email the user already has are skipped by the database instead of
+    being checked one by one, and the batch is committed as one transaction.
+
+    :param db: SQLAlchemy database session
+    :param user_id: ID of the user owning the contacts
+    :param contacts: Validated contact data
+    :return: Set of emails that were actually inserted
+    """
+    if not contacts:
+        return set()
+    upsert = _dialect_insert(db)
+    try:
+        # Skipped duplicates leave gaps in the sequence, which sync clients do not mind.
+        first_seq = reserve_change_seq(db, user_id, len(contacts)) - len(contacts) + 1
+        values = [
+            {**contact.model_dump(), "birthday_md": birthday_key(contact.birthday), "user_id": user_id,
+             "phone_e164": normalize_phone(contact.phone), "email_lower": normalize_email(contact.email),
+             "change_seq": first_seq + i}
+            for i, contact in enumerate(contacts)
+        ]
+        stmt = upsert(Contact).values(values).on_conflict_do_nothing(index_elements=[Contact.user_id, Contact.email])
+        inserted = set(db.execute(stmt.returning(Contact.email)).scalars())
+        db.commit()
+    except Exception:
+        db.rollback()
+        raise
+    return inserted
+
 def get_contacts(db: Session, user_id: int, name: str = None, email: str = None):
     """
     Get all contacts for a user, optionally filtered by name or email.
@@ -36,12 +182,225 @@ def get_contacts(db: Session, user_id: int, name: str = None, email: str = None)
     :param email: Optional email to filter contacts by
     :return: List of contacts
     """
+    return _contacts_query(db, user_id, name, email).all()
+
+# Sort key of contact lists, matching the ix_contacts_user_keyset index.
+KEYSET_ORDER = (name_sort_key(Contact.last_name), name_sort_key(Contact.first_name), Contact.id)
+
+def encode_cursor(last_name: str, first_name: str, contact_id: int) -> str:
+    """
+    Encode the sort key of the last row of a page as an opaque cursor.
+
+    :param last_name: Last name of the last contact on the page
+    :param first_name: First name of the last contact on the page
+    :param contact_id: ID of the last contact on the page
+    :return: URL-safe cursor string
+    """
+    raw = json.dumps([last_name, first_name, contact_id], separators=(",", ":")).encode()
+    return base64.urlsafe_b64encode(raw).decode().rstrip("=")
+
+def decode_cursor(cursor: str) -> tuple:
+    """
+    Decode a cursor produced by :func:`encode_cursor`.
+
+    :param cursor: Cursor string
+    :return: Tuple of (last_name, first_name, id)
+    :raises ValueError: If the cursor is malformed
+    """
+    try:
+        raw = base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4))
+        last_name, first_name, contact_id = json.loads(raw)
+    except (ValueError, TypeError) as e:
+        raise ValueError("Invalid cursor") from e
+    names_ok = all(name is None or isinstance(name, str) for name in (last_name, first_name))
+    if not names_ok or not isinstance(contact_id, int) or isinstance(contact_id, bool):
+        raise ValueError("Invalid cursor")
+    # Cursors issued before names were coalesced may carry null.
+    return last_name or "", first_name or "", contact_id
+
+def get_contacts_page(db: Session, user_id: int, name: str = None, email: str = None,
+                      limit: int = DEFAULT_PAGE_SIZE, cursor: str = None, fields: list[str] = None):
+    """
+    Get one page of a user's contacts using keyset pagination on (last_name, first_name, id),
+    missing names sorting as "".
+
+    The cursor is turned into a row-value comparison, so every page is an index range
+    scan no matter how deep it is. Only columns are selected, never entities: items
+    are rows of RESPONSE_FIELDS, or plain dicts of ``fields`` when it is given.
+
+    :param db: SQLAlchemy database session
+    :param user_id: ID of the user
+    :param name: Optional name to filter contacts by
+    :param email: Optional email to filter contacts by
+    :param limit: Maximum number of contacts to return
+    :param cursor: Cursor returned with the previous page
+    :param fields: Optional list of contact fields to return
+    :return: Tuple of (items, next_cursor); next_cursor is None on the last page
+    :raises ValueError: If the cursor or a field name is invalid
+    """
+    if fields:
+        unknown = set(fields) - set(PROJECTABLE_FIELDS)
+        if unknown:
+            raise ValueError(f"Unknown fields: {', '.join(sorted(unknown))}")
+        wanted = ["id", "last_name", "first_name"] + [f for f in fields if f not in ("id", "last_name", "first_name")]
+    else:
+        wanted = RESPONSE_FIELDS
+    columns = [getattr(Contact, f) for f in wanted]
+
+    query = _contacts_query(db, user_id, name, email, columns)
+    if cursor:
+        query = query.filter(tuple_(*KEYSET_ORDER) > tuple_(*decode_cursor(cursor)))
+    rows = query.order_by(*KEYSET_ORDER).limit(limit + 1).all()
+
+    next_cursor = None
+    if len(rows) > limit:
+        rows = rows[:limit]
+        last = rows[-1]
+        next_cursor = encode_cursor(last.last_name or "", last.first_name or "", last.id)
+    if fields:
+        rows = [{f: getattr(row, f) for f in fields} for row in rows]
+    return rows, next_cursor
+
+def _escape_like(term: str) -> str:
+    """
+    Escape LIKE wildcards so user input is matched literally.
+
+    :param term: Raw search term
+    :return: Escaped term, to be used with ``escape="\\"``
+    """
+    return term.replace("\\", "\\\\").replace("%", "\\%").replace("_", "\\_")
+
+def _fts5_match(term: str) -> str:
+    """
+    Build an FTS5 MATCH expression doing prefix matching on every word of ``term``.
+
+    :param term: Raw search term
+    :return: FTS5 query string
+    """
+    words = term.replace("@", " ").replace(".", " ").split()
+    return " ".join('"' + word.replace('"', '""') + '"*' for word in words)
+
+def search_contacts(db: Session, user_id: int, q: str, limit: int = DEFAULT_PAGE_SIZE):
+    """
+    Search a user's contacts by name or email, best matches first.
+
+    On Postgres this uses the pg_trgm GIN indexes: prefix matches rank first, then
+    rows by trigram similarity. On SQLite it uses the FTS5 table with prefix
+    queries ranked by bm25. Other backends fall back to a prefix ILIKE.
+
+    :param db: SQLAlchemy database session
+    :param user_id: ID of the user
+    :param q: Search term
+    :param limit: Maximum number of contacts to return
+    :return: List of contacts
+    """
+    q = q.strip()
+    if not q:
+        return []
     query = db.query(Contact).filter(Contact.user_id == user_id)
-    if name:
-        query = query.filter((Contact.first_name.ilike(f"%{name}%")) | (Contact.last_name.ilike(f"%{name}%")))
-    if email:
-        query = query.filter(Contact.email.ilike(f"%{email}%"))
-    return query.all()
+    dialect = db.get_bind().dialect.name
+    columns = (Contact.first_name, Contact.last_name, Contact.email)
+
+    if dialect == "sqlite":
+        match = _fts5_match(q)
+        if not match:
+            return []
+        fts = text(
+            "SELECT rowid AS id, bm25(contacts_fts) AS rank FROM contacts_fts WHERE contacts_fts MATCH :match"
+        ).bindparams(match=match).columns(id=Integer, rank=Float).subquery()
+        return query.join(fts, fts.c.id == Contact.id).order_by(fts.c.rank, Contact.id).limit(limit).all()
+
+    prefix = f"{_escape_like(q)}%"
+    is_prefix = or_(*(column.ilike(prefix, escape="\\") for column in columns))
+    if dialect == "postgresql":
+        similarity = func.greatest(*(func.similarity(column, q) for column in columns))
+        query = query.filter(or_(is_prefix, *(column.op("%")(q) for column in columns)))
+        order = (case((is_prefix, 0), else_=1), similarity.desc(), Contact.id)
+    else:
+        query = query.filter(is_prefix)
+        order = KEYSET_ORDER
+    return query.order_by(*order).limit(limit).all()
+
+def get_upcoming_birthdays(db: Session, user_id: int, days: int = 7, today: date = None):
+    """
+    Get a user's contacts whose birthday falls within the next ``days`` days, today included.
+
+    Matches on the persisted MMDD ``birthday_md`` column, so the lookup is a range
+    scan on the (user_id, birthday_md) index. Windows crossing New Year become
+    ``md >= start OR md <= end``. In non-leap years Feb 29 birthdays are
+    celebrated on Feb 28.
+
+    :param db: SQLAlchemy database session
+    :param user_id: ID of the user
+    :param days: Size of the window in days
+    :param today: Start of the window, defaults to the current date
+    :return: List of contacts ordered by upcoming birthday
+    """
+    today = today or date.today()
+    end = today + timedelta(days=days)
+    start_md, end_md = birthday_key(today), birthday_key(end)
+    query = db.query(Contact).filter(Contact.user_id == user_id, Contact.birthday_md.isnot(None))
+
+    if days < 365:
+        if end.year == today.year:
+            window = Contact.birthday_md.between(start_md, end_md)
+        else:
+            window = or_(Contact.birthday_md >= start_md, Contact.birthday_md <= end_md)
+        for year in {today.year, end.year}:
+            if not calendar.isleap(year) and today <= date(year, 2, 28) <= end:
+                window = or_(window, Contact.birthday_md == 229)
+        query = query.filter(window)
+
+    order = case((Contact.birthday_md >= start_md, 0), else_=1)
+    return query.order_by(order, Contact.birthday_md, Contact.id).all()
+
+def export_statement(user_id: int, name: str = None, email: str = None):
+    """
+    Build the Core SELECT used to export a user's contacts column by column.
+
+    :param user_id: ID of the user
+    :param name: Optional name to filter contacts by
+    :param email: Optional email to filter contacts by
+    :return: SQLAlchemy Select over EXPORT_FIELDS ordered by id
+    """
+    columns = [getattr(Contact, field) for field in EXPORT_FIELDS]
+    return select(*columns).where(*_contacts_filter(user_id, name, email)).order_by(Contact.id)
+
+def stream_contacts(engine, user_id: int, name: str = None, email: str = None, batch_size: int = EXPORT_BATCH_SIZE):
+    """
+    Yield a user's contacts as row mappings through a server-side cursor.
+
+    A dedicated connection is used because the generator outlives the request
+    session; only ``batch_size`` rows are buffered at a time.
+
+    :param engine: Sync Engine to read from
+    :param user_id: ID of the user
+    :param name: Optional name to filter contacts by
+    :param email: Optional email to filter contacts by
+    :param batch_size: Rows fetched per round-trip
+    :return: Generator of row mappings
+    """
+    stmt = export_statement(user_id, name, email).execution_options(yield_per=batch_size)
+    with engine.connect() as conn:
+        yield from conn.execute(stmt).mappings()
+
+async def stream_contacts_async(engine, user_id: int, name: str = None, email: str = None,
+                                batch_size: int = EXPORT_BATCH_SIZE):
+    """
+    Async version of :func:`stream_contacts` for an AsyncEngine.
+
+    :param engine: AsyncEngine to read from
+    :param user_id: ID of the user
+    :param name: Optional name to filter contacts by
+    :param email: Optional email to filter contacts by
+    :param batch_size: Rows fetched per round-trip
+    :return: Async generator of row mappings
+    """
+    stmt = export_statement(user_id, name, email).execution_options(yield_per=batch_size)
+    async with engine.connect() as conn:
+        result = await conn.stream(stmt)
+        async for row in result.mappings():
+            yield row
 
 def get_contact(db: Session, contact_id: int, user_id: int):
     """
@@ -54,36 +413,435 @@ def get_contact(db: Session, contact_id: int, user_id: int):
     """
     return db.query(Contact).filter(Contact.id == contact_id, Contact.user_id == user_id).first()
 
-def update_contact(db: Session, contact_id: int, contact_update: ContactUpdate, user_id: int):
+def lookup_contacts(db: Session, user_id: int, phone: str = None, email: str = None):
+    """
+    Find a user's contacts by phone number or email, in any formatting.
+
+    The input is normalized the way ``phone_e164`` / ``email_lower`` are, so
+    the lookup is one probe of the (user_id, phone_e164) or
+    (user_id, email_lower) index.
+
+    :param db: SQLAlchemy database session
+    :param user_id: ID of the user
+    :param phone: Phone number to look up
+    :param email: Email to look up, used when no phone is given
+    :return: List of matching contacts, empty if the input does not normalize
+    """
+    if phone is not None:
+        key, column = normalize_phone(phone), Contact.phone_e164
+    else:
+        key, column = normalize_email(email), Contact.email_lower
+    if key is None:
+        return []
+    return db.query(Contact).filter(Contact.user_id == user_id, column == key).order_by(Contact.id).all()
+
+def lookup_contacts_batch(db: Session, user_id: int, phones: list[str] = (), emails: list[str] = ()) -> tuple:
+    """
+    Resolve many phone numbers and emails at once: one ``IN`` query per kind.
+
+    :param db: SQLAlchemy database session
+    :param user_id: ID of the user
+    :param phones: Phone numbers as the caller has them
+    :param emails: Emails as the caller has them
+    :return: Tuple of ({phone: [contacts]}, {email: [contacts]}), keyed by the
+        inputs as given; inputs without a match map to an empty list
+    """
+    results = []
+    for values, column, normalize in ((phones, Contact.phone_e164, normalize_phone),
+                                      (emails, Contact.email_lower, normalize_email)):
+        keys = {value: normalize(value) for value in values}
+        matches = defaultdict(list)
+        wanted = {key for key in keys.values() if key is not None}
+        if wanted:
+            query = db.query(Contact).filter(Contact.user_id == user_id, column.in_(wanted)).order_by(Contact.id)
+            for contact in query:
+                matches[getattr(contact, column.key)].append(contact)
+        results.append({value: matches.get(key, []) for value, key in keys.items()})
+    return tuple(results)
+
+def get_contacts_version(db: Session, user_id: int, name: str = None, email: str = None) -> tuple:
+    """
+    Count and latest modification time of the contacts a list read would return.
+
+    Answered by an aggregate over ``ix_contacts_user_updated_at`` without
+    loading any rows; list ETags are derived from it.
+
+    :param db: SQLAlchemy database session
+    :param user_id: ID of the user
+    :param name: Optional name to filter contacts by
+    :param email: Optional email to filter contacts by
+    :return: Tuple of (count, max updated_at or None)
+    """
+    stmt = select(func.count(), func.max(Contact.updated_at)).where(*_contacts_filter(user_id, name, email))
+    count, updated_at = db.execute(stmt).one()
+    return count, updated_at
+
+def get_changes(db: Session, user_id: int, since: int = 0, limit: int = DEFAULT_PAGE_SIZE) -> tuple:
+    """
+    Contacts created, updated or deleted after change sequence ``since``.
+
+    Live contacts and tombstones are each read through their (user_id, change_seq)
+    index and merged, so a page costs at most ``2 * limit`` index rows no matter
+    how large the address book is.
+
+    :param db: SQLAlchemy database session
+    :param user_id: ID of the user
+    :param since: Sequence number returned by the previous call, 0 for a full sync
+    :param limit: Maximum number of changes to return
+    :return: Tuple of (contacts, deleted contact ids, next since, has_more)
+    """
+    upserts = (db.query(Contact)
+               .filter(Contact.user_id == user_id, Contact.change_seq > since)
+               .order_by(Contact.change_seq).limit(limit + 1).all())
+    tombstones = db.execute(
+        select(ContactTombstone.change_seq, ContactTombstone.contact_id)
+        .where(ContactTombstone.user_id == user_id, ContactTombstone.change_seq > since)
+        .order_by(ContactTombstone.change_seq).limit(limit + 1)
+    ).all()
+    merged = sorted([(c.change_seq, c) for c in upserts] + [(t.change_seq, t.contact_id) for t in tombstones],
+                    key=lambda item: item[0])
+    has_more = len(merged) > limit
+    page = merged[:limit]
+    contacts = [item for _, item in page if isinstance(item, Contact)]
+    deleted = [item for _, item in page if not isinstance(item, Contact)]
+    return contacts, deleted, page[-1][0] if page else since, has_more
+
+def _check_version(contact: Contact, expected_versions) -> None:
+    if expected_versions is not None and contact.version not in expected_versions:
+        raise StaleContact(f"Contact {contact.id} is at version {contact.version}")
+
+def update_contact(db: Session, contact_id: int, contact_update: ContactUpdate, user_id: int,
+                   expected_versions: set[int] = None):
     """
     Update a contact's information.
 
+    ``updated_at`` and ``version`` are bumped by the ORM; the UPDATE also
+    matches on the loaded version, so a concurrent writer is detected too.
+
     :param db: SQLAlchemy database session
     :param contact_id: ID of the contact to update
     :param contact_update: ContactUpdate schema with updated data
     :param user_id: ID of the user
+    :param expected_versions: Versions the client allows to be overwritten (If-Match); None skips the check
     :return: Updated contact object if successful, None otherwise
+    :raises StaleContact: If the stored version is not one of ``expected_versions``
     """
     contact = db.query(Contact).filter(Contact.id == contact_id, Contact.user_id == user_id).first()
     if not contact:
         return None
+    _check_version(contact, expected_versions)
     for key, value in contact_update.dict(exclude_unset=True).items():
         setattr(contact, key, value)
-    db.commit()
+    try:
+        db.commit()
+    except StaleDataError as e:
+        db.rollback()
+        raise StaleContact(f"Contact {contact_id} was modified concurrently") from e
     db.refresh(contact)
     return contact
 
-def delete_contact(db: Session, contact_id: int, user_id: int):
+def delete_contact(db: Session, contact_id: int, user_id: int, expected_versions: set[int] = None):
     """
-    Delete a contact by ID for a user.
+    Delete a contact by ID for a user. A tombstone is written in the same
+    transaction so the deletion shows up in :func:`get_changes`.
 
     :param db: SQLAlchemy database session
     :param contact_id: ID of the contact to delete
     :param user_id: ID of the user
+    :param expected_versions: Versions the client allows to be deleted (If-Match); None skips the check
     :return: Deleted contact object if successful, None otherwise
+    :raises StaleContact: If the stored version is not one of ``expected_versions``
     """
     contact = db.query(Contact).filter(Contact.id == contact_id, Contact.user_id == user_id).first()
     if contact:
+        _check_version(contact, expected_versions)
         db.delete(contact)
-        db.commit()
+        try:
+            db.commit()
+        except StaleDataError as e:
+            db.rollback()
+            raise StaleContact(f"Contact {contact_id} was modified concurrently") from e
     return contact
+
+def update_contacts_batch(db: Session, user_id: int, items: list[ContactBatchUpdateItem]) -> list[dict]:
+    """
+    Apply partial updates to many contacts in one transaction.
+
+    Items carrying the same changes are written by one set-based
+    ``UPDATE ... WHERE id IN (...) AND user_id = ...``, each inside a savepoint
+    so a unique-email clash only fails its own group. ``updated_at``,
+    ``version`` and ``change_seq`` are set explicitly since Core UPDATEs
+    bypass the ORM.
+
+    :param db: SQLAlchemy database session
+    :param user_id: ID of the user
+    :param items: Contact ids with the fields to change
+    :return: One {"id", "status"} dict per item, in input order; status is
+        "updated", "not_found", "conflict" or "duplicate"
+    """
+    ids = {item.id for item in items}
+    found = set(db.execute(select(Contact.id).where(Contact.id.in_(ids), Contact.user_id == user_id)).scalars())
+    status, groups, seen = {}, defaultdict(list), set()
+    for item in items:
+        if item.id in seen:
+            continue
+        seen.add(item.id)
+        if item.id not in found:
+            status[item.id] = "not_found"
+            continue
+        changes = item.model_dump(exclude_unset=True, exclude={"id"})
+        groups[tuple(sorted(changes.items()))].append(item.id)
+
+    if groups:
+        # One number per row written, handed out in id order, so the counter
+        # advances by the batch size however far apart the ids are.
+        targets = sorted(i for group_ids in groups.values() for i in group_ids)
+        first_seq = reserve_change_seq(db, user_id, len(targets)) - len(targets) + 1
+        seq_of = {contact_id: first_seq + n for n, contact_id in enumerate(targets)}
+        now = utcnow()
+        for key, group_ids in groups.items():
+            changes = dict(key)
+            if "birthday" in changes:
+                changes["birthday_md"] = birthday_key(changes["birthday"])
+            if "phone" in changes:
+                changes["phone_e164"] = normalize_phone(changes["phone"])
+            if "email" in changes:
+                changes["email_lower"] = normalize_email(changes["email"])
+            stmt = (update(Contact)
+                    .where(Contact.id.in_(group_ids), Contact.user_id == user_id)
+                    .values(**changes, updated_at=now, version=Contact.version + 1,
+                            change_seq=case({i: seq_of[i] for i in group_ids}, value=Contact.id))
+                    .execution_options(synchronize_session=False))
+            try:
+                with db.begin_nested():
+                    db.execute(stmt)
+                outcome = "updated"
+            except IntegrityError:
+                outcome = "conflict"
+            status.update(dict.fromkeys(group_ids, outcome))
+    db.commit()
+
+    results, reported = [], set()
+    for item in items:
+        results.append({"id": item.id, "status": "duplicate" if item.id in reported else status[item.id]})
+        reported.add(item.id)
+    return results
+
+def delete_contacts_batch(db: Session, user_id: int, contact_ids: list[int]) -> list[dict]:
+    """
+    Delete many contacts with one ``DELETE ... RETURNING`` and write their
+    tombstones with one multi-row INSERT, in a single transaction.
+
+    :param db: SQLAlchemy database session
+    :param user_id: ID of the user
+    :param contact_ids: IDs of the contacts to delete
+    :return: One {"id", "status"} dict per id, in input order; status is
+        "deleted", "not_found" or "duplicate"
+    """
+    stmt = (delete(Contact)
+            .where(Contact.id.in_(set(contact_ids)), Contact.user_id == user_id)
+            .returning(Contact.id)
+            .execution_options(synchronize_session=False))
+    try:
+        deleted = sorted(db.execute(stmt).scalars())
+        if deleted:
+            first_seq = reserve_change_seq(db, user_id, len(deleted)) - len(deleted) + 1
+            now = utcnow()
+            db.execute(insert(ContactTombstone), [
+                {"user_id": user_id, "contact_id": contact_id, "change_seq": first_seq + i, "deleted_at": now}
+                for i, contact_id in enumerate(deleted)
+            ])
+        db.commit()
+    except Exception:
+        db.rollback()
+        raise
+
+    deleted, results, reported = set(deleted), [], set()
+    for contact_id in contact_ids:
+        if contact_id in reported:
+            results.append({"id": contact_id, "status": "duplicate"})
+        else:
+            results.append({"id": contact_id, "status": "deleted" if contact_id in deleted else "not_found"})
+        reported.add(contact_id)
+    return results
+
+async def create_contact_async(db, contact: ContactCreate, user_id: int):
+    """
+    Async version of :func:`create_contact`.
+
+    :param db: AsyncSession (or Session when DB_ASYNC is off)
+    :param contact: Contact data
+    :param user_id: ID of the user
+    :return: Created contact
+    """
+    return await run_with_session(db, create_contact, contact, user_id)
+
+async def bulk_insert_contacts_async(db, user_id: int, contacts: list[ContactCreate]) -> set[str]:
+    """
+    Async version of :func:`bulk_insert_contacts`.
+
+    :param db: AsyncSession (or Session when DB_ASYNC is off)
+    :param user_id: ID of the user owning the contacts
+    :param contacts: Validated contact data
+    :return: Set of emails that were actually inserted
+    """
+    return await run_with_session(db, bulk_insert_contacts, user_id, contacts)
+
+async def get_contacts_async(db, user_id: int, name: str = None, email: str = None):
+    """
+    Async version of :func:`get_contacts`.
+
+    :param db: AsyncSession (or Session when DB_ASYNC is off)
+    :param user_id: ID of the user
+    :param name: Optional name to filter contacts by
+    :param email: Optional email to filter contacts by
+    :return: List of contacts
+    """
+    return await run_with_session(db, get_contacts, user_id, name, email)
+
+async def get_contacts_page_async(db, user_id: int, name: str = None, email: str = None,
+                                  limit: int = DEFAULT_PAGE_SIZE, cursor: str = None, fields: list[str] = None):
+    """
+    Async version of :func:`get_contacts_page`.
+
+    :param db: AsyncSession (or Session when DB_ASYNC is off)
+    :param user_id: ID of the user
+    :param name: Optional name to filter contacts by
+    :param email: Optional email to filter contacts by
+    :param limit: Maximum number of contacts to return
+    :param cursor: Cursor returned with the previous page
+    :param fields: Optional list of contact fields to return
+    :return: Tuple of (items, next_cursor)
+    """
+    return await run_with_session(db, get_contacts_page, user_id, name, email, limit, cursor, fields)
+
+async def search_contacts_async(db, user_id: int, q: str, limit: int = DEFAULT_PAGE_SIZE):
+    """
+    Async version of :func:`search_contacts`.
+
+    :param db: AsyncSession (or Session when DB_ASYNC is off)
+    :param user_id: ID of the user
+    :param q: Search term
+    :param limit: Maximum number of contacts to return
+    :return: List of contacts
+    """
+    return await run_with_session(db, search_contacts, user_id, q, limit)
+
+async def get_upcoming_birthdays_async(db, user_id: int, days: int = 7, today: date = None):
+    """
+    Async version of :func:`get_upcoming_birthdays`.
+
+    :param db: AsyncSession (or Session when DB_ASYNC is off)
+    :param user_id: ID of the user
+    :param days: Size of the window in days
+    :param today: Start of the window, defaults to the current date
+    :return: List of contacts ordered by upcoming birthday
+    """
+    return await run_with_session(db, get_upcoming_birthdays, user_id, days, today)
+
+async def get_contact_async(db, contact_id: int, user_id: int):
+    """
+    Async version of :func:`get_contact`.
+
+    :param db: AsyncSession (or Session when DB_ASYNC is off)
+    :param contact_id: ID of the contact
+    :param user_id: ID of the user
+    :return: Contact object if found, None otherwise
+    """
+    return await run_with_session(db, get_contact, contact_id, user_id)
+
+async def lookup_contacts_async(db, user_id: int, phone: str = None, email: str = None):
+    """
+    Async version of :func:`lookup_contacts`.
+
+    :param db: AsyncSession (or Session when DB_ASYNC is off)
+    :param user_id: ID of the user
+    :param phone: Phone number to look up
+    :param email: Email to look up, used when no phone is given
+    :return: List of matching contacts
+    """
+    return await run_with_session(db, lookup_contacts, user_id, phone, email)
+
+async def lookup_contacts_batch_async(db, user_id: int, phones: list[str] = (), emails: list[str] = ()) -> tuple:
+    """
+    Async version of :func:`lookup_contacts_batch`.
+
+    :param db: AsyncSession (or Session when DB_ASYNC is off)
+    :param user_id: ID of the user
+    :param phones: Phone numbers as the caller has them
+    :param emails: Emails as the caller has them
+    :return: Tuple of ({phone: [contacts]}, {email: [contacts]})
+    """
+    return await run_with_session(db, lookup_contacts_batch, user_id, phones, emails)
+
+async def get_contacts_version_async(db, user_id: int, name: str = None, email: str = None) -> tuple:
+    """
+    Async version of :func:`get_contacts_version`.
+
+    :param db: AsyncSession (or Session when DB_ASYNC is off)
+    :param user_id: ID of the user
+    :param name: Optional name to filter contacts by
+    :param email: Optional email to filter contacts by
+    :return: Tuple of (count, max updated_at or None)
+    """
+    return await run_with_session(db, get_contacts_version, user_id, name, email)
+
+async def get_changes_async(db, user_id: int, since: int = 0, limit: int = DEFAULT_PAGE_SIZE) -> tuple:
+    """
+    Async version of :func:`get_changes`.
+
+    :param db: AsyncSession (or Session when DB_ASYNC is off)
+    :param user_id: ID of the user
+    :param since: Sequence number returned by the previous call, 0 for a full sync
+    :param limit: Maximum number of changes to return
+    :return: Tuple of (contacts, deleted contact ids, next since, has_more)
+    """
+    return await run_with_session(db, get_changes, user_id, since, limit)
+
+async def update_contact_async(db, contact_id: int, contact_update: ContactUpdate, user_id: int,
+                               expected_versions: set[int] = None):
+    """
+    Async version of :func:`update_contact`.
+
+    :param db: AsyncSession (or Session when DB_ASYNC is off)
+    :param contact_id: ID of the contact to update
+    :param contact_update: ContactUpdate schema with updated data
+    :param user_id: ID of the user
+    :param expected_versions: Versions the client allows to be overwritten; None skips the check
+    :return: Updated contact object if successful, None otherwise
+    """
+    return await run_with_session(db, update_contact, contact_id, contact_update, user_id, expected_versions)
+
+async def delete_contact_async(db, contact_id: int, user_id: int, expected_versions: set[int] = None):
+    """
+    Async version of :func:`delete_contact`.
+
+    :param db: AsyncSession (or Session when DB_ASYNC is off)
+    :param contact_id: ID of the contact to delete
+    :param user_id: ID of the user
+    :param expected_versions: Versions the client allows to be deleted; None skips the check
+    :return: Deleted contact object if successful, None otherwise
+    """
+    return await run_with_session(db, delete_contact, contact_id, user_id, expected_versions)
+
+async def update_contacts_batch_async(db, user_id: int, items: list[ContactBatchUpdateItem]) -> list[dict]:
+    """
+    Async version of :func:`update_contacts_batch`.
+
+    :param db: AsyncSession (or Session when DB_ASYNC is off)
+    :param user_id: ID of the user
+    :param items: Contact ids with the fields to change
+    :return: One {"id", "status"} dict per item, in input order
+    """
+    return await run_with_session(db, update_contacts_batch, user_id, items)
+
+async def delete_contacts_batch_async(db, user_id: int, contact_ids: list[int]) -> list[dict]:
+    """
+    Async version of :func:`delete_contacts_batch`.
+
+    :param db: AsyncSession (or Session when DB_ASYNC is off)
+    :param user_id: ID of the user
+    :param contact_ids: IDs of the contacts to delete
+    :return: One {"id", "status"} dict per id, in input order
+    """
+    return await run_with_session(db, delete_contacts_batch, user_id, contact_ids)
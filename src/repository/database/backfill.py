@@ -0,0 +1,80 @@
+"""
+Fill ``phone_e164`` and ``email_lower`` of existing contacts::
+
+    python -m src.repository.database.backfill
+    python -m src.repository.database.backfill --batch-size 5000 --after 120000
+
+Contacts are walked in id order, one batch per transaction, so the job can
+be stopped and resumed with ``--after``. Only rows whose stored values
+differ are written. Run it again after changing PHONE_DEFAULT_COUNTRY_CODE.
+"""
+import argparse
+import sqlalchemy as sa
+from src.repository.database.models import normalize_email, normalize_phone
+
+BACKFILL_BATCH_SIZE = 1000
+
+# Only the columns the backfill touches, so it also runs from the migration
+# that adds them, whatever columns later revisions add.
+contacts_table = sa.table(
+    "contacts",
+    sa.column("id", sa.Integer), sa.column("user_id", sa.Integer),
+    sa.column("phone", sa.String), sa.column("email", sa.String),
+    sa.column("phone_e164", sa.String), sa.column("email_lower", sa.String),
+)
+
+def backfill_normalized(conn, batch_size: int = BACKFILL_BATCH_SIZE, after: int = 0, commit: bool = False,
+                        progress=None) -> int:
+    """
+    Recompute the normalized phone and email of every contact.
+
+    :param conn: SQLAlchemy connection
+    :param batch_size: Contacts read and written per batch
+    :param after: Start after this contact id
+    :param commit: Commit after every batch; leave off inside a migration
+    :param progress: Optional callable receiving (last id, rows updated so far) per batch
+    :return: Number of contacts updated
+    """
+    t = contacts_table
+    select_batch = (sa.select(t.c.id, t.c.user_id, t.c.phone, t.c.email, t.c.phone_e164, t.c.email_lower)
+                    .where(t.c.id > sa.bindparam("after")).order_by(t.c.id).limit(batch_size))
+    # user_id is in the WHERE so Postgres prunes to one partition per row.
+    write = (sa.update(t)
+             .where(t.c.user_id == sa.bindparam("b_user_id"), t.c.id == sa.bindparam("b_id"))
+             .values(phone_e164=sa.bindparam("b_phone"), email_lower=sa.bindparam("b_email")))
+    updated = 0
+    while True:
+        rows = conn.execute(select_batch, {"after": after}).all()
+        if not rows:
+            return updated
+        changed = []
+        for row in rows:
+            phone, email = normalize_phone(row.phone), normalize_email(row.email)
+            if (phone, email) != (row.phone_e164, row.email_lower):
+                changed.append({"b_user_id": row.user_id, "b_id": row.id, "b_phone": phone, "b_email": email})
+        if changed:
+            conn.execute(write, changed)
+            updated += len(changed)
+        if commit:
+            conn.commit()
+        after = rows[-1].id
+        if progress:
+            progress(after, updated)
+
+def main():
+    from src.repository.database.db import engine
+
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--batch-size", type=int, default=BACKFILL_BATCH_SIZE)
+    parser.add_argument("--after", type=int, default=0, help="resume after this contact id")
+    args = parser.parse_args()
+
+    with engine.connect() as conn:
+        updated = backfill_normalized(
+            conn, args.batch_size, args.after, commit=True,
+            progress=lambda last_id, n: print(f"up to id {last_id:>12,}: {n:,} updated", flush=True),
+        )
+    print(f"done, {updated:,} contacts updated")
+
+if __name__ == "__main__":
+    main()
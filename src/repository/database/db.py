@@ -1,16 +1,272 @@
-from sqlalchemy import create_engine
+import itertools
+import threading
+import time
+from fastapi import Request
+from sqlalchemy import Select, create_engine, event
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker, create_async_engine
 from sqlalchemy.ext.declarative import declarative_base
-from sqlalchemy.orm import sessionmaker
-from src.conf.config import DATABASE_URL
+from sqlalchemy.orm import Session, sessionmaker
+from sqlalchemy.pool import NullPool, QueuePool
+from starlette.concurrency import run_in_threadpool
+from src.conf.config import (
+    DATABASE_URL, ASYNC_DATABASE_URL, DB_ASYNC, DB_MAX_OVERFLOW, DB_PGBOUNCER, DB_POOL_PRE_PING,
+    DB_POOL_RECYCLE, DB_POOL_SIZE, DB_POOL_TIMEOUT, DB_STATEMENT_TIMEOUT_MS, DATABASE_REPLICA_URLS,
+    REPLICA_EJECT_SECONDS,
+)
 
-engine = create_engine(DATABASE_URL)
-SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
+# Requests with these methods may read from a replica; everything else uses the primary only.
+READ_ONLY_METHODS = ("GET", "HEAD", "OPTIONS")
+
+_ASYNC_DRIVERS = {
+    "postgresql": "postgresql+asyncpg",
+    "postgresql+psycopg2": "postgresql+asyncpg",
+    "sqlite": "sqlite+aiosqlite",
+}
+
+def to_async_url(url: str) -> str:
+    """
+    Convert a sync database URL to the matching async driver URL.
+
+    :param url: Database URL using a blocking driver
+    :return: Database URL using asyncpg / aiosqlite
+    """
+    scheme, sep, rest = url.partition("://")
+    return f"{_ASYNC_DRIVERS.get(scheme, scheme)}{sep}{rest}"
+
+def engine_options(url: str) -> dict:
+    """
+    Build create_engine keyword arguments from the DB_* pool settings.
+
+    :param url: Database URL the engine will be created for
+    :return: Keyword arguments for create_engine / create_async_engine
+    """
+    options = {"pool_pre_ping": DB_POOL_PRE_PING, "pool_recycle": DB_POOL_RECYCLE}
+    if url.startswith("sqlite"):
+        return options
+
+    connect_args = {}
+    is_asyncpg = url.startswith("postgresql+asyncpg")
+    if DB_PGBOUNCER:
+        # PgBouncer owns the pooling; prepared statements do not survive
+        # transaction-mode server reassignment.
+        options["poolclass"] = NullPool
+        if is_asyncpg:
+            connect_args["statement_cache_size"] = 0
+            connect_args["prepared_statement_cache_size"] = 0
+    else:
+        options.update(pool_size=DB_POOL_SIZE, max_overflow=DB_MAX_OVERFLOW, pool_timeout=DB_POOL_TIMEOUT)
+
+    if DB_STATEMENT_TIMEOUT_MS:
+        if is_asyncpg:
+            connect_args["server_settings"] = {"statement_timeout": str(DB_STATEMENT_TIMEOUT_MS)}
+        else:
+            connect_args["options"] = f"-c statement_timeout={DB_STATEMENT_TIMEOUT_MS}"
+    if connect_args:
+        options["connect_args"] = connect_args
+    return options
+
+def pool_status(engine) -> dict:
+    """
+    Read pool usage counters without checking a connection out.
+
+    :param engine: Engine or AsyncEngine
+    :return: Dictionary with size, checked_out, overflow, capacity and saturation;
+        only the pool class for pools that keep no connections (NullPool)
+    """
+    pool = getattr(engine, "sync_engine", engine).pool
+    if not isinstance(pool, QueuePool):
+        return {"pool": type(pool).__name__}
+    checked_out = pool.checkedout()
+    # QueuePool has no public accessor for max_overflow; -1 means unbounded.
+    max_overflow = pool._max_overflow
+    capacity = pool.size() + max_overflow if max_overflow >= 0 else None
+    return {
+        "pool": type(pool).__name__,
+        "size": pool.size(),
+        "checked_in": pool.checkedin(),
+        "checked_out": checked_out,
+        "overflow": max(pool.overflow(), 0),
+        "capacity": capacity,
+        "saturation": round(checked_out / capacity, 3) if capacity else 0.0,
+    }
+
+class ReplicaSet:
+    """
+    Round-robin over replica engines, skipping any that recently failed to connect.
+    """
+
+    def __init__(self, engines, eject_seconds: float = REPLICA_EJECT_SECONDS):
+        """
+        :param engines: Replica Engines or AsyncEngines
+        :param eject_seconds: How long a failing replica is skipped
+        """
+        self._sources = {getattr(e, "sync_engine", e): e for e in engines}
+        self.engines = list(self._sources)
+        self.eject_seconds = eject_seconds
+        self._ejected_until = {}
+        self._counter = itertools.count()
+        self._lock = threading.Lock()
+        for sync_engine in self.engines:
+            event.listen(sync_engine, "handle_error", self._on_error)
+
+    def __bool__(self):
+        return bool(self.engines)
+
+    def choose(self):
+        """
+        Return the next healthy replica engine.
+
+        :return: Sync Engine, or None when every replica is ejected
+        """
+        now = time.monotonic()
+        with self._lock:
+            start = next(self._counter)
+            for i in range(len(self.engines)):
+                candidate = self.engines[(start + i) % len(self.engines)]
+                if self._ejected_until.get(candidate, 0) <= now:
+                    return candidate
+        return None
+
+    def eject(self, sync_engine):
+        """
+        Skip a replica for ``eject_seconds``.
+
+        :param sync_engine: Replica engine that failed
+        :return: None
+        """
+        with self._lock:
+            self._ejected_until[sync_engine] = time.monotonic() + self.eject_seconds
+
+    def source(self, sync_engine):
+        """
+        :param sync_engine: Replica engine as returned by :meth:`choose`
+        :return: The engine it was registered as (AsyncEngine for async replicas)
+        """
+        return self._sources.get(sync_engine)
+
+    def is_ejected(self, sync_engine) -> bool:
+        """
+        :param sync_engine: Replica engine
+        :return: True while the replica is being skipped
+        """
+        with self._lock:
+            return self._ejected_until.get(sync_engine, 0) > time.monotonic()
+
+    def _on_error(self, context):
+        # No connection means connecting failed; is_disconnect covers a replica dropping mid-query.
+        if context.connection is None or context.is_disconnect:
+            self.eject(context.engine)
+
+class RoutingSession(Session):
+    """
+    Session that sends SELECTs to a replica until it writes anything.
+
+    The replica is picked once per session, so a request sees one consistent
+    snapshot. Once the session flushes or runs a non-SELECT statement every
+    later statement goes to the primary, so a row created in a request can
+    be read back in the same request.
+    """
+
+    def __init__(self, *args, replicas: ReplicaSet | None = None, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.replicas = replicas
+        self._replica = None
+        self._wrote = False
+
+    def get_bind(self, mapper=None, clause=None, **kwargs):
+        if self.replicas and not self._wrote:
+            if not self._flushing and (clause is None or isinstance(clause, Select)):
+                if self._replica is None or self.replicas.is_ejected(self._replica):
+                    self._replica = self.replicas.choose()
+                if self._replica is not None:
+                    return self._replica
+            else:
+                self._wrote = True
+        return super().get_bind(mapper, clause=clause, **kwargs)
+
+_async_url = ASYNC_DATABASE_URL or to_async_url(DATABASE_URL)
+
+engine = create_engine(DATABASE_URL, **engine_options(DATABASE_URL))
+SessionLocal = sessionmaker(class_=RoutingSession, autocommit=False, autoflush=False, bind=engine)
+
+async_engine = create_async_engine(_async_url, **engine_options(_async_url))
+AsyncSessionLocal = async_sessionmaker(
+    async_engine, sync_session_class=RoutingSession, autoflush=False, expire_on_commit=False
+)
+
+replica_engines = [create_engine(url, **engine_options(url)) for url in DATABASE_REPLICA_URLS]
+async_replica_engines = [
+    create_async_engine(to_async_url(url), **engine_options(to_async_url(url))) for url in DATABASE_REPLICA_URLS
+]
+replicas = ReplicaSet(replica_engines)
+async_replicas = ReplicaSet(async_replica_engines)
 
 Base = declarative_base()
 
-def get_db():
-    db = SessionLocal()
+def get_db(request: Request = None):
+    """
+    Yield a Session; read-only requests may be served by a replica.
+
+    :param request: HTTP request, used to tell reads from writes
+    :return: SQLAlchemy database session
+    """
+    db = SessionLocal(replicas=replicas if request is not None and request.method in READ_ONLY_METHODS else None)
     try:
         yield db
     finally:
         db.close()
+
+async def get_async_db(request: Request = None):
+    """
+    Yield an AsyncSession bound to the async engine; read-only requests may
+    be served by a replica.
+
+    :param request: HTTP request, used to tell reads from writes
+    :return: SQLAlchemy async database session
+    """
+    use_replicas = request is not None and request.method in READ_ONLY_METHODS
+    async with AsyncSessionLocal(replicas=async_replicas if use_replicas else None) as db:
+        yield db
+
+def read_bind(db):
+    """
+    Engine a long streaming read should open its own connection on: the
+    session's replica when it reads from one, otherwise the primary.
+
+    :param db: AsyncSession or Session
+    :return: AsyncEngine for an AsyncSession, Engine for a Session
+    """
+    if isinstance(db, AsyncSession):
+        bind = db.sync_session.get_bind()
+        replica_set = getattr(db.sync_session, "replicas", None)
+        return (replica_set.source(bind) if replica_set else None) or db.bind
+    return db.get_bind()
+
+def use_primary(db):
+    """
+    Send every later statement of a session to the primary, e.g. for a read
+    whose result outlives the request and must not lag behind a write.
+
+    :param db: AsyncSession or Session
+    :return: None
+    """
+    session = db.sync_session if isinstance(db, AsyncSession) else db
+    if isinstance(session, RoutingSession):
+        session.replicas = None
+
+async def run_with_session(db, fn, *args, **kwargs):
+    """
+    Run a sync repository function without blocking the event loop.
+
+    On an AsyncSession the function runs through ``run_sync`` on the async driver,
+    on a plain Session it runs in the threadpool like a sync route would.
+
+    :param db: AsyncSession or Session
+    :param fn: Repository function taking a sync Session as first argument
+    :return: Whatever ``fn`` returns
+    """
+    if isinstance(db, AsyncSession):
+        return await db.run_sync(fn, *args, **kwargs)
+    return await run_in_threadpool(fn, db, *args, **kwargs)
+
+get_session = get_async_db if DB_ASYNC else get_db
@@ -1,26 +1,167 @@
-from sqlalchemy import Column, Integer, String, Date, Boolean, ForeignKey, Enum as SQLAEnum
-from sqlalchemy.orm import relationship
+import re
+from datetime import datetime, timezone
+from sqlalchemy import BigInteger, Column, Integer, SmallInteger, String, Date, DateTime, Boolean, DDL, ForeignKey, Index, event, func, literal_column, Enum as SQLAEnum
+from sqlalchemy.ext.compiler import compiles
+from sqlalchemy.orm import relationship, validates
+from sqlalchemy.schema import PrimaryKeyConstraint
+from src.conf.config import CONTACTS_PARTITIONS, PHONE_DEFAULT_COUNTRY_CODE
 from src.repository.database.db import Base
 import enum
 
+_PHONE_EXTENSION = re.compile(r"\s*(?:ext\.?|x|#|;).*$", re.IGNORECASE)
+_NON_DIGITS = re.compile(r"\D")
+
+def utcnow() -> datetime:
+    """
+    Current time in UTC, the default and onupdate value of ``updated_at`` columns.
+
+    :return: Timezone-aware datetime
+    """
+    return datetime.now(timezone.utc)
+
+def name_sort_key(column):
+    """
+    Sort key of a nullable name column: NULL sorts as "", so keyset
+    row-value comparisons never meet a NULL.
+
+    :param column: Column or mapped attribute
+    :return: ``coalesce(column, '')``, with the literal inlined to match the index expression
+    """
+    return func.coalesce(column, literal_column("''"))
+
+def birthday_key(birthday):
+    """
+    Month/day of a date packed as MMDD, e.g. 1231 for December 31st.
+    Unlike day-of-year it does not shift after February in leap years.
+
+    :param birthday: Date or None
+    :return: MMDD integer or None
+    """
+    return birthday.month * 100 + birthday.day if birthday else None
+
+def normalize_phone(phone: str | None, country_code: str = PHONE_DEFAULT_COUNTRY_CODE) -> str | None:
+    """
+    Phone number in E.164 form, e.g. "+15550102000" for "+1 (555) 010-2000".
+
+    A leading "+" or "00" marks an international number. Otherwise one trunk
+    "0" is dropped and numbers of up to 10 digits get ``country_code``; longer
+    ones are taken to include it already. Extensions ("x12", "ext. 12") are
+    ignored.
+
+    :param phone: Phone number as entered
+    :param country_code: Calling code for numbers written without one
+    :return: E.164 string, or None when the result is not 7 to 15 digits long
+    """
+    if not phone:
+        return None
+    phone = _PHONE_EXTENSION.sub("", phone.strip())
+    digits = _NON_DIGITS.sub("", phone)
+    if phone.startswith("+"):
+        pass
+    elif digits.startswith("00"):
+        digits = digits[2:]
+    else:
+        if digits.startswith("0"):
+            digits = digits[1:]
+        if len(digits) <= 10:
+            digits = country_code + digits
+    return f"+{digits}" if 7 <= len(digits) <= 15 else None
+
+def normalize_email(email: str | None) -> str | None:
+    """
+    :param email: Email address as entered
+    :return: Trimmed, lowercased address, or None
+    """
+    return email.strip().lower() if email else None
+
 class UserRole(enum.Enum):
     user = "user"
     admin = "admin"
 
 class Contact(Base):
+    """
+    On Postgres the table is hash-partitioned on ``user_id`` with primary key
+    (user_id, id), both by ``create_all`` (see the DDL below the models) and
+    by the d9c3f1a6b8e4 migration. The mapper identity is (user_id, id) as
+    well, so ORM UPDATEs and DELETEs are partition-pruned.
+    """
     __tablename__ = "contacts"
 
     id = Column(Integer, primary_key=True, index=True)
     first_name = Column(String, index=True)
     last_name = Column(String, index=True)
-    email = Column(String, unique=True, index=True)
+    email = Column(String, index=True)
     phone = Column(String, index=True)
     birthday = Column(Date)
+    birthday_md = Column(SmallInteger, nullable=True)
     additional_info = Column(String, nullable=True)
-    user_id = Column(Integer, ForeignKey("users.id"))
+    user_id = Column(Integer, ForeignKey("users.id"), nullable=False)
+    updated_at = Column(DateTime(timezone=True), nullable=False, default=utcnow, onupdate=utcnow)
+    # Bumped by the ORM on every UPDATE, which also checks it (optimistic concurrency).
+    version = Column(Integer, nullable=False, default=1, server_default="1")
+    # Per-user change sequence, see ContactChangeCounter; drives GET /contacts/changes.
+    change_seq = Column(BigInteger, nullable=True)
+    # Exact-match keys for GET /contacts/lookup, kept in step with phone and email.
+    phone_e164 = Column(String, nullable=True)
+    email_lower = Column(String, nullable=True)
 
     owner = relationship("User", back_populates="contacts")
 
+    __table_args__ = (
+        Index("ix_contacts_user_keyset", "user_id", name_sort_key(last_name), name_sort_key(first_name), "id"),
+        Index("ix_contacts_user_birthday_md", "user_id", "birthday_md"),
+        Index("ix_contacts_user_updated_at", "user_id", "updated_at"),
+        Index("ix_contacts_user_change_seq", "user_id", "change_seq"),
+        Index("uq_contacts_user_email", "user_id", "email", unique=True),
+        Index("ix_contacts_user_phone_e164", "user_id", "phone_e164"),
+        Index("ix_contacts_user_email_lower", "user_id", "email_lower"),
+        {"postgresql_partition_by": "HASH (user_id)"},
+    )
+    __mapper_args__ = {"version_id_col": version, "primary_key": [user_id, id]}
+
+    @validates("birthday")
+    def _sync_birthday_md(self, key, value):
+        self.birthday_md = birthday_key(value)
+        return value
+
+    @validates("phone")
+    def _sync_phone_e164(self, key, value):
+        self.phone_e164 = normalize_phone(value)
+        return value
+
+    @validates("email")
+    def _sync_email_lower(self, key, value):
+        self.email_lower = normalize_email(value)
+        return value
+
+class ContactTombstone(Base):
+    """
+    Record of a deleted contact, so sync clients learn about the deletion.
+    """
+    __tablename__ = "contact_tombstones"
+
+    id = Column(Integer, primary_key=True)
+    user_id = Column(Integer, nullable=False)
+    contact_id = Column(Integer, nullable=False)
+    change_seq = Column(BigInteger, nullable=False)
+    deleted_at = Column(DateTime(timezone=True), nullable=False, default=utcnow)
+
+    __table_args__ = (
+        Index("ix_contact_tombstones_user_change_seq", "user_id", "change_seq"),
+    )
+
+class ContactChangeCounter(Base):
+    """
+    Last change sequence number handed out per user.
+
+    Incremented inside the writing transaction, so the row lock orders a
+    user's writers and sequence numbers become visible in commit order.
+    """
+    __tablename__ = "contact_change_counters"
+
+    user_id = Column(Integer, primary_key=True, autoincrement=False)
+    last_seq = Column(BigInteger, nullable=False, default=0)
+
 class User(Base):
     __tablename__ = "users"
 
@@ -33,4 +174,56 @@ class User(Base):
     confirmed = Column(Boolean, default=False)
     role = Column(SQLAEnum(UserRole), default=UserRole.user)
 
-    contacts = relationship("Contact", back_populates="owner")
\ No newline at end of file
+    contacts = relationship("Contact", back_populates="owner")
+
+# Search indexes that cannot be declared portably on the Table itself.
+# Postgres gets pg_trgm GIN indexes (also serving the ILIKE filters), SQLite an
+# external-content FTS5 table kept in sync by triggers.
+CONTACTS_TRGM_DDL = [
+    "CREATE EXTENSION IF NOT EXISTS pg_trgm",
+    "CREATE INDEX IF NOT EXISTS ix_contacts_first_name_trgm ON contacts USING gin (first_name gin_trgm_ops)",
+    "CREATE INDEX IF NOT EXISTS ix_contacts_last_name_trgm ON contacts USING gin (last_name gin_trgm_ops)",
+    "CREATE INDEX IF NOT EXISTS ix_contacts_email_trgm ON contacts USING gin (email gin_trgm_ops)",
+]
+
+CONTACTS_FTS5_DDL = [
+    "CREATE VIRTUAL TABLE IF NOT EXISTS contacts_fts USING fts5("
+    "first_name, last_name, email, content='contacts', content_rowid='id')",
+    "CREATE TRIGGER IF NOT EXISTS contacts_fts_ai AFTER INSERT ON contacts BEGIN "
+    "INSERT INTO contacts_fts(rowid, first_name, last_name, email) "
+    "VALUES (new.id, new.first_name, new.last_name, new.email); END",
+    "CREATE TRIGGER IF NOT EXISTS contacts_fts_ad AFTER DELETE ON contacts BEGIN "
+    "INSERT INTO contacts_fts(contacts_fts, rowid, first_name, last_name, email) "
+    "VALUES ('delete', old.id, old.first_name, old.last_name, old.email); END",
+    "CREATE TRIGGER IF NOT EXISTS contacts_fts_au AFTER UPDATE ON contacts BEGIN "
+    "INSERT INTO contacts_fts(contacts_fts, rowid, first_name, last_name, email) "
+    "VALUES ('delete', old.id, old.first_name, old.last_name, old.email); "
+    "INSERT INTO contacts_fts(rowid, first_name, last_name, email) "
+    "VALUES (new.id, new.first_name, new.last_name, new.email); END",
+]
+
+# Partitions of the contacts table on Postgres, as the d9c3f1a6b8e4 migration creates them.
+CONTACTS_PARTITION_DDL = [
+    f"CREATE TABLE IF NOT EXISTS contacts_p{remainder:02d} PARTITION OF contacts "
+    f"FOR VALUES WITH (MODULUS {CONTACTS_PARTITIONS}, REMAINDER {remainder})"
+    for remainder in range(CONTACTS_PARTITIONS)
+]
+
+@compiles(PrimaryKeyConstraint, "postgresql")
+def _compile_primary_key(constraint, compiler, **kw):
+    # The key of a partitioned table must contain the partition key. Elsewhere
+    # the key stays (id), which SQLite needs for id to be its autoincrementing rowid.
+    if constraint.table is Contact.__table__:
+        return "PRIMARY KEY (user_id, id)"
+    return compiler.visit_primary_key_constraint(constraint, **kw)
+
+for statement in CONTACTS_PARTITION_DDL:
+    event.listen(Contact.__table__, "after_create", DDL(statement).execute_if(dialect="postgresql"))
+for statement in CONTACTS_TRGM_DDL:
+    event.listen(Contact.__table__, "after_create", DDL(statement).execute_if(dialect="postgresql"))
+for statement in CONTACTS_FTS5_DDL:
+    event.listen(Contact.__table__, "after_create", DDL(statement).execute_if(dialect="sqlite"))
+event.listen(
+    Contact.__table__, "before_drop",
+    DDL("DROP TABLE IF EXISTS contacts_fts").execute_if(dialect="sqlite"),
+)
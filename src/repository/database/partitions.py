@@ -0,0 +1,96 @@
+"""
+Size and skew of the hash partitions of ``contacts`` on Postgres::
+
+    python -m src.repository.database.partitions
+    python -m src.repository.database.partitions --exact --top 10
+
+Row counts come from planner statistics unless ``--exact`` is given, which
+counts every partition. ``--top`` lists the tenants with the most contacts,
+which is where skew usually comes from.
+"""
+import argparse
+import statistics
+from sqlalchemy import text
+
+PARTITION_STATS_SQL = text("""
+    SELECT child.relname AS name,
+           greatest(child.reltuples, 0)::bigint AS rows,
+           pg_total_relation_size(child.oid) AS bytes
+    FROM pg_inherits
+    JOIN pg_class parent ON parent.oid = pg_inherits.inhparent
+    JOIN pg_class child ON child.oid = pg_inherits.inhrelid
+    WHERE parent.relname = :table
+    ORDER BY child.relname
+""")
+
+def partition_stats(conn, table: str = "contacts", exact: bool = False) -> list[dict]:
+    """
+    Rows and on-disk size of every partition of ``table``.
+
+    :param conn: SQLAlchemy connection to Postgres
+    :param table: Partitioned table name
+    :param exact: Count rows instead of using the planner estimate
+    :return: List of {"name", "rows", "bytes"} dicts, empty if the table is not partitioned
+    """
+    stats = [dict(row) for row in conn.execute(PARTITION_STATS_SQL, {"table": table}).mappings()]
+    if exact and stats:
+        counts = dict(conn.execute(text(f"SELECT tableoid::regclass::text, count(*) FROM {table} GROUP BY 1")).all())
+        for partition in stats:
+            partition["rows"] = counts.get(partition["name"], 0)
+    return stats
+
+def skew_report(stats: list[dict]) -> dict:
+    """
+    Summarize how evenly rows are spread over partitions.
+
+    :param stats: Output of :func:`partition_stats`
+    :return: Totals plus ``skew`` (largest partition / mean, 1.0 is perfectly
+        even) and ``cv`` (coefficient of variation of the row counts)
+    """
+    rows = [p["rows"] for p in stats]
+    if not rows:
+        return {"partitions": 0, "rows": 0, "bytes": 0, "skew": None, "cv": None}
+    mean = statistics.fmean(rows)
+    return {
+        "partitions": len(rows),
+        "rows": sum(rows),
+        "bytes": sum(p["bytes"] for p in stats),
+        "min_rows": min(rows),
+        "max_rows": max(rows),
+        "skew": round(max(rows) / mean, 3) if mean else None,
+        "cv": round(statistics.pstdev(rows) / mean, 3) if mean else None,
+    }
+
+def top_tenants(conn, limit: int = 10) -> list[tuple]:
+    """
+    :param conn: SQLAlchemy connection
+    :param limit: Number of tenants to return
+    :return: List of (user_id, contacts, partition) for the largest tenants
+    """
+    return conn.execute(text(
+        "SELECT user_id, count(*), min(tableoid::regclass::text) FROM contacts "
+        "GROUP BY user_id ORDER BY 2 DESC LIMIT :limit"
+    ), {"limit": limit}).all()
+
+def main():
+    from src.repository.database.db import engine
+
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--exact", action="store_true", help="count rows instead of using estimates")
+    parser.add_argument("--top", type=int, default=0, help="also list the N largest tenants")
+    args = parser.parse_args()
+
+    with engine.connect() as conn:
+        stats = partition_stats(conn, exact=args.exact)
+        if not stats:
+            raise SystemExit("contacts is not partitioned")
+        for p in stats:
+            print(f"{p['name']:>16}  {p['rows']:>12,} rows  {p['bytes'] / 2**20:>10.1f} MiB")
+        report = skew_report(stats)
+        print(f"{report['partitions']} partitions, {report['rows']:,} rows, {report['bytes'] / 2**20:.1f} MiB; "
+              f"max/mean {report['skew']}, cv {report['cv']}")
+        for user_id, count, partition in top_tenants(conn, args.top) if args.top else ():
+            print(f"user {user_id:>10}  {count:>10,} contacts  {partition}")
+
+if __name__ == "__main__":
+    main()
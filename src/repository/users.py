@@ -1,7 +1,8 @@
 from sqlalchemy.orm import Session
+from src.repository.database.db import run_with_session
 from src.repository.database.models import User
 from src.schemas import UserCreate
-from src.services.security import get_password_hash
+from src.services.security import get_password_hash, get_password_hash_async
 
 def get_user_by_email(db: Session, email: str):
     """
@@ -13,17 +14,116 @@ def get_user_by_email(db: Session, email: str):
     """
     return db.query(User).filter(User.email == email).first()
 
-def create_user(db: Session, user: UserCreate):
+def create_user(db: Session, user: UserCreate, hashed_password: str = None):
     """
     Create a new user in the database.
 
     :param db: SQLAlchemy database session
     :param user: User data
+    :param hashed_password: Precomputed password hash, hashed here if omitted
     :return: Created user
     """
-    hashed_pw = get_password_hash(user.password)
+    hashed_pw = hashed_password or get_password_hash(user.password)
     db_user = User(username = user.username, email=user.email, hashed_password=hashed_pw, confirmed=False)
     db.add(db_user)
     db.commit()
     db.refresh(db_user)
-    return db_user
\ No newline at end of file
+    return db_user
+
+def confirm_email(db: Session, email: str):
+    """
+    Mark a user's email address as confirmed.
+
+    :param db: SQLAlchemy database session
+    :param email: Email address of the user
+    :return: Updated user if found, None otherwise
+    """
+    user = get_user_by_email(db, email)
+    if user:
+        user.confirmed = True
+        db.commit()
+    return user
+
+def update_password(db: Session, email: str, hashed_password: str):
+    """
+    Replace a user's password hash.
+
+    :param db: SQLAlchemy database session
+    :param email: Email address of the user
+    :param hashed_password: New bcrypt hash
+    :return: Updated user if found, None otherwise
+    """
+    user = get_user_by_email(db, email)
+    if user:
+        user.hashed_password = hashed_password
+        db.commit()
+    return user
+
+def update_avatar(db: Session, email: str, avatar_url: str):
+    """
+    Set a user's avatar URL.
+
+    :param db: SQLAlchemy database session
+    :param email: Email address of the user
+    :param avatar_url: URL of the uploaded avatar
+    :return: Updated user if found, None otherwise
+    """
+    user = get_user_by_email(db, email)
+    if user:
+        user.avatar_url = avatar_url
+        db.commit()
+        db.refresh(user)
+    return user
+
+async def get_user_by_email_async(db, email: str):
+    """
+    Async version of :func:`get_user_by_email`.
+
+    :param db: AsyncSession (or Session when DB_ASYNC is off)
+    :param email: Email address of the user
+    :return: User object if found, None otherwise
+    """
+    return await run_with_session(db, get_user_by_email, email)
+
+async def create_user_async(db, user: UserCreate):
+    """
+    Async version of :func:`create_user`.
+
+    :param db: AsyncSession (or Session when DB_ASYNC is off)
+    :param user: User data
+    :return: Created user
+    """
+    hashed_pw = await get_password_hash_async(user.password)
+    return await run_with_session(db, create_user, user, hashed_pw)
+
+async def confirm_email_async(db, email: str):
+    """
+    Async version of :func:`confirm_email`.
+
+    :param db: AsyncSession (or Session when DB_ASYNC is off)
+    :param email: Email address of the user
+    :return: Updated user if found, None otherwise
+    """
+    return await run_with_session(db, confirm_email, email)
+
+async def update_password_async(db, email: str, hashed_password: str):
+    """
+    Async version of :func:`update_password`.
+
+    :param db: AsyncSession (or Session when DB_ASYNC is off)
+    :param email: Email address of the user
+    :param hashed_password: New bcrypt hash
+    :return: Updated user if found, None otherwise
+    """
+    return await run_with_session(db, update_password, email, hashed_password)
+
+async def update_avatar_async(db, email: str, avatar_url: str):
+    """
+    Async version of :func:`update_avatar`.
+
+    :param db: AsyncSession (or Session when DB_ASYNC is off)
+    :param email: Email address of the user
+    :param avatar_url: URL of the uploaded avatar
+    :return: Updated user if found, None otherwise
+    """
+    return await run_with_session(db, update_avatar, email, avatar_url)
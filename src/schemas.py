@@ -1,8 +1,9 @@
-from pydantic import BaseModel, ConfigDict, EmailStr
-from datetime import date
+from pydantic import BaseModel, ConfigDict, EmailStr, Field
+from datetime import date, datetime
 from typing import Optional
 from pydantic import BaseModel
 from enum import Enum
+from src.conf.config import CONTACTS_BATCH_MAX
 
 class RoleEnum(str, Enum):
     user = "user"
@@ -15,6 +16,9 @@ class PasswordResetConfirm(BaseModel):
     token: str
     new_password: str
 
+class RefreshRequest(BaseModel):
+    refresh_token: str
+
 class ContactCreate(BaseModel):
     first_name: str
     last_name: str
@@ -31,6 +35,49 @@ class ContactUpdate(BaseModel):
     birthday: Optional[date] = None
     additional_info: Optional[str] = None
 
+class ContactResponse(BaseModel):
+    id: int
+    first_name: Optional[str] = None
+    last_name: Optional[str] = None
+    email: Optional[str] = None
+    phone: Optional[str] = None
+    birthday: Optional[date] = None
+    additional_info: Optional[str] = None
+    updated_at: Optional[datetime] = None
+    version: int = 1
+
+    model_config = ConfigDict(from_attributes=True)
+
+class ContactChanges(BaseModel):
+    upserted: list[ContactResponse]
+    deleted: list[int]
+    next_since: int
+    has_more: bool
+
+class BatchItemResult(BaseModel):
+    id: int
+    status: str
+
+class BatchResults(BaseModel):
+    results: list[BatchItemResult]
+
+class ContactBatchUpdateItem(ContactUpdate):
+    id: int
+
+class ContactBatchUpdate(BaseModel):
+    items: list[ContactBatchUpdateItem] = Field(min_length=1, max_length=CONTACTS_BATCH_MAX)
+
+class ContactBatchDelete(BaseModel):
+    ids: list[int] = Field(min_length=1, max_length=CONTACTS_BATCH_MAX)
+
+class ContactLookup(BaseModel):
+    phones: list[str] = Field(default_factory=list, max_length=CONTACTS_BATCH_MAX)
+    emails: list[str] = Field(default_factory=list, max_length=CONTACTS_BATCH_MAX)
+
+class ContactLookupResults(BaseModel):
+    phones: dict[str, list[ContactResponse]]
+    emails: dict[str, list[ContactResponse]]
+
 
 class UserBase(BaseModel):
     id: int
@@ -1,42 +1,26 @@
-from datetime import datetime, timedelta
-from jose import jwt, JWTError
-from passlib.context import CryptContext
 import os
+import secrets
 from src.repository import users
 from fastapi.security import OAuth2PasswordBearer
-from fastapi import Depends, HTTPException, status, UploadFile
-from sqlalchemy.orm import Session
-from src.repository.database.db import get_db
+from fastapi import Depends, HTTPException, status
+from starlette.concurrency import run_in_threadpool
+from src.repository.database.db import get_session
 from src.repository.database.models import User
-import cloudinary
-import cloudinary.uploader
-from src.services.cache import get_cached_user, set_cached_user
-
-cloudinary.config(
-    cloud_name=os.getenv("CLOUDINARY_NAME"),
-    api_key=os.getenv("CLOUDINARY_API_KEY"),
-    api_secret=os.getenv("CLOUDINARY_API_SECRET")
+from src.services.cache import (
+    deserialize_user, get_cached_user, get_local_user, serialize_user, set_cached_user,
 )
+from src.services.revocation import revocations
+from src.services.tokens import token_verifier
 
-pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
-SECRET_KEY = os.getenv("SECRET_KEY")
-ALGORITHM = "HS256"
 ACCESS_TOKEN_EXPIRE_MINUTES = 30
+REFRESH_TOKEN_EXPIRE_DAYS = int(os.getenv("REFRESH_TOKEN_EXPIRE_DAYS", 14))
+REFRESH_TOKEN_SCOPE = "refresh"
 oauth2_scheme = OAuth2PasswordBearer(tokenUrl="/auth/login")
 
-def upload_avatar(file: UploadFile):
+async def get_current_user(token: str = Depends(oauth2_scheme), db = Depends(get_session)) -> User:
     """
-    Uploads an avatar image to Cloudinary and returns the secure URL.
-
-    :param file: The image file to upload
-    :return: The secure URL of the uploaded image
-    """
-    result = cloudinary.uploader.upload(file.file)
-    return result.get("secure_url")
-
-def get_current_user(token: str = Depends(oauth2_scheme), db: Session = Depends(get_db)) -> User:
-    """
-    Retrieves the current user from JWT token, using Redis cache if available.
+    Retrieves the current user from JWT token, checking the in-process cache,
+    then Redis, then the database.
 
     :param token: The JWT token
     :param db: SQLAlchemy session
@@ -49,18 +33,22 @@ def get_current_user(token: str = Depends(oauth2_scheme), db: Session = Depends(
     payload = decode_token(token)
     if payload is None or "sub" not in payload:
         raise credentials_exception
+    if revocations.might_be_revoked(payload) and await run_in_threadpool(revocations.is_revoked, payload):
+        raise credentials_exception
 
     email = payload["sub"]
 
-    cached_user = get_cached_user(email)
+    cached_user = get_local_user(email)
+    if cached_user is None:
+        cached_user = await run_in_threadpool(get_cached_user, email)
     if cached_user:
-        return User(**cached_user)
+        return deserialize_user(cached_user)
 
-    user = users.get_user_by_email(db, email=email)
+    user = await users.get_user_by_email_async(db, email=email)
     if user is None:
         raise credentials_exception
 
-    set_cached_user(email, user.dict())
+    await run_in_threadpool(set_cached_user, email, serialize_user(user))
     return user
 
 def create_access_token(data: dict):
@@ -70,19 +58,51 @@ def create_access_token(data: dict):
     :param data: The data to encode in the token
     :return: The encoded JWT token
     """
-    to_encode = data.copy()
-    expire = datetime.utcnow() + timedelta(minutes=ACCESS_TOKEN_EXPIRE_MINUTES)
-    to_encode.update({"exp": expire})
-    return jwt.encode(to_encode, SECRET_KEY, algorithm=ALGORITHM)
+    return token_verifier.issue(data, ACCESS_TOKEN_EXPIRE_MINUTES * 60)
+
+def issue_token_pair(email: str, family: str | None = None) -> dict:
+    """
+    Create an access token and a refresh token for a user.
+
+    Both carry the same ``fam`` claim, which ties every token refreshed from
+    one login together so they can be revoked as a group.
+
+    :param email: The user's email (token subject)
+    :param family: Family of the refresh token being rotated, None for a new login
+    :return: Dictionary with access_token, refresh_token and token_type
+    """
+    family = family or secrets.token_urlsafe(12)
+    return {
+        "access_token": create_access_token({"sub": email, "fam": family}),
+        "refresh_token": token_verifier.issue(
+            {"sub": email, "fam": family, "scope": REFRESH_TOKEN_SCOPE}, REFRESH_TOKEN_EXPIRE_DAYS * 86400
+        ),
+        "token_type": "bearer",
+    }
+
+def rotate_refresh_token(refresh_token: str) -> dict | None:
+    """
+    Exchange a refresh token for a new token pair. Each refresh token works
+    once; presenting one again means it leaked, so its whole family is revoked.
+    Talks to Redis, call it from a thread.
+
+    :param refresh_token: The refresh token
+    :return: New token pair, or None if the token is invalid, revoked or reused
+    """
+    claims = token_verifier.verify(refresh_token, scope=REFRESH_TOKEN_SCOPE)
+    if claims is None or "fam" not in claims:
+        return None
+    if revocations.is_revoked(claims) or not revocations.revoke_token(claims):
+        revocations.revoke_family(claims["fam"], REFRESH_TOKEN_EXPIRE_DAYS * 86400)
+        return None
+    return issue_token_pair(claims["sub"], claims["fam"])
 
 def decode_token(token: str):
     """
-    Decodes a JWT token and returns the payload.
+    Decodes an access token and returns the payload.
+    Verified tokens are cached until they expire, see :class:`TokenVerifier`.
 
     :param token: The JWT token to decode
     :return: The decoded payload if valid, None otherwise
     """
-    try:
-        return jwt.decode(token, SECRET_KEY, algorithms=[ALGORITHM])
-    except JWTError:
-        return None
\ No newline at end of file
+    return token_verifier.verify(token)
\ No newline at end of file
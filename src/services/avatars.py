@@ -0,0 +1,165 @@
+import hashlib
+import io
+import os
+from fastapi import HTTPException, Request, UploadFile
+from starlette.datastructures import UploadFile as StarletteUploadFile
+
+AVATAR_MAX_BYTES = int(os.getenv("AVATAR_MAX_BYTES", 5 * 1024 * 1024))
+AVATAR_MAX_PIXELS = int(os.getenv("AVATAR_MAX_PIXELS", 40_000_000))
+# The user's avatar_url points at the largest size; the others sit next to it.
+AVATAR_SIZES = tuple(int(s) for s in os.getenv("AVATAR_SIZES", "256,128,64").split(","))
+AVATAR_JPEG_QUALITY = int(os.getenv("AVATAR_JPEG_QUALITY", 85))
+AVATAR_FORMATS = {"JPEG", "PNG"}
+READ_CHUNK_SIZE = 64 * 1024
+# Room for the multipart boundaries and part headers around the file itself.
+AVATAR_FORM_OVERHEAD = 16 * 1024
+
+class InvalidImage(Exception):
+    """
+    Raised when avatar bytes are not a JPEG/PNG image within the limits.
+    """
+
+async def read_limited(file: UploadFile, max_bytes: int = AVATAR_MAX_BYTES) -> bytes:
+    """
+    Read an upload in chunks, giving up as soon as it exceeds ``max_bytes``.
+
+    :param file: Uploaded file
+    :param max_bytes: Size limit
+    :return: File contents
+    """
+    chunks, size = [], 0
+    while chunk := await file.read(READ_CHUNK_SIZE):
+        size += len(chunk)
+        if size > max_bytes:
+            raise _too_large(max_bytes)
+        chunks.append(chunk)
+    return b"".join(chunks)
+
+def _too_large(max_bytes: int) -> HTTPException:
+    return HTTPException(status_code=413, detail=f"Avatar larger than {max_bytes} bytes")
+
+class _LimitedRequest(Request):
+    """
+    View of a request whose body stream fails with 413 once it passes ``max_bytes``.
+    """
+
+    def __init__(self, request: Request, max_bytes: int):
+        super().__init__(request.scope, request.receive)
+        self.max_bytes = max_bytes
+
+    async def stream(self):
+        size = 0
+        async for chunk in super().stream():
+            size += len(chunk)
+            if size > self.max_bytes:
+                raise _too_large(AVATAR_MAX_BYTES)
+            yield chunk
+
+async def avatar_upload(request: Request):
+    """
+    Dependency parsing the multipart body of an avatar upload itself, so an
+    oversized upload is refused on its Content-Length, or as soon as the
+    stream passes the limit, rather than after being spooled to disk.
+
+    :param request: HTTP request object
+    :return: The uploaded "file" part; closed once the request is done
+    """
+    limit = AVATAR_MAX_BYTES + AVATAR_FORM_OVERHEAD
+    length = request.headers.get("content-length", "")
+    if length.isdigit() and int(length) > limit:
+        raise _too_large(AVATAR_MAX_BYTES)
+    form = await _LimitedRequest(request, limit).form(max_files=1, max_fields=10)
+    try:
+        file = form.get("file")
+        if not isinstance(file, StarletteUploadFile):
+            raise HTTPException(status_code=422, detail="Field 'file' is required")
+        yield file
+    finally:
+        await form.close()
+
+def _open(data: bytes):
+    # Pillow is imported on first use; only the avatar upload path needs it.
+    from PIL import Image, UnidentifiedImageError
+
+    try:
+        image = Image.open(io.BytesIO(data))
+    except (UnidentifiedImageError, Image.DecompressionBombError) as e:
+        raise InvalidImage("not a readable image") from e
+    if image.format not in AVATAR_FORMATS:
+        raise InvalidImage(f"unsupported format {image.format}")
+    if image.width * image.height > AVATAR_MAX_PIXELS:
+        raise InvalidImage("image dimensions too large")
+    return image
+
+def check_image(data: bytes):
+    """
+    Cheap validation from the image header only; nothing is decoded.
+
+    :param data: Image bytes
+    :return: None
+    """
+    _open(data)
+
+def content_hash(data: bytes) -> str:
+    """
+    Name under which an upload's renditions are stored. Includes the
+    rendition settings, so changing them does not reuse old files.
+
+    :param data: Original image bytes
+    :return: Hex digest
+    """
+    digest = hashlib.sha256(data)
+    digest.update(f"|{AVATAR_SIZES}|{AVATAR_JPEG_QUALITY}".encode())
+    return digest.hexdigest()[:32]
+
+def render_avatars(data: bytes) -> dict[int, bytes]:
+    """
+    Decode, orient and square-crop an image into every AVATAR_SIZES
+    rendition. Re-encoding drops EXIF, GPS and other metadata.
+
+    :param data: Original image bytes
+    :return: Size to JPEG bytes
+    """
+    from PIL import Image, ImageOps
+
+    image = _open(data)
+    # draft() lets the JPEG decoder scale down by up to 8x while decoding.
+    image.draft("RGB", (max(AVATAR_SIZES), max(AVATAR_SIZES)))
+    try:
+        image = ImageOps.exif_transpose(image)
+        if image.mode in ("RGBA", "LA", "P"):
+            image = image.convert("RGBA")
+            background = Image.new("RGB", image.size, "white")
+            background.paste(image, mask=image.getchannel("A"))
+            image = background
+        else:
+            image = image.convert("RGB")
+    except (OSError, Image.DecompressionBombError) as e:
+        raise InvalidImage("image could not be decoded") from e
+    renditions = {}
+    for size in AVATAR_SIZES:
+        out = io.BytesIO()
+        ImageOps.fit(image, (size, size), Image.Resampling.LANCZOS).save(
+            out, "JPEG", quality=AVATAR_JPEG_QUALITY, optimize=True, progressive=True
+        )
+        renditions[size] = out.getvalue()
+    return renditions
+
+def store_avatar(storage, data: bytes) -> str:
+    """
+    Store every rendition of an avatar unless an identical upload already
+    was, and return the URL of the largest.
+
+    :param storage: CloudinaryStorage or LocalStorage
+    :param data: Original image bytes
+    :return: URL of the largest rendition
+    """
+    prefix = f"avatars/{content_hash(data)}"
+    largest = max(AVATAR_SIZES)
+    # The largest rendition is saved last, so its presence means the set is complete.
+    existing = storage.url(f"{prefix}/{largest}.jpg")
+    if existing:
+        return existing
+    urls = {size: storage.save(f"{prefix}/{size}.jpg", body, "image/jpeg")
+            for size, body in sorted(render_avatars(data).items())}
+    return urls[largest]
@@ -1,29 +1,376 @@
+import asyncio
+import hashlib
 import os
+import secrets
+import threading
+import time
+from collections import OrderedDict
+import orjson
 import redis
 import json
+from redis.backoff import NoBackoff
+from redis.retry import Retry
+from starlette.concurrency import run_in_threadpool
+from starlette.responses import Response
+from src.repository.database.db import use_primary
+from src.repository.database.models import User, UserRole
+from src.services.metrics import REDIS_DURATION, timer
 
 REDIS_HOST = os.getenv("REDIS_HOST", "localhost")
 REDIS_PORT = int(os.getenv("REDIS_PORT", 6379))
 REDIS_DB = int(os.getenv("REDIS_DB", 0))
 
+USER_L1_MAXSIZE = int(os.getenv("USER_L1_MAXSIZE", 1024))
+USER_L1_TTL = float(os.getenv("USER_L1_TTL", 60))
+USER_INVALIDATION_CHANNEL = "user-invalidate"
+
+# Rendered contact list and search responses, per user. See :func:`cached_response`.
+RESULT_CACHE_ENABLED = os.getenv("RESULT_CACHE_ENABLED", "true").lower() in ("1", "true", "yes")
+RESULT_CACHE_TTL = int(os.getenv("RESULT_CACHE_TTL", 300))
+# Larger responses are served but not stored.
+RESULT_CACHE_MAX_BYTES = int(os.getenv("RESULT_CACHE_MAX_BYTES", 256 * 1024))
+# How long a request waits for another one filling the same entry before querying itself.
+RESULT_CACHE_LOCK_WAIT = float(os.getenv("RESULT_CACHE_LOCK_WAIT", 2))
+RESULT_CACHE_LOCK_TTL = 10
+RESULT_CACHE_POLL_SECONDS = 0.05
+# Socket timeouts of the result cache client. It does not retry: a slow or
+# unreachable Redis costs at most this much before the query runs uncached.
+RESULT_CACHE_TIMEOUT = float(os.getenv("RESULT_CACHE_TIMEOUT", 0.25))
+# After a Redis error lookups are skipped for this long instead of failing every request.
+RESULT_CACHE_RETRY_SECONDS = 5
+
 r = redis.Redis(host=REDIS_HOST, port=REDIS_PORT, db=REDIS_DB, decode_responses=True)
+results_r = redis.Redis(
+    host=REDIS_HOST, port=REDIS_PORT, db=REDIS_DB, decode_responses=True,
+    socket_timeout=RESULT_CACHE_TIMEOUT, socket_connect_timeout=RESULT_CACHE_TIMEOUT, retry=Retry(NoBackoff(), 0),
+)
+
+class LocalCache:
+    """
+    Bounded, thread-safe in-process cache with per-entry TTL and LRU eviction.
+    """
+
+    def __init__(self, maxsize: int, ttl: float):
+        """
+        :param maxsize: Maximum number of entries kept
+        :param ttl: Seconds an entry stays valid
+        """
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self._data = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key):
+        """
+        Return the cached value or None if it is missing or expired.
+
+        :param key: Cache key
+        :return: Cached value or None
+        """
+        with self._lock:
+            item = self._data.get(key)
+            if item is None or item[0] < time.monotonic():
+                if item is not None:
+                    del self._data[key]
+                self.misses += 1
+                return None
+            self._data.move_to_end(key)
+            self.hits += 1
+            return item[1]
+
+    def set(self, key, value, ttl: float | None = None):
+        """
+        Store a value, evicting the least recently used entry when full.
+
+        :param key: Cache key
+        :param value: Value to store
+        :param ttl: Seconds this entry stays valid, defaults to the cache TTL
+        :return: None
+        """
+        with self._lock:
+            self._data[key] = (time.monotonic() + (self.ttl if ttl is None else ttl), value)
+            self._data.move_to_end(key)
+            while len(self._data) > self.maxsize:
+                self._data.popitem(last=False)
+                self.evictions += 1
+
+    def delete(self, key):
+        """
+        Drop a key if present.
+
+        :param key: Cache key
+        :return: None
+        """
+        with self._lock:
+            self._data.pop(key, None)
+
+    def clear(self):
+        """
+        Drop every entry; counters are kept.
+
+        :return: None
+        """
+        with self._lock:
+            self._data.clear()
+
+    def stats(self) -> dict:
+        """
+        Return hit/miss/eviction counters and the current size.
+
+        :return: Dictionary of counters
+        """
+        with self._lock:
+            return {"hits": self.hits, "misses": self.misses, "evictions": self.evictions, "size": len(self._data)}
+
+user_l1 = LocalCache(USER_L1_MAXSIZE, USER_L1_TTL)
+redis_stats = {"hits": 0, "misses": 0}
+result_stats = {"hits": 0, "misses": 0, "waits": 0, "too_large": 0, "errors": 0}
+_result_cache_down_until = 0.0
+_listener = None
+_listener_lock = threading.Lock()
+
+def serialize_user(user: User) -> dict:
+    """
+    Convert a User row into the JSON-safe dict stored in the cache.
+    The password hash is deliberately left out.
+
+    :param user: The user object.
+    :return: User data
+    """
+    return {
+        "id": user.id,
+        "username": user.username,
+        "email": user.email,
+        "is_active": user.is_active,
+        "avatar_url": user.avatar_url,
+        "confirmed": user.confirmed,
+        "role": user.role.value if user.role else None,
+    }
+
+def deserialize_user(user_data: dict) -> User:
+    """
+    Rebuild a detached User from cached data.
+
+    :param user_data: Data produced by :func:`serialize_user`.
+    :return: The user object.
+    """
+    data = dict(user_data)
+    if data.get("role"):
+        data["role"] = UserRole(data["role"])
+    return User(**data)
+
+def _on_invalidate(message):
+    user_l1.delete(message["data"])
+
+def start_invalidation_listener():
+    """
+    Subscribe (once per process) to the invalidation channel so other workers'
+    user changes evict the local entry.
+
+    :return: None
+    """
+    global _listener
+    with _listener_lock:
+        if _listener is not None and _listener.is_alive():
+            return
+        pubsub = r.pubsub(ignore_subscribe_messages=True)
+        pubsub.subscribe(**{USER_INVALIDATION_CHANNEL: _on_invalidate})
+        _listener = pubsub.run_in_thread(sleep_time=1.0, daemon=True)
+
+def get_local_user(email: str):
+    """
+    Retrieve user data from the in-process cache only.
+
+    :param email: The email of the user.
+    :return: User data if found, otherwise None.
+    """
+    return user_l1.get(email)
 
 def get_cached_user(email: str):
     """
-    Retrieve user data from Redis cache.
+    Retrieve user data from Redis cache and keep it in the in-process cache.
 
     :param email: The email of the user.
     :return: User data if found, otherwise None.
     """
-    data = r.get(f"user:{email}")
-    return json.loads(data) if data else None
+    start_invalidation_listener()
+    with timer(REDIS_DURATION, "get"):
+        data = r.get(f"user:{email}")
+    if not data:
+        redis_stats["misses"] += 1
+        return None
+    redis_stats["hits"] += 1
+    user_data = json.loads(data)
+    user_l1.set(email, user_data)
+    return user_data
 
 def set_cached_user(email: str, user_data: dict):
     """
-    Store user data in Redis cache.
+    Store user data in Redis cache and the in-process cache.
 
     :param email: The email of the user.
     :param user_data: The user data to cache.
     :return: None
     """
-    r.set(f"user:{email}", json.dumps(user_data), ex=3600)
+    with timer(REDIS_DURATION, "set"):
+        r.set(f"user:{email}", json.dumps(user_data), ex=3600)
+    user_l1.set(email, user_data)
+
+def invalidate_user(email: str):
+    """
+    Drop a user from Redis and from the in-process cache of every worker.
+
+    :param email: The email of the user.
+    :return: None
+    """
+    user_l1.delete(email)
+    with timer(REDIS_DURATION, "delete"):
+        r.delete(f"user:{email}")
+        r.publish(USER_INVALIDATION_CHANNEL, email)
+
+def _generation_key(user_id: int) -> str:
+    return f"contacts:gen:{user_id}"
+
+def result_key(user_id: int, kind: str, params: dict) -> str:
+    """
+    Cache key of one query of one user. The generation is not part of the
+    key; it is stored with the value, so a lookup is a single MGET.
+
+    :param user_id: ID of the user
+    :param kind: Query name, e.g. "list" or "search"
+    :param params: Normalized query parameters
+    :return: Redis key
+    """
+    digest = hashlib.blake2b(orjson.dumps(params, option=orjson.OPT_SORT_KEYS), digest_size=12).hexdigest()
+    return f"contacts:{user_id}:{kind}:{digest}"
+
+def get_result(user_id: int, key: str) -> tuple[int, dict | None]:
+    """
+    Look up a cached response together with the user's current generation.
+
+    A missing generation is started from the clock rather than from 0, so an
+    evicted counter never brings entries of an earlier generation back.
+
+    :param user_id: ID of the user
+    :param key: Key from :func:`result_key`
+    :return: Tuple of (generation, entry or None); the entry has "headers", "media_type" and "body"
+    """
+    with timer(REDIS_DURATION, "mget"):
+        generation, value = results_r.mget(_generation_key(user_id), key)
+    if generation is None:
+        results_r.set(_generation_key(user_id), time.time_ns(), nx=True)
+        return int(results_r.get(_generation_key(user_id))), None
+    if value is None:
+        return int(generation), None
+    stored_generation, meta, body = value.split("\n", 2)
+    if stored_generation != generation:
+        return int(generation), None
+    entry = orjson.loads(meta)
+    entry["body"] = body
+    return int(generation), entry
+
+def set_result(key: str, generation: int, response: Response) -> bool:
+    """
+    Store a rendered response under the generation it was computed for.
+
+    :param key: Key from :func:`result_key`
+    :param generation: Generation read before the response was computed
+    :param response: Response with a JSON body
+    :return: False when the body exceeds RESULT_CACHE_MAX_BYTES and was not stored
+    """
+    if len(response.body) > RESULT_CACHE_MAX_BYTES:
+        result_stats["too_large"] += 1
+        return False
+    headers = {k: v for k, v in response.headers.items() if k not in ("content-length", "content-type")}
+    meta = orjson.dumps({"headers": headers, "media_type": response.media_type})
+    with timer(REDIS_DURATION, "set"):
+        results_r.set(key, b"%d\n%b\n%b" % (generation, meta, response.body), ex=RESULT_CACHE_TTL)
+    return True
+
+def bump_generation(user_id: int):
+    """
+    Invalidate every cached result of a user in O(1). Call after the change
+    is committed, so a concurrent fill cannot store pre-commit rows under
+    the new generation.
+
+    :param user_id: ID of the user
+    :return: None
+    """
+    try:
+        with timer(REDIS_DURATION, "incr"):
+            results_r.incr(_generation_key(user_id))
+    except redis.RedisError:
+        # Entries of the old generation stay valid until RESULT_CACHE_TTL runs out.
+        result_stats["errors"] += 1
+
+def _acquire_fill(key: str, generation: int) -> bool:
+    return bool(results_r.set(f"{key}:fill:{generation}", 1, nx=True, ex=RESULT_CACHE_LOCK_TTL))
+
+def _release_fill(key: str, generation: int):
+    try:
+        results_r.delete(f"{key}:fill:{generation}")
+    except redis.RedisError:
+        pass  # the lock expires after RESULT_CACHE_LOCK_TTL
+
+async def cached_response(user_id: int, kind: str, params: dict, build, db=None) -> Response:
+    """
+    Serve a contacts query from the result cache, or build and cache it.
+
+    Only one request per key and generation queries the database when an
+    entry is missing; the others poll for its result for up to
+    RESULT_CACHE_LOCK_WAIT seconds before building it themselves. A response
+    that is going to be cached is built on the primary: rows read from a
+    lagging replica right after a write would otherwise be stored under the
+    new generation and served until RESULT_CACHE_TTL runs out. Without
+    Redis, ``build`` is simply called.
+
+    :param user_id: ID of the user
+    :param kind: Query name, e.g. "list" or "search"
+    :param params: Normalized query parameters
+    :param build: Async callable returning the Response; only 200 responses are cached
+    :param db: Session ``build`` reads through, switched to the primary before a fill
+    :return: Response
+    """
+    global _result_cache_down_until
+    if not RESULT_CACHE_ENABLED or time.monotonic() < _result_cache_down_until:
+        return await build()
+    key = result_key(user_id, kind, params)
+    owner = False
+    try:
+        generation, entry = await run_in_threadpool(get_result, user_id, key)
+        if entry is None:
+            owner = await run_in_threadpool(_acquire_fill, key, generation)
+            deadline = time.monotonic() + RESULT_CACHE_LOCK_WAIT
+            while not owner and time.monotonic() < deadline:
+                result_stats["waits"] += 1
+                await asyncio.sleep(RESULT_CACHE_POLL_SECONDS)
+                polled, entry = await run_in_threadpool(get_result, user_id, key)
+                # A bump while waiting means the pending fill is stale; build for the new generation.
+                if entry is not None or polled != generation:
+                    generation = polled
+                    break
+    except redis.RedisError:
+        result_stats["errors"] += 1
+        _result_cache_down_until = time.monotonic() + RESULT_CACHE_RETRY_SECONDS
+        return await build()
+
+    if entry is not None:
+        result_stats["hits"] += 1
+        return Response(entry["body"], headers=entry["headers"], media_type=entry["media_type"])
+    result_stats["misses"] += 1
+    if db is not None:
+        use_primary(db)
+    try:
+        response = await build()
+        if response.status_code == 200:
+            try:
+                await run_in_threadpool(set_result, key, generation, response)
+            except redis.RedisError:
+                result_stats["errors"] += 1
+    finally:
+        if owner:
+            await run_in_threadpool(_release_fill, key, generation)
+    return response
@@ -0,0 +1,79 @@
+import hashlib
+from datetime import datetime
+
+def contact_etag(contact_id: int, version: int) -> str:
+    """
+    Strong ETag of a single contact; the version changes with every write,
+    so it can be used with If-Match.
+
+    :param contact_id: ID of the contact
+    :param version: Contact version
+    :return: ETag header value
+    """
+    return f'"{contact_id}-{version}"'
+
+def list_etag(user_id: int, count: int, updated_at: datetime | None, *params) -> str:
+    """
+    Weak ETag of a contacts list response.
+
+    Any insert, update or delete changes either the count or the latest
+    ``updated_at``, so the tag can be computed before reading the page.
+
+    :param user_id: ID of the user
+    :param count: Number of contacts matching the filters
+    :param updated_at: Latest modification time among them
+    :param params: Query parameters that shape the response (filters, page, fields)
+    :return: ETag header value
+    """
+    stamp = updated_at.isoformat() if updated_at else ""
+    raw = "|".join(str(p) for p in (user_id, count, stamp, *params))
+    return f'W/"{hashlib.blake2b(raw.encode(), digest_size=12).hexdigest()}"'
+
+def parse_etags(header: str | None) -> list[str] | None:
+    """
+    Split an If-Match / If-None-Match header into entity tags.
+
+    :param header: Header value
+    :return: List of tags, weak ones keeping their ``W/`` prefix; ["*"] for a
+        wildcard, None when the header is absent
+    """
+    if header is None:
+        return None
+    return [part for part in (p.strip() for p in header.split(",")) if part]
+
+def none_match(header: str | None, etag: str) -> bool:
+    """
+    Whether an If-None-Match header matches ``etag`` (weak comparison), i.e.
+    the client's copy is current and a 304 may be sent.
+
+    :param header: If-None-Match header value
+    :param etag: Current ETag
+    :return: True if the client already has this representation
+    """
+    tags = parse_etags(header)
+    if not tags:
+        return False
+    return "*" in tags or etag.removeprefix("W/") in {tag.removeprefix("W/") for tag in tags}
+
+def match_versions(header: str | None, contact_id: int) -> set[int] | None:
+    """
+    Contact versions an If-Match header accepts.
+
+    Tags are compared strongly (RFC 9110 section 13.1.1): weak tags never
+    match, nor do tags naming another contact.
+
+    :param header: If-Match header value
+    :param contact_id: ID of the contact being modified
+    :return: Set of versions (empty if none apply), None when any version is acceptable
+    """
+    tags = parse_etags(header)
+    if tags is None or "*" in tags:
+        return None
+    versions = set()
+    for tag in tags:
+        if tag.startswith("W/"):
+            continue
+        prefix, _, version = tag.strip('"').rpartition("-")
+        if prefix == str(contact_id) and version.isdigit():
+            versions.add(int(version))
+    return versions
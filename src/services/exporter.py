@@ -0,0 +1,128 @@
+import csv
+import io
+import json
+from datetime import date
+from src.repository.contacts import EXPORT_FIELDS
+
+MEDIA_TYPES = {
+    "csv": "text/csv",
+    "ndjson": "application/x-ndjson",
+    "vcf": "text/vcard",
+}
+
+# Rows are grouped before yielding so the response is not written one tiny chunk at a time.
+ROWS_PER_CHUNK = 200
+
+def _json_default(value):
+    if isinstance(value, date):
+        return value.isoformat()
+    raise TypeError(f"{type(value).__name__} is not JSON serializable")
+
+def _vcard_escape(value) -> str:
+    return (str(value).replace("\\", "\\\\").replace(",", "\\,")
+            .replace(";", "\\;").replace("\r\n", "\\n").replace("\n", "\\n"))
+
+def format_csv_rows(rows) -> str:
+    """
+    Render rows as CSV lines without a header.
+
+    :param rows: Row mappings with EXPORT_FIELDS keys
+    :return: CSV text
+    """
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    for row in rows:
+        writer.writerow(["" if row[field] is None else row[field] for field in EXPORT_FIELDS])
+    return buffer.getvalue()
+
+def format_ndjson_rows(rows) -> str:
+    """
+    Render rows as NDJSON, one object per line.
+
+    :param rows: Row mappings with EXPORT_FIELDS keys
+    :return: NDJSON text
+    """
+    return "".join(json.dumps(dict(row), default=_json_default) + "\n" for row in rows)
+
+def format_vcard_rows(rows) -> str:
+    """
+    Render rows as vCard 3.0 entries.
+
+    :param rows: Row mappings with EXPORT_FIELDS keys
+    :return: vCard text
+    """
+    cards = []
+    for row in rows:
+        first, last = row["first_name"] or "", row["last_name"] or ""
+        lines = [
+            "BEGIN:VCARD",
+            "VERSION:3.0",
+            f"N:{_vcard_escape(last)};{_vcard_escape(first)};;;",
+            f"FN:{_vcard_escape(f'{first} {last}'.strip())}",
+        ]
+        if row["email"]:
+            lines.append(f"EMAIL;TYPE=INTERNET:{_vcard_escape(row['email'])}")
+        if row["phone"]:
+            lines.append(f"TEL:{_vcard_escape(row['phone'])}")
+        if row["birthday"]:
+            lines.append(f"BDAY:{row['birthday'].isoformat()}")
+        if row["additional_info"]:
+            lines.append(f"NOTE:{_vcard_escape(row['additional_info'])}")
+        lines.append("END:VCARD")
+        cards.append("\r\n".join(lines) + "\r\n")
+    return "".join(cards)
+
+FORMATTERS = {
+    "csv": format_csv_rows,
+    "ndjson": format_ndjson_rows,
+    "vcf": format_vcard_rows,
+}
+
+def _header(format: str) -> str:
+    if format == "csv":
+        buffer = io.StringIO()
+        csv.writer(buffer).writerow(EXPORT_FIELDS)
+        return buffer.getvalue()
+    return ""
+
+def export_chunks(rows, format: str):
+    """
+    Turn a row iterator into encoded chunks of the requested format.
+
+    :param rows: Iterable of row mappings
+    :param format: "csv", "ndjson" or "vcf"
+    :return: Generator of str chunks
+    """
+    formatter = FORMATTERS[format]
+    header = _header(format)
+    if header:
+        yield header
+    chunk = []
+    for row in rows:
+        chunk.append(row)
+        if len(chunk) >= ROWS_PER_CHUNK:
+            yield formatter(chunk)
+            chunk = []
+    if chunk:
+        yield formatter(chunk)
+
+async def export_chunks_async(rows, format: str):
+    """
+    Async version of :func:`export_chunks` for an async row iterator.
+
+    :param rows: Async iterable of row mappings
+    :param format: "csv", "ndjson" or "vcf"
+    :return: Async generator of str chunks
+    """
+    formatter = FORMATTERS[format]
+    header = _header(format)
+    if header:
+        yield header
+    chunk = []
+    async for row in rows:
+        chunk.append(row)
+        if len(chunk) >= ROWS_PER_CHUNK:
+            yield formatter(chunk)
+            chunk = []
+    if chunk:
+        yield formatter(chunk)
@@ -0,0 +1,184 @@
+import csv
+import json
+import os
+from pydantic import ValidationError
+from src.repository import contacts
+from src.schemas import ContactCreate
+
+IMPORT_BATCH_SIZE = 500
+MAX_REPORTED_ERRORS = 1000
+# Longest CSV record (a quoted field may span lines) or NDJSON line accepted.
+IMPORT_MAX_RECORD_BYTES = int(os.getenv("IMPORT_MAX_RECORD_BYTES", 64 * 1024))
+IMPORT_MAX_LINE_BYTES = IMPORT_MAX_RECORD_BYTES
+
+class _NeedMoreLines(Exception):
+    """
+    Raised into ``csv.reader`` when the buffered lines end inside a record.
+    """
+
+def _buffered(lines: list[str]):
+    yield from lines
+    raise _NeedMoreLines
+
+async def iter_lines(chunks, max_line_bytes: int = IMPORT_MAX_LINE_BYTES):
+    """
+    Split an async stream of byte chunks into decoded lines, keeping line endings.
+
+    A line longer than ``max_line_bytes`` is discarded up to the next newline
+    and yielded as None, so a body without newlines cannot fill memory.
+
+    :param chunks: Async iterable of bytes, e.g. ``request.stream()``
+    :param max_line_bytes: Longest line kept
+    :return: Async generator of str lines, or None for each overlong line
+    """
+    buffer = b""
+    first = True
+    skipping = False
+    async for chunk in chunks:
+        if first and chunk:
+            chunk = chunk.removeprefix(b"\xef\xbb\xbf")
+            first = False
+        buffer += chunk
+        *lines, buffer = buffer.split(b"\n")
+        for line in lines:
+            if skipping:
+                skipping = False
+                continue
+            yield line.decode("utf-8") + "\n" if len(line) < max_line_bytes else None
+        if len(buffer) >= max_line_bytes:
+            if not skipping:
+                yield None
+            buffer, skipping = b"", True
+    if buffer and not skipping:
+        yield buffer.decode("utf-8")
+
+async def iter_csv_records(chunks, max_record_bytes: int = IMPORT_MAX_RECORD_BYTES):
+    """
+    Parse a streamed CSV body with a header row into dicts.
+
+    Lines are handed to ``csv.reader``, so quoted fields spanning several
+    lines are parsed the way the csv module does it and a stray quote inside
+    an unquoted field stays a literal character. A record still open after
+    ``max_record_bytes`` (e.g. an unterminated quoted field) is reported as
+    malformed and parsing resumes on the line after its first one.
+
+    :param chunks: Async iterable of bytes
+    :param max_record_bytes: Largest record, line endings included
+    :return: Async generator of (row_number, record) tuples; record is None when the row cannot be parsed
+    """
+    header = None
+    row_number = 0
+    pending, pending_size = [], 0
+    replay = []
+    lines = iter_lines(chunks, max_record_bytes)
+    while True:
+        if replay:
+            line = replay.pop()
+        else:
+            try:
+                line = await anext(lines)
+            except StopAsyncIteration:
+                if not pending:
+                    break
+                line = ""
+        if line is None:
+            values = None
+        else:
+            pending.append(line)
+            pending_size += len(line)
+            try:
+                values = next(csv.reader(_buffered(pending), strict=True), [])
+            except _NeedMoreLines:
+                if line and pending_size <= max_record_bytes:
+                    continue
+                # Give up on the record's first line and parse the rest again.
+                values = None
+                replay.extend(reversed([l for l in pending[1:] if l]))
+            except csv.Error:
+                values = None
+        pending, pending_size = [], 0
+        if values == []:
+            continue
+        if header is None:
+            if values is None:
+                raise ValueError("Malformed CSV header")
+            header = [name.strip() for name in values]
+            continue
+        row_number += 1
+        if values is None or len(values) != len(header):
+            yield row_number, None
+            continue
+        yield row_number, {key: (value if value != "" else None) for key, value in zip(header, values)}
+
+async def iter_ndjson_records(chunks):
+    """
+    Parse a streamed NDJSON body, one JSON object per line.
+
+    :param chunks: Async iterable of bytes
+    :return: Async generator of (row_number, record) tuples; record is None when the line is not an object
+    """
+    row_number = 0
+    async for line in iter_lines(chunks):
+        if line is not None and not line.strip():
+            continue
+        row_number += 1
+        try:
+            record = json.loads(line) if line is not None else None
+        except ValueError:
+            record = None
+        yield row_number, record if isinstance(record, dict) else None
+
+def _format_validation_error(error: ValidationError) -> str:
+    return "; ".join(f"{'.'.join(map(str, e['loc']))}: {e['msg']}" for e in error.errors())
+
+async def import_contacts(db, user_id: int, records, batch_size: int = IMPORT_BATCH_SIZE) -> dict:
+    """
+    Validate streamed records with ContactCreate and insert them in batches.
+
+    Only one batch is held in memory at a time and each batch is committed on
+    its own, so memory stays flat regardless of the upload size. The error list
+    is capped at MAX_REPORTED_ERRORS entries.
+
+    :param db: AsyncSession (or Session when DB_ASYNC is off)
+    :param user_id: ID of the user owning the contacts
+    :param records: Async iterable of (row_number, record) tuples
+    :param batch_size: Number of rows per INSERT statement
+    :return: Report with inserted/failed counts and per-row errors
+    """
+    report = {"inserted": 0, "failed": 0, "errors": [], "errors_truncated": False}
+
+    def fail(row_number, message):
+        report["failed"] += 1
+        if len(report["errors"]) < MAX_REPORTED_ERRORS:
+            report["errors"].append({"row": row_number, "error": message})
+        else:
+            report["errors_truncated"] = True
+
+    async def flush(batch):
+        inserted = await contacts.bulk_insert_contacts_async(db, user_id, [contact for _, contact in batch])
+        report["inserted"] += len(inserted)
+        for row_number, contact in batch:
+            if contact.email not in inserted:
+                fail(row_number, "A contact with this email already exists")
+
+    batch, seen = [], set()
+    async for row_number, record in records:
+        if record is None:
+            fail(row_number, "Malformed row")
+            continue
+        try:
+            contact = ContactCreate.model_validate(record)
+        except ValidationError as e:
+            fail(row_number, _format_validation_error(e))
+            continue
+        if contact.email in seen:
+            fail(row_number, "Duplicate email in upload batch")
+            continue
+        seen.add(contact.email)
+        batch.append((row_number, contact))
+        if len(batch) >= batch_size:
+            await flush(batch)
+            batch, seen = [], set()
+    if batch:
+        await flush(batch)
+    return report
@@ -0,0 +1,501 @@
+import asyncio
+import inspect
+import json
+import logging
+import os
+import random
+import socket
+import threading
+import time
+import uuid
+from collections import deque
+from contextvars import ContextVar
+import redis
+
+JOB_QUEUE_NAME = os.getenv("JOB_QUEUE_NAME", "jobs")
+JOB_MAX_ATTEMPTS = int(os.getenv("JOB_MAX_ATTEMPTS", 5))
+JOB_BACKOFF_SECONDS = float(os.getenv("JOB_BACKOFF_SECONDS", 2))
+JOB_BACKOFF_MAX_SECONDS = float(os.getenv("JOB_BACKOFF_MAX_SECONDS", 300))
+JOB_CONCURRENCY = int(os.getenv("JOB_CONCURRENCY", 4))
+# How long an idempotency key suppresses duplicate enqueues and re-runs.
+JOB_IDEMPOTENCY_TTL = int(os.getenv("JOB_IDEMPOTENCY_TTL", 86400))
+JOB_BLOB_TTL = int(os.getenv("JOB_BLOB_TTL", 3600))
+# A worker renews its lease every third of this; longer than any stall of a live worker.
+JOB_LEASE_SECONDS = float(os.getenv("JOB_LEASE_SECONDS", 30))
+# Unique per process so workers sharing a host never share a processing list;
+# jobs of a worker that dies are requeued by the others once its lease expires.
+JOB_WORKER_ID = os.getenv("JOB_WORKER_ID") or f"{socket.gethostname()}:{os.getpid()}:{uuid.uuid4().hex[:8]}"
+
+logger = logging.getLogger(__name__)
+
+TASKS = {}
+_current_queue: ContextVar = ContextVar("current_job_queue")
+
+def task(name: str):
+    """
+    Register a function (sync or async) as a job handler.
+
+    :param name: Task name used when enqueueing
+    :return: Decorator returning the function unchanged
+    """
+    def decorator(fn):
+        TASKS[name] = fn
+        return fn
+    return decorator
+
+def current_queue():
+    """
+    The queue the running job was taken from, for handlers that read blobs.
+
+    :return: RedisQueue or InMemoryQueue
+    """
+    return _current_queue.get()
+
+class RedisQueue:
+    """
+    Reliable job queue on Redis lists.
+
+    Ready jobs sit in a list and are moved atomically into a per-worker
+    processing list when reserved, so a job survives a worker crash. Every
+    worker holds a lease key with a TTL; the processing lists of workers whose
+    lease expired are moved back to the ready list by the live ones. Retries
+    wait in a sorted set scored by the time they become due.
+    """
+
+    def __init__(self, client: redis.Redis, name: str = JOB_QUEUE_NAME):
+        """
+        :param client: Redis client; binary-safe (decode_responses off)
+        :param name: Prefix for every key the queue uses
+        """
+        self.client = client
+        self.name = name
+        self.ready_key = f"{name}:ready"
+        self.delayed_key = f"{name}:delayed"
+        self.dead_key = f"{name}:dead"
+        self.workers_key = f"{name}:workers"
+
+    def _processing_key(self, worker_id: str) -> str:
+        return f"{self.name}:processing:{worker_id}"
+
+    def _lease_key(self, worker_id: str) -> str:
+        return f"{self.name}:lease:{worker_id}"
+
+    def push(self, raw: bytes):
+        """
+        Add a job to the ready list.
+
+        :param raw: Encoded job
+        :return: None
+        """
+        self.client.lpush(self.ready_key, raw)
+
+    def push_delayed(self, raw: bytes, run_at: float):
+        """
+        Park a job until ``run_at``.
+
+        :param raw: Encoded job
+        :param run_at: Unix time the job becomes due
+        :return: None
+        """
+        self.client.zadd(self.delayed_key, {raw: run_at})
+
+    def push_dead(self, raw: bytes):
+        """
+        Move a job that ran out of attempts to the dead-letter list.
+
+        :param raw: Encoded job
+        :return: None
+        """
+        self.client.lpush(self.dead_key, raw)
+
+    def promote_due(self, now: float):
+        """
+        Move delayed jobs that are due onto the ready list.
+
+        :param now: Current Unix time
+        :return: None
+        """
+        # ZREM succeeds for exactly one worker, so a due job is promoted once.
+        for raw in self.client.zrangebyscore(self.delayed_key, "-inf", now, start=0, num=100):
+            if self.client.zrem(self.delayed_key, raw):
+                self.client.lpush(self.ready_key, raw)
+
+    def reserve(self, worker_id: str, timeout: float) -> bytes | None:
+        """
+        Take the next ready job into this worker's processing list.
+
+        :param worker_id: Worker identity
+        :param timeout: Seconds to wait for a job, 0 to return at once
+        :return: Encoded job or None
+        """
+        self.promote_due(time.time())
+        if not timeout:
+            # BLMOVE treats 0 as "block forever".
+            return self.client.lmove(self.ready_key, self._processing_key(worker_id), "RIGHT", "LEFT")
+        return self.client.blmove(self.ready_key, self._processing_key(worker_id), timeout, "RIGHT", "LEFT")
+
+    def ack(self, worker_id: str, raw: bytes):
+        """
+        Drop a finished job from the processing list.
+
+        :param worker_id: Worker identity
+        :param raw: Encoded job as returned by :meth:`reserve`
+        :return: None
+        """
+        self.client.lrem(self._processing_key(worker_id), 1, raw)
+
+    def recover(self, worker_id: str) -> int:
+        """
+        Requeue every job in a worker's processing list.
+
+        :param worker_id: Worker identity
+        :return: Number of jobs requeued
+        """
+        moved = 0
+        while self.client.lmove(self._processing_key(worker_id), self.ready_key, "RIGHT", "LEFT") is not None:
+            moved += 1
+        return moved
+
+    def heartbeat(self, worker_id: str, ttl: float):
+        """
+        Take or renew a worker's lease and register it, before it reserves any job.
+
+        :param worker_id: Worker identity
+        :param ttl: Seconds the lease lasts unless renewed
+        :return: None
+        """
+        self.client.set(self._lease_key(worker_id), 1, px=max(1, int(ttl * 1000)))
+        self.client.sadd(self.workers_key, worker_id)
+
+    def recover_expired(self) -> int:
+        """
+        Requeue the jobs of every registered worker whose lease has expired.
+
+        LMOVE moves each job once, so workers running this at the same time
+        never requeue a job twice.
+
+        :return: Number of jobs requeued
+        """
+        moved = 0
+        for raw_id in self.client.smembers(self.workers_key):
+            worker_id = raw_id.decode() if isinstance(raw_id, bytes) else raw_id
+            if self.client.exists(self._lease_key(worker_id)):
+                continue
+            moved += self.recover(worker_id)
+            self.client.srem(self.workers_key, worker_id)
+        return moved
+
+    def retire(self, worker_id: str):
+        """
+        Requeue anything left in a stopping worker's list and drop its lease.
+
+        :param worker_id: Worker identity
+        :return: None
+        """
+        self.recover(worker_id)
+        self.client.srem(self.workers_key, worker_id)
+        self.client.delete(self._lease_key(worker_id))
+
+    def claim_key(self, key: str, ttl: int) -> bool:
+        """
+        Reserve an idempotency key.
+
+        :param key: Idempotency key
+        :param ttl: Seconds the key is held
+        :return: False if the key is already taken
+        """
+        return bool(self.client.set(f"{self.name}:key:{key}", 1, nx=True, ex=ttl))
+
+    def release_key(self, key: str):
+        """
+        Free an idempotency key.
+
+        :param key: Idempotency key
+        :return: None
+        """
+        self.client.delete(f"{self.name}:key:{key}")
+
+    def mark_done(self, key: str, ttl: int):
+        """
+        Record that the job with this key completed.
+
+        :param key: Idempotency key
+        :param ttl: Seconds the record is kept
+        :return: None
+        """
+        self.client.set(f"{self.name}:done:{key}", 1, ex=ttl)
+
+    def is_done(self, key: str) -> bool:
+        """
+        :param key: Idempotency key
+        :return: True if a job with this key already completed
+        """
+        return bool(self.client.exists(f"{self.name}:done:{key}"))
+
+    def put_blob(self, key: str, data: bytes, ttl: int):
+        """
+        Store a payload too large to put in the job itself.
+
+        :param key: Blob key
+        :param data: Bytes to store
+        :param ttl: Seconds the blob is kept
+        :return: None
+        """
+        self.client.set(f"{self.name}:blob:{key}", data, ex=ttl)
+
+    def get_blob(self, key: str) -> bytes | None:
+        """
+        :param key: Blob key
+        :return: Stored bytes or None
+        """
+        return self.client.get(f"{self.name}:blob:{key}")
+
+    def delete_blob(self, key: str):
+        """
+        :param key: Blob key
+        :return: None
+        """
+        self.client.delete(f"{self.name}:blob:{key}")
+
+class InMemoryQueue:
+    """
+    Process-local stand-in for :class:`RedisQueue` with the same methods, for
+    tests and single-process runs. Key and blob TTLs are not enforced.
+    """
+
+    def __init__(self):
+        self.ready = deque()
+        self.delayed = {}
+        self.dead = []
+        self.processing = {}
+        self.leases = {}
+        self.keys = set()
+        self.done = set()
+        self.blobs = {}
+        self._cond = threading.Condition()
+
+    def push(self, raw: bytes):
+        with self._cond:
+            self.ready.appendleft(raw)
+            self._cond.notify()
+
+    def push_delayed(self, raw: bytes, run_at: float):
+        with self._cond:
+            self.delayed[raw] = run_at
+
+    def push_dead(self, raw: bytes):
+        with self._cond:
+            self.dead.append(raw)
+
+    def promote_due(self, now: float):
+        with self._cond:
+            for raw, run_at in list(self.delayed.items()):
+                if run_at <= now:
+                    del self.delayed[raw]
+                    self.ready.appendleft(raw)
+
+    def reserve(self, worker_id: str, timeout: float) -> bytes | None:
+        self.promote_due(time.time())
+        with self._cond:
+            if not self.ready and timeout:
+                self._cond.wait(timeout)
+            if not self.ready:
+                return None
+            raw = self.ready.pop()
+            self.processing.setdefault(worker_id, []).append(raw)
+            return raw
+
+    def ack(self, worker_id: str, raw: bytes):
+        with self._cond:
+            self.processing.get(worker_id, []).remove(raw)
+
+    def recover(self, worker_id: str) -> int:
+        with self._cond:
+            jobs = self.processing.pop(worker_id, [])
+            self.ready.extendleft(jobs)
+            return len(jobs)
+
+    def heartbeat(self, worker_id: str, ttl: float):
+        with self._cond:
+            self.leases[worker_id] = time.monotonic() + ttl
+
+    def recover_expired(self) -> int:
+        now = time.monotonic()
+        with self._cond:
+            expired = [worker_id for worker_id, until in self.leases.items() if until <= now]
+            for worker_id in expired:
+                del self.leases[worker_id]
+        return sum(self.recover(worker_id) for worker_id in expired)
+
+    def retire(self, worker_id: str):
+        self.recover(worker_id)
+        with self._cond:
+            self.leases.pop(worker_id, None)
+
+    def claim_key(self, key: str, ttl: int) -> bool:
+        with self._cond:
+            if key in self.keys:
+                return False
+            self.keys.add(key)
+            return True
+
+    def release_key(self, key: str):
+        with self._cond:
+            self.keys.discard(key)
+
+    def mark_done(self, key: str, ttl: int):
+        with self._cond:
+            self.done.add(key)
+
+    def is_done(self, key: str) -> bool:
+        return key in self.done
+
+    def put_blob(self, key: str, data: bytes, ttl: int):
+        self.blobs[key] = data
+
+    def get_blob(self, key: str) -> bytes | None:
+        return self.blobs.get(key)
+
+    def delete_blob(self, key: str):
+        self.blobs.pop(key, None)
+
+def enqueue(queue, task_name: str, *args, idempotency_key: str | None = None,
+            max_attempts: int = JOB_MAX_ATTEMPTS, **kwargs) -> str | None:
+    """
+    Put a job on the queue.
+
+    :param queue: RedisQueue or InMemoryQueue
+    :param task_name: Name a handler was registered under with :func:`task`
+    :param idempotency_key: Jobs sharing a key are enqueued and run at most once per JOB_IDEMPOTENCY_TTL
+    :param max_attempts: Runs before the job is moved to the dead-letter list
+    :return: Job id, or None if a job with the same idempotency key already exists
+    """
+    if idempotency_key is not None and not queue.claim_key(idempotency_key, JOB_IDEMPOTENCY_TTL):
+        return None
+    job_id = uuid.uuid4().hex
+    job = {
+        "id": job_id, "task": task_name, "args": list(args), "kwargs": kwargs,
+        "key": idempotency_key, "attempts": 0, "max_attempts": max_attempts,
+    }
+    queue.push(json.dumps(job).encode())
+    return job_id
+
+def backoff_delay(attempts: int, base: float = JOB_BACKOFF_SECONDS, cap: float = JOB_BACKOFF_MAX_SECONDS) -> float:
+    """
+    Exponential backoff with full jitter.
+
+    :param attempts: Failed runs so far
+    :param base: Delay after the first failure
+    :param cap: Upper bound
+    :return: Seconds to wait before the next run
+    """
+    return random.uniform(0, min(cap, base * 2 ** (attempts - 1)))
+
+class Worker:
+    """
+    Pulls jobs off a queue and runs them, ``concurrency`` at a time.
+    """
+
+    def __init__(self, queue, concurrency: int = JOB_CONCURRENCY, worker_id: str = JOB_WORKER_ID,
+                 backoff: float = JOB_BACKOFF_SECONDS, lease: float = JOB_LEASE_SECONDS):
+        """
+        :param queue: RedisQueue or InMemoryQueue
+        :param concurrency: Jobs run at the same time
+        :param worker_id: Identifies this worker's processing list and lease
+        :param backoff: Base retry delay in seconds
+        :param lease: Seconds the worker's lease lasts without a heartbeat
+        """
+        self.queue = queue
+        self.concurrency = concurrency
+        self.worker_id = worker_id
+        self.backoff = backoff
+        self.lease = lease
+
+    async def run_job(self, raw: bytes):
+        """
+        Run one reserved job; failures are rescheduled or dead-lettered.
+
+        :param raw: Job as stored on the queue
+        :return: None
+        """
+        job = json.loads(raw)
+        key = job.get("key")
+        _current_queue.set(self.queue)
+        try:
+            if key and await asyncio.to_thread(self.queue.is_done, key):
+                return
+            handler = TASKS[job["task"]]
+            if inspect.iscoroutinefunction(handler):
+                await handler(*job["args"], **job["kwargs"])
+            else:
+                await asyncio.to_thread(handler, *job["args"], **job["kwargs"])
+            if key:
+                await asyncio.to_thread(self.queue.mark_done, key, JOB_IDEMPOTENCY_TTL)
+        except Exception:
+            job["attempts"] += 1
+            if job["attempts"] >= job["max_attempts"]:
+                logger.exception("job %s (%s) failed for good after %d attempts", job["id"], job["task"], job["attempts"])
+                await asyncio.to_thread(self.queue.push_dead, json.dumps(job).encode())
+            else:
+                delay = backoff_delay(job["attempts"], self.backoff)
+                logger.warning("job %s (%s) failed, retry in %.1fs", job["id"], job["task"], delay, exc_info=True)
+                await asyncio.to_thread(self.queue.push_delayed, json.dumps(job).encode(), time.time() + delay)
+        finally:
+            await asyncio.to_thread(self.queue.ack, self.worker_id, raw)
+
+    async def _loop(self, stop: asyncio.Event, burst: bool):
+        while not stop.is_set():
+            raw = await asyncio.to_thread(self.queue.reserve, self.worker_id, 0 if burst else 1.0)
+            if raw is None:
+                if burst:
+                    return
+                continue
+            await self.run_job(raw)
+
+    async def _heartbeat(self):
+        while True:
+            await asyncio.sleep(self.lease / 3)
+            try:
+                await asyncio.to_thread(self.queue.heartbeat, self.worker_id, self.lease)
+                recovered = await asyncio.to_thread(self.queue.recover_expired)
+            except redis.RedisError:
+                logger.warning("job lease renewal failed", exc_info=True)
+                continue
+            if recovered:
+                logger.info("requeued %d jobs of workers whose lease expired", recovered)
+
+    async def run(self, stop: asyncio.Event | None = None, burst: bool = False):
+        """
+        Process jobs until ``stop`` is set, or until the queue is empty in burst mode.
+
+        :param stop: Event that ends the loop after the running jobs finish
+        :param burst: Return once no job is ready instead of waiting for more
+        :return: None
+        """
+        stop = stop or asyncio.Event()
+        await asyncio.to_thread(self.queue.heartbeat, self.worker_id, self.lease)
+        # A fixed JOB_WORKER_ID gets its own list back at once, without waiting for the lease.
+        recovered = await asyncio.to_thread(self.queue.recover, self.worker_id)
+        recovered += await asyncio.to_thread(self.queue.recover_expired)
+        if recovered:
+            logger.info("requeued %d jobs left by stopped workers", recovered)
+        heartbeat = asyncio.create_task(self._heartbeat())
+        try:
+            await asyncio.gather(*(self._loop(stop, burst) for _ in range(self.concurrency)))
+        finally:
+            heartbeat.cancel()
+            await asyncio.to_thread(self.queue.retire, self.worker_id)
+
+job_queue = RedisQueue(redis.Redis(
+    host=os.getenv("REDIS_HOST", "localhost"),
+    port=int(os.getenv("REDIS_PORT", 6379)),
+    db=int(os.getenv("REDIS_DB", 0)),
+))
+
+def get_job_queue():
+    """
+    Dependency returning the job queue; tests override it with an :class:`InMemoryQueue`.
+
+    :return: The queue
+    """
+    return job_queue
@@ -0,0 +1,77 @@
+import os
+from redis.backoff import NoBackoff
+from redis.retry import Retry
+from slowapi import Limiter
+from slowapi.util import get_remote_address
+from starlette.requests import Request
+from src.services.auth import decode_token
+
+REDIS_HOST = os.getenv("REDIS_HOST", "localhost")
+REDIS_PORT = int(os.getenv("REDIS_PORT", 6379))
+REDIS_DB = int(os.getenv("REDIS_DB", 0))
+
+RATE_LIMIT_ENABLED = os.getenv("RATE_LIMIT_ENABLED", "true").lower() in ("1", "true", "yes")
+RATE_LIMIT_STORAGE_URI = os.getenv("RATE_LIMIT_STORAGE_URI", f"redis://{REDIS_HOST}:{REDIS_PORT}/{REDIS_DB}")
+# Both Redis-backed sliding strategies in `limits` run as a single Lua script per hit.
+RATE_LIMIT_STRATEGY = os.getenv("RATE_LIMIT_STRATEGY", "sliding-window-counter")
+# slowapi calls the storage synchronously on the event loop, so a slow Redis
+# stalls every request; fail fast and let the in-memory fallback take over.
+RATE_LIMIT_REDIS_TIMEOUT = float(os.getenv("RATE_LIMIT_REDIS_TIMEOUT", 0.1))
+
+RATE_LIMIT_PER_IP = os.getenv("RATE_LIMIT_PER_IP", "600/minute")
+RATE_LIMIT_LOGIN = os.getenv("RATE_LIMIT_LOGIN", "10/minute")
+RATE_LIMIT_SIGNUP = os.getenv("RATE_LIMIT_SIGNUP", "5/minute")
+RATE_LIMIT_REFRESH = os.getenv("RATE_LIMIT_REFRESH", "30/minute")
+RATE_LIMIT_ME = os.getenv("RATE_LIMIT_ME", "5/minute")
+RATE_LIMIT_CONTACTS = os.getenv("RATE_LIMIT_CONTACTS", "120/minute")
+
+def user_key(request: Request) -> str:
+    """
+    Rate-limit key for authenticated routes: the JWT subject, or the client IP
+    when the request carries no valid bearer token.
+
+    :param request: Incoming request
+    :return: Storage key
+    """
+    scheme, _, token = request.headers.get("authorization", "").partition(" ")
+    if scheme.lower() == "bearer" and token:
+        payload = decode_token(token)
+        if payload and "sub" in payload:
+            return f"user:{payload['sub']}"
+    return f"ip:{get_remote_address(request)}"
+
+def storage_options(uri: str = RATE_LIMIT_STORAGE_URI, timeout: float = RATE_LIMIT_REDIS_TIMEOUT) -> dict:
+    """
+    Redis client options for the limiter storage: short timeouts and no
+    retries, since every hit blocks the event loop until Redis answers.
+
+    :param uri: Storage URI
+    :param timeout: Connect and read timeout in seconds
+    :return: Keyword arguments for the storage; empty for non-Redis storages
+    """
+    if not uri.startswith(("redis://", "rediss://", "redis+unix://")):
+        return {}
+    return {"socket_connect_timeout": timeout, "socket_timeout": timeout, "retry": Retry(NoBackoff(), 0)}
+
+# One limiter for the whole app. Limits live in the shared storage, so all
+# workers count against the same window. If Redis is unreachable each worker
+# falls back to in-memory counting instead of failing requests.
+limiter = Limiter(
+    key_func=get_remote_address,
+    default_limits=[RATE_LIMIT_PER_IP],
+    storage_uri=RATE_LIMIT_STORAGE_URI,
+    storage_options=storage_options(),
+    strategy=RATE_LIMIT_STRATEGY,
+    key_style="endpoint",
+    in_memory_fallback_enabled=True,
+    enabled=RATE_LIMIT_ENABLED,
+)
+
+def limit_per_user(limit_value: str):
+    """
+    Decorator applying ``limit_value`` per JWT subject on top of the per-IP default.
+
+    :param limit_value: Limit string, e.g. "120/minute"
+    :return: Route decorator
+    """
+    return limiter.limit(limit_value, key_func=user_key, override_defaults=False)
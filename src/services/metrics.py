@@ -0,0 +1,213 @@
+import os
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+from prometheus_client import (
+    CONTENT_TYPE_LATEST, REGISTRY, CollectorRegistry, Counter, Gauge, Histogram, generate_latest,
+)
+from prometheus_client.core import CounterMetricFamily, GaugeMetricFamily
+from sqlalchemy import event
+from starlette.requests import Request
+from starlette.responses import Response
+
+METRICS_ENABLED = os.getenv("METRICS_ENABLED", "true").lower() in ("1", "true", "yes")
+
+REQUEST_DURATION = Histogram(
+    "http_request_duration_seconds", "HTTP request latency by route template.", ["method", "route", "status"]
+)
+REQUESTS_IN_FLIGHT = Gauge("http_requests_in_flight", "HTTP requests currently being served.")
+DB_QUERY_DURATION = Histogram("db_query_duration_seconds", "Duration of single SQL statements.")
+DB_QUERIES_PER_REQUEST = Histogram(
+    "db_queries_per_request", "SQL statements executed per HTTP request.", buckets=(0, 1, 2, 3, 5, 8, 13, 21, 50, 100)
+)
+DB_TIME_PER_REQUEST = Histogram("db_time_per_request_seconds", "Total SQL time per HTTP request.")
+DB_POOL_CHECKOUT_WAIT = Histogram(
+    "db_pool_checkout_wait_seconds", "Time spent waiting for a pooled connection.",
+    buckets=(0.0005, 0.001, 0.005, 0.01, 0.05, 0.1, 0.5, 1, 5, 30),
+)
+REDIS_DURATION = Histogram("redis_command_duration_seconds", "Redis round-trips made by the cache.", ["command"])
+HASH_DURATION = Histogram(
+    "password_hash_duration_seconds", "bcrypt work including executor queueing.", ["operation"],
+    buckets=(0.01, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10),
+)
+EXTERNAL_DURATION = Histogram("external_call_duration_seconds", "Calls to external services.", ["service"])
+EXTERNAL_ERRORS = Counter("external_call_errors_total", "Failed calls to external services.", ["service"])
+
+_request_stats: ContextVar[dict | None] = ContextVar("request_db_stats", default=None)
+_engines = []
+_stats_collector = None
+
+@contextmanager
+def timer(histogram, *labels):
+    """
+    Time a block into ``histogram``; does nothing when metrics are disabled.
+
+    :param histogram: Histogram to observe
+    :param labels: Label values, if the histogram has labels
+    :return: Context manager
+    """
+    if not METRICS_ENABLED:
+        yield
+        return
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        target = histogram.labels(*labels) if labels else histogram
+        target.observe(time.perf_counter() - start)
+
+class _StatsCollector:
+    """
+    Exposes counters that other modules already keep (pool usage, L1 user
+    cache, Redis caches, hashing executor) at scrape time instead of on every event.
+    """
+
+    def collect(self):
+        from src.repository.database.db import pool_status
+        from src.services import cache, security
+
+        pool_gauges = {
+            name: GaugeMetricFamily(f"db_pool_{name}", f"Connection pool {name}.", labels=["engine"])
+            for name in ("size", "checked_out", "overflow", "saturation")
+        }
+        for engine in _engines:
+            status = pool_status(engine)
+            for name, family in pool_gauges.items():
+                if name in status:
+                    family.add_metric([engine.url.render_as_string(hide_password=True)], status[name])
+        yield from pool_gauges.values()
+
+        l1 = cache.user_l1.stats()
+        for name in ("hits", "misses", "evictions"):
+            yield CounterMetricFamily(f"user_cache_l1_{name}", f"In-process user cache {name}.", value=l1[name])
+        yield GaugeMetricFamily("user_cache_l1_size", "Entries in the in-process user cache.", value=l1["size"])
+
+        redis_stats = cache.redis_stats
+        for name in ("hits", "misses"):
+            yield CounterMetricFamily(f"user_cache_redis_{name}", f"Redis user cache {name}.", value=redis_stats[name])
+
+        lookups = l1["hits"] + redis_stats["hits"] + redis_stats["misses"]
+        ratio = (l1["hits"] + redis_stats["hits"]) / lookups if lookups else 0.0
+        yield GaugeMetricFamily("user_cache_hit_ratio", "Share of user lookups served from cache.", value=ratio)
+
+        for name, value in cache.result_stats.items():
+            yield CounterMetricFamily(f"result_cache_{name}", f"Contacts result cache {name}.", value=value)
+
+        hashing = security.hashing_stats()
+        yield GaugeMetricFamily("password_hash_pending", "Hashing jobs queued or running.", value=hashing["pending"])
+        yield GaugeMetricFamily("password_hash_workers", "Hashing executor size.", value=hashing["workers"])
+
+class MetricsMiddleware:
+    """
+    Pure ASGI middleware recording per-route latency, in-flight requests and
+    the SQL statements each request issued.
+    """
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        status = 500
+
+        async def send_wrapper(message):
+            nonlocal status
+            if message["type"] == "http.response.start":
+                status = message["status"]
+            await send(message)
+
+        stats = {"queries": 0, "seconds": 0.0}
+        token = _request_stats.set(stats)
+        REQUESTS_IN_FLIGHT.inc()
+        start = time.perf_counter()
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            elapsed = time.perf_counter() - start
+            REQUESTS_IN_FLIGHT.dec()
+            route = scope.get("route")
+            REQUEST_DURATION.labels(scope["method"], getattr(route, "path", "unmatched"), status).observe(elapsed)
+            DB_QUERIES_PER_REQUEST.observe(stats["queries"])
+            DB_TIME_PER_REQUEST.observe(stats["seconds"])
+            _request_stats.reset(token)
+
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    conn.info.setdefault("query_start", []).append(time.perf_counter())
+
+def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    elapsed = time.perf_counter() - conn.info["query_start"].pop()
+    DB_QUERY_DURATION.observe(elapsed)
+    stats = _request_stats.get()
+    if stats is not None:
+        stats["queries"] += 1
+        stats["seconds"] += elapsed
+
+def instrument_engine(engine):
+    """
+    Attach query timing hooks and pool checkout timing to an engine.
+
+    :param engine: Engine or AsyncEngine
+    :return: None
+    """
+    sync_engine = getattr(engine, "sync_engine", engine)
+    if event.contains(sync_engine, "before_cursor_execute", _before_cursor_execute):
+        return
+    event.listen(sync_engine, "before_cursor_execute", _before_cursor_execute)
+    event.listen(sync_engine, "after_cursor_execute", _after_cursor_execute)
+    _engines.append(sync_engine)
+
+    # The pool has no "before checkout" event, so wrap its getter to time queueing.
+    pool = sync_engine.pool
+    do_get = pool._do_get
+
+    def timed_do_get():
+        start = time.perf_counter()
+        try:
+            return do_get()
+        finally:
+            DB_POOL_CHECKOUT_WAIT.observe(time.perf_counter() - start)
+
+    pool._do_get = timed_do_get
+
+def _registry():
+    if "PROMETHEUS_MULTIPROC_DIR" in os.environ:
+        from prometheus_client import multiprocess
+
+        registry = CollectorRegistry()
+        multiprocess.MultiProcessCollector(registry)
+        registry.register(_StatsCollector())
+        return registry
+    return REGISTRY
+
+async def metrics_endpoint(request: Request) -> Response:
+    """
+    Prometheus scrape endpoint.
+
+    :param request: HTTP request object
+    :return: Metrics in the Prometheus text format
+    """
+    return Response(generate_latest(_registry()), media_type=CONTENT_TYPE_LATEST)
+
+def setup_metrics(app, engines):
+    """
+    Install the middleware, engine hooks and ``/metrics`` route, unless
+    METRICS_ENABLED is off.
+
+    :param app: FastAPI application
+    :param engines: Engines to instrument
+    :return: None
+    """
+    global _stats_collector
+    if not METRICS_ENABLED:
+        return
+    for engine in engines:
+        instrument_engine(engine)
+    # The registry is process-wide, so a second app built in the same process reuses the collector.
+    if "PROMETHEUS_MULTIPROC_DIR" not in os.environ and _stats_collector is None:
+        _stats_collector = _StatsCollector()
+        REGISTRY.register(_stats_collector)
+    app.add_middleware(MetricsMiddleware)
+    app.add_route("/metrics", metrics_endpoint, include_in_schema=False)
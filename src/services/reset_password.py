@@ -1,54 +1,69 @@
-from datetime import datetime, timedelta
-from jose import jwt, JWTError
-from src.services.email import send_email  # реалізуй, або заміни mock-ом
+from starlette.concurrency import run_in_threadpool
+from src.services.tasks import queue_email
 from src.repository import users
-from src.services.security import get_password_hash
-import os
+from src.services.security import get_password_hash_async
+from src.services.cache import invalidate_user
+from src.services.revocation import revocations
+from src.services.tokens import token_verifier
+from src.services.auth import REFRESH_TOKEN_EXPIRE_DAYS
 
-SECRET_KEY = os.getenv("SECRET_KEY")
-ALGORITHM = "HS256"
+RESET_TOKEN_SCOPE = "reset_password"
+RESET_TOKEN_EXPIRE_SECONDS = 3600
 
 def generate_reset_token(email: str) -> str:
-    expire = datetime.utcnow() + timedelta(hours=1)
-    payload = {"sub": email, "exp": expire}
-    return jwt.encode(payload, SECRET_KEY, algorithm=ALGORITHM)
+    """
+    Create a one-hour password reset token. It carries a scope claim so it
+    cannot be used as an access token, and vice versa.
+
+    :param email: The email address of the user.
+    :return: The encoded token.
+    """
+    return token_verifier.issue({"sub": email, "scope": RESET_TOKEN_SCOPE}, RESET_TOKEN_EXPIRE_SECONDS)
 
 def verify_reset_token(token: str) -> str | None:
-    try:
-        payload = jwt.decode(token, SECRET_KEY, algorithms=[ALGORITHM])
-        return payload.get("sub")
-    except JWTError:
+    """
+    Return the email a reset token was issued for. Talks to Redis.
+
+    :param token: The JWT token for password reset.
+    :return: The email, or None if the token is invalid, revoked or not a reset token.
+    """
+    payload = token_verifier.verify(token, scope=RESET_TOKEN_SCOPE)
+    if payload is None or revocations.is_revoked(payload):
         return None
+    return payload.get("sub")
 
-async def send_password_reset_email(email: str, token: str):
+def queue_password_reset_email(queue, email: str, token: str, idempotency_key: str | None = None) -> str | None:
     """
-    Send a password reset email to the user with a link to reset their password.
-    
+    Queue a password reset email with a link to reset the password.
+
+    :param queue: The job queue.
     :param email: The email address of the user.
     :param token: The JWT token for password reset.
-    :return: None
+    :param idempotency_key: Optional key; a repeated key is not queued again.
+    :return: The job id, or None for a repeated idempotency key.
     """
     reset_link = f"http://localhost:8000/api/auth/reset-password?token={token}"
     subject = "Password Reset Request"
     body = f"Click the link to reset your password: {reset_link}"
-    await send_email(email, subject, body)
+    return queue_email(queue, email, subject, body, idempotency_key)
 
 async def reset_password(db, token: str, new_password: str):
     """
     Reset the user's password using the provided token and new password.
+    Every token issued to the user before the reset is revoked.
 
     :param db: The database session.
     :param token: The JWT token for password reset.
     :param new_password: The new password to set.
     :return: The updated user object or None if the token is invalid or user not found.
     """
-    email = verify_reset_token(token)
+    email = await run_in_threadpool(verify_reset_token, token)
     if not email:
         return None
-    user = users.get_user_by_email(db, email)
-    if not user:
-        return None
-    hashed = get_password_hash(new_password)
-    user.hashed_password = hashed
-    db.commit()
+    hashed = await get_password_hash_async(new_password)
+    user = await users.update_password_async(db, email, hashed)
+    if user:
+        await run_in_threadpool(invalidate_user, email)
+        # Ends every session and makes this reset link single-use.
+        await run_in_threadpool(revocations.revoke_user, email, REFRESH_TOKEN_EXPIRE_DAYS * 86400)
     return user
\ No newline at end of file
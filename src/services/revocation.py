@@ -0,0 +1,193 @@
+import hashlib
+import math
+import os
+import threading
+import time
+import redis
+from src.services.cache import r
+
+REVOCATION_CHANNEL = "token-revoke"
+REVOCATION_PREFIX = "revoked:"
+REVOCATION_BLOOM_CAPACITY = int(os.getenv("REVOCATION_BLOOM_CAPACITY", 100000))
+REVOCATION_BLOOM_ERROR_RATE = float(os.getenv("REVOCATION_BLOOM_ERROR_RATE", 0.001))
+# Bloom filters cannot forget, so the filter is rebuilt from Redis to drop expired entries.
+REVOCATION_REBUILD_SECONDS = float(os.getenv("REVOCATION_REBUILD_SECONDS", 300))
+
+class BloomFilter:
+    """
+    Fixed-size Bloom filter over strings, using double hashing of one BLAKE2b digest.
+    """
+
+    def __init__(self, capacity: int, error_rate: float):
+        """
+        :param capacity: Expected number of items
+        :param error_rate: Target false-positive rate at that capacity
+        """
+        self.size = max(8, int(-capacity * math.log(error_rate) / math.log(2) ** 2))
+        self.hashes = max(1, round(self.size / capacity * math.log(2)))
+        self.bits = bytearray((self.size + 7) // 8)
+
+    def _positions(self, item: str):
+        digest = hashlib.blake2b(item.encode(), digest_size=16).digest()
+        h1, h2 = int.from_bytes(digest[:8], "little"), int.from_bytes(digest[8:], "little") | 1
+        return ((h1 + i * h2) % self.size for i in range(self.hashes))
+
+    def add(self, item: str):
+        """
+        :param item: Item to add
+        :return: None
+        """
+        for pos in self._positions(item):
+            self.bits[pos >> 3] |= 1 << (pos & 7)
+
+    def __contains__(self, item: str) -> bool:
+        return all(self.bits[pos >> 3] & (1 << (pos & 7)) for pos in self._positions(item))
+
+class RevocationList:
+    """
+    Revoked tokens, token families and users, stored in Redis as keys that
+    expire with the tokens they cover and mirrored into a Bloom filter.
+
+    :meth:`might_be_revoked` only consults the filter, so for the usual
+    non-revoked token it costs no network hop. A filter hit is confirmed
+    against Redis by :meth:`is_revoked`. Until the filter has been loaded
+    every check goes to Redis.
+    """
+
+    def __init__(self, client: redis.Redis, capacity: int = REVOCATION_BLOOM_CAPACITY,
+                 error_rate: float = REVOCATION_BLOOM_ERROR_RATE):
+        """
+        :param client: Redis client with decode_responses enabled
+        :param capacity: Bloom filter capacity
+        :param error_rate: Bloom filter false-positive rate
+        """
+        self.client = client
+        self.capacity = capacity
+        self.error_rate = error_rate
+        self.bloom = BloomFilter(capacity, error_rate)
+        self.ready = False
+        self._thread = None
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def _entries(claims: dict) -> list[str]:
+        entries = []
+        if claims.get("jti"):
+            entries.append(f"jti:{claims['jti']}")
+        if claims.get("fam"):
+            entries.append(f"fam:{claims['fam']}")
+        if claims.get("sub"):
+            entries.append(f"user:{claims['sub']}")
+        return entries
+
+    def _revoke(self, entry: str, value: str, ttl: float, nx: bool = False) -> bool:
+        created = self.client.set(REVOCATION_PREFIX + entry, value, ex=max(1, math.ceil(ttl)), nx=nx)
+        self.bloom.add(entry)
+        self.client.publish(REVOCATION_CHANNEL, entry)
+        return bool(created)
+
+    def revoke_token(self, claims: dict) -> bool:
+        """
+        Revoke a single token until it would have expired anyway.
+
+        :param claims: Verified claims with ``jti`` and ``exp``
+        :return: False if the token had already been revoked
+        """
+        return self._revoke(f"jti:{claims['jti']}", "1", claims["exp"] - time.time(), nx=True)
+
+    def revoke_family(self, family: str, ttl: float):
+        """
+        Revoke every refresh token descended from one login.
+
+        :param family: The ``fam`` claim
+        :param ttl: Seconds until the longest-lived token of the family expires
+        :return: None
+        """
+        self._revoke(f"fam:{family}", "1", ttl)
+
+    def revoke_user(self, sub: str, ttl: float):
+        """
+        Revoke every token issued to a subject so far.
+
+        :param sub: The ``sub`` claim
+        :param ttl: Seconds until the longest-lived token issued so far expires
+        :return: None
+        """
+        self._revoke(f"user:{sub}", repr(time.time()), ttl)
+
+    def might_be_revoked(self, claims: dict) -> bool:
+        """
+        In-process check; False means the token is definitely not revoked.
+
+        :param claims: Verified claims
+        :return: True when :meth:`is_revoked` has to be asked
+        """
+        self.start()
+        if not self.ready:
+            return True
+        return any(entry in self.bloom for entry in self._entries(claims))
+
+    def is_revoked(self, claims: dict) -> bool:
+        """
+        Authoritative check against Redis.
+
+        :param claims: Verified claims
+        :return: True if the token, its family or its subject was revoked
+        """
+        entries = self._entries(claims)
+        if not entries:
+            return False
+        values = self.client.mget([REVOCATION_PREFIX + entry for entry in entries])
+        for entry, value in zip(entries, values):
+            if value is None:
+                continue
+            if not entry.startswith("user:") or float(claims.get("iat", 0)) < float(value):
+                return True
+        return False
+
+    def rebuild(self):
+        """
+        Replace the Bloom filter with the entries currently in Redis.
+
+        :return: None
+        """
+        bloom = BloomFilter(self.capacity, self.error_rate)
+        for key in self.client.scan_iter(match=REVOCATION_PREFIX + "*", count=1000):
+            bloom.add(key[len(REVOCATION_PREFIX):])
+        self.bloom = bloom
+        self.ready = True
+
+    def start(self):
+        """
+        Start (once per process) the thread that loads the filter, applies
+        revocations published by other workers and rebuilds periodically.
+
+        :return: None
+        """
+        if self._thread is not None and self._thread.is_alive():
+            return
+        with self._lock:
+            if self._thread is None or not self._thread.is_alive():
+                self._thread = threading.Thread(target=self._sync_loop, name="token-revocation", daemon=True)
+                self._thread.start()
+
+    def _sync_loop(self):
+        while True:
+            try:
+                pubsub = self.client.pubsub(ignore_subscribe_messages=True)
+                pubsub.subscribe(REVOCATION_CHANNEL)
+                self.rebuild()
+                next_rebuild = time.monotonic() + REVOCATION_REBUILD_SECONDS
+                while True:
+                    message = pubsub.get_message(timeout=1.0)
+                    if message is not None:
+                        self.bloom.add(message["data"])
+                    if time.monotonic() >= next_rebuild:
+                        self.rebuild()
+                        next_rebuild = time.monotonic() + REVOCATION_REBUILD_SECONDS
+            except redis.RedisError:
+                # Revocations published while disconnected may be missed; check Redis until reloaded.
+                self.ready = False
+                time.sleep(1.0)
+
+revocations = RevocationList(r)
@@ -1,6 +1,36 @@
-from passlib.context import CryptContext
+import asyncio
+import multiprocessing
+import os
+import threading
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from src.services.metrics import HASH_DURATION, timer
 
-pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
+BCRYPT_ROUNDS = int(os.getenv("BCRYPT_ROUNDS", 12))
+PASSWORD_HASH_EXECUTOR = os.getenv("PASSWORD_HASH_EXECUTOR", "process")
+PASSWORD_HASH_WORKERS = int(os.getenv("PASSWORD_HASH_WORKERS", 0)) or os.cpu_count() or 1
+
+_pwd_context = None
+_executor = None
+_executor_lock = threading.Lock()
+_stats_lock = threading.Lock()
+_stats = {"pending": 0, "max_pending": 0, "completed": 0}
+
+def get_pwd_context():
+    """
+    The passlib CryptContext, built on first use so that importing the app
+    does not load passlib.
+
+    :return: CryptContext configured for bcrypt at BCRYPT_ROUNDS
+    """
+    global _pwd_context
+    if _pwd_context is None:
+        from passlib.context import CryptContext
+
+        # min_rounds makes passlib flag hashes made with a lower cost as needing an update.
+        _pwd_context = CryptContext(
+            schemes=["bcrypt"], deprecated="auto", bcrypt__rounds=BCRYPT_ROUNDS, bcrypt__min_rounds=BCRYPT_ROUNDS
+        )
+    return _pwd_context
 
 def get_password_hash(password: str) -> str:
     """
@@ -9,7 +39,7 @@ def get_password_hash(password: str) -> str:
     :param password: The password to hash
     :return: The hashed password
     """
-    return pwd_context.hash(password)
+    return get_pwd_context().hash(password)
 
 def verify_password(plain: str, hashed: str) -> bool:
     """
@@ -19,4 +49,103 @@ def verify_password(plain: str, hashed: str) -> bool:
     :param hashed: The hashed password to verify against
     :return: True if the password matches, False otherwise
     """
-    return pwd_context.verify(plain, hashed)
\ No newline at end of file
+    return get_pwd_context().verify(plain, hashed)
+
+def verify_and_update(plain: str, hashed: str) -> tuple[bool, str | None]:
+    """
+    Verifies a password and rehashes it when the stored hash uses outdated settings.
+
+    :param plain: The plain password to verify
+    :param hashed: The hashed password to verify against
+    :return: Tuple of (valid, new_hash); new_hash is None when no rehash is needed
+    """
+    return get_pwd_context().verify_and_update(plain, hashed)
+
+def get_hashing_executor():
+    """
+    Return the shared password-hashing executor, creating it on first use.
+
+    A process pool (the default) keeps bcrypt off the GIL entirely; set
+    PASSWORD_HASH_EXECUTOR=thread to use a thread pool instead. Its workers
+    are started by a forkserver (spawn where that is missing), never forked
+    from this already multi-threaded process, whose held locks a fork would
+    copy into the children.
+
+    :return: The executor
+    """
+    global _executor
+    with _executor_lock:
+        if _executor is None:
+            if PASSWORD_HASH_EXECUTOR == "process":
+                method = "forkserver" if "forkserver" in multiprocessing.get_all_start_methods() else "spawn"
+                _executor = ProcessPoolExecutor(
+                    max_workers=PASSWORD_HASH_WORKERS, mp_context=multiprocessing.get_context(method)
+                )
+            else:
+                _executor = ThreadPoolExecutor(max_workers=PASSWORD_HASH_WORKERS)
+        return _executor
+
+def shutdown_hashing_executor():
+    """
+    Shut down the password-hashing executor if it was started.
+
+    :return: None
+    """
+    global _executor
+    with _executor_lock:
+        if _executor is not None:
+            _executor.shutdown(wait=True)
+            _executor = None
+
+def hashing_stats() -> dict:
+    """
+    Return queue-depth counters of the password-hashing executor.
+
+    ``pending`` is the number of jobs submitted but not finished yet; when it
+    stays above ``workers`` requests are queueing for bcrypt.
+
+    :return: Dictionary with workers, pending, max_pending and completed
+    """
+    with _stats_lock:
+        return {"workers": PASSWORD_HASH_WORKERS, **_stats}
+
+async def _run_in_executor(fn, *args):
+    with _stats_lock:
+        _stats["pending"] += 1
+        _stats["max_pending"] = max(_stats["max_pending"], _stats["pending"])
+    try:
+        with timer(HASH_DURATION, fn.__name__):
+            return await asyncio.get_running_loop().run_in_executor(get_hashing_executor(), fn, *args)
+    finally:
+        with _stats_lock:
+            _stats["pending"] -= 1
+            _stats["completed"] += 1
+
+async def get_password_hash_async(password: str) -> str:
+    """
+    Async version of :func:`get_password_hash`, run on the hashing executor.
+
+    :param password: The password to hash
+    :return: The hashed password
+    """
+    return await _run_in_executor(get_password_hash, password)
+
+async def verify_password_async(plain: str, hashed: str) -> bool:
+    """
+    Async version of :func:`verify_password`, run on the hashing executor.
+
+    :param plain: The plain password to verify
+    :param hashed: The hashed password to verify against
+    :return: True if the password matches, False otherwise
+    """
+    return await _run_in_executor(verify_password, plain, hashed)
+
+async def verify_and_update_async(plain: str, hashed: str) -> tuple[bool, str | None]:
+    """
+    Async version of :func:`verify_and_update`, run on the hashing executor.
+
+    :param plain: The plain password to verify
+    :param hashed: The hashed password to verify against
+    :return: Tuple of (valid, new_hash)
+    """
+    return await _run_in_executor(verify_and_update, plain, hashed)
@@ -0,0 +1,125 @@
+import os
+from src.services.metrics import EXTERNAL_DURATION, EXTERNAL_ERRORS, timer
+
+AVATAR_STORAGE = os.getenv("AVATAR_STORAGE", "cloudinary")
+AVATAR_LOCAL_DIR = os.getenv("AVATAR_LOCAL_DIR", "media")
+AVATAR_LOCAL_URL = os.getenv("AVATAR_LOCAL_URL", "/media")
+CLOUDINARY_TIMEOUT = float(os.getenv("CLOUDINARY_TIMEOUT", 5))
+
+class CloudinaryStorage:
+    """
+    Stores files on Cloudinary under a fixed public id, so a name maps to a stable URL.
+
+    Only the upload and delivery APIs are used; the Admin API is rate limited
+    per hour and is not called on the request path.
+    """
+
+    def __init__(self):
+        import cloudinary
+
+        cloudinary.config(
+            cloud_name=os.getenv("CLOUDINARY_CLOUD_NAME") or os.getenv("CLOUDINARY_NAME"),
+            api_key=os.getenv("CLOUDINARY_API_KEY"),
+            api_secret=os.getenv("CLOUDINARY_API_SECRET"),
+            secure=True,
+        )
+
+    @staticmethod
+    def _public_id(name: str) -> str:
+        return name.rsplit(".", 1)[0]
+
+    def url(self, name: str) -> str | None:
+        """
+        Build the delivery URL locally and check it with a HEAD request to the CDN.
+
+        :param name: Storage name, e.g. "avatars/<hash>/64.jpg"
+        :return: URL of the stored file, or None if it does not exist or cannot be checked
+        """
+        import urllib.error
+        import urllib.request
+        import cloudinary
+
+        url = cloudinary.CloudinaryImage(self._public_id(name)).build_url(format=os.path.splitext(name)[1][1:] or None)
+        try:
+            with timer(EXTERNAL_DURATION, "cloudinary"):
+                urllib.request.urlopen(urllib.request.Request(url, method="HEAD"), timeout=CLOUDINARY_TIMEOUT).close()
+        except urllib.error.HTTPError as e:
+            if e.code != 404:
+                EXTERNAL_ERRORS.labels("cloudinary").inc()
+            return None
+        except OSError:
+            # Unknown is treated as missing: the upload that follows does not overwrite.
+            EXTERNAL_ERRORS.labels("cloudinary").inc()
+            return None
+        return url
+
+    def save(self, name: str, data: bytes, content_type: str) -> str:
+        """
+        :param name: Storage name
+        :param data: File contents
+        :param content_type: MIME type of the contents
+        :return: URL of the stored file
+        """
+        import cloudinary.uploader
+
+        try:
+            with timer(EXTERNAL_DURATION, "cloudinary"):
+                result = cloudinary.uploader.upload(data, public_id=self._public_id(name), overwrite=False)
+        except Exception:
+            EXTERNAL_ERRORS.labels("cloudinary").inc()
+            raise
+        return result["secure_url"]
+
+class LocalStorage:
+    """
+    Stores files in a local directory served under ``base_url``; for
+    development and tests.
+    """
+
+    def __init__(self, root: str = AVATAR_LOCAL_DIR, base_url: str = AVATAR_LOCAL_URL):
+        """
+        :param root: Directory the files are written to
+        :param base_url: URL prefix the directory is served under
+        """
+        self.root = root
+        self.base_url = base_url.rstrip("/")
+
+    def url(self, name: str) -> str | None:
+        """
+        :param name: Storage name
+        :return: URL of the stored file, or None if it does not exist
+        """
+        return f"{self.base_url}/{name}" if os.path.exists(os.path.join(self.root, name)) else None
+
+    def save(self, name: str, data: bytes, content_type: str) -> str:
+        """
+        :param name: Storage name
+        :param data: File contents
+        :param content_type: MIME type of the contents, unused
+        :return: URL of the stored file
+        """
+        path = os.path.join(self.root, name)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        tmp = f"{path}.tmp{os.getpid()}"
+        with open(tmp, "wb") as f:
+            f.write(data)
+        os.replace(tmp, path)
+        return f"{self.base_url}/{name}"
+
+STORAGES = {
+    "cloudinary": CloudinaryStorage,
+    "local": LocalStorage,
+}
+
+_storage = None
+
+def get_avatar_storage():
+    """
+    Return the storage selected by AVATAR_STORAGE, creating it on first use.
+
+    :return: CloudinaryStorage or LocalStorage
+    """
+    global _storage
+    if _storage is None:
+        _storage = STORAGES[AVATAR_STORAGE]()
+    return _storage
@@ -0,0 +1,73 @@
+import logging
+import uuid
+from src.repository import users
+from src.repository.database.db import SessionLocal
+from src.services.avatars import InvalidImage, store_avatar
+from src.services.cache import invalidate_user
+from src.services.email import send_email
+from src.services.jobs import JOB_BLOB_TTL, current_queue, enqueue, task
+from src.services.storage import get_avatar_storage
+
+logger = logging.getLogger(__name__)
+
+# Sessions the tasks write with; tests point it at their own engine.
+session_factory = SessionLocal
+
+task("send_email")(send_email)
+
+@task("process_avatar")
+def process_avatar(email: str, blob_key: str):
+    """
+    Render, store and assign an uploaded avatar. Runs in a worker thread.
+
+    :param email: The user's email
+    :param blob_key: Key the image bytes were stored under by :func:`queue_avatar`
+    :return: None
+    """
+    queue = current_queue()
+    data = queue.get_blob(blob_key)
+    if data is None:
+        # Blob expired before a worker got to it; nothing left to upload.
+        return
+    try:
+        avatar_url = store_avatar(get_avatar_storage(), data)
+    except InvalidImage:
+        # Retrying cannot fix a bad image.
+        logger.warning("dropping avatar upload for %s: not a usable image", email)
+        queue.delete_blob(blob_key)
+        return
+    with session_factory() as db:
+        users.update_avatar(db, email, avatar_url)
+    invalidate_user(email)
+    queue.delete_blob(blob_key)
+
+def queue_email(queue, to_email: str, subject: str, body: str, idempotency_key: str | None = None) -> str | None:
+    """
+    Queue an email for the worker to send.
+
+    :param queue: Job queue
+    :param to_email: Recipient's email address
+    :param subject: Subject of the email
+    :param body: Body of the email
+    :param idempotency_key: Optional key; a repeated key is not queued again
+    :return: Job id, or None for a repeated idempotency key
+    """
+    return enqueue(queue, "send_email", to_email, subject, body, idempotency_key=idempotency_key)
+
+def queue_avatar(queue, email: str, data: bytes, idempotency_key: str | None = None) -> str | None:
+    """
+    Store avatar bytes next to the queue and queue their upload.
+
+    :param queue: Job queue
+    :param email: The user's email
+    :param data: Image bytes
+    :param idempotency_key: Optional key; a repeated key is not queued again
+    :return: Job id, or None for a repeated idempotency key
+    """
+    blob_key = uuid.uuid4().hex
+    queue.put_blob(blob_key, data, JOB_BLOB_TTL)
+    # Always keyed, so a job redelivered after a worker crash is not uploaded twice.
+    job_id = enqueue(queue, "process_avatar", email, blob_key, idempotency_key=idempotency_key or f"avatar:{blob_key}")
+    if job_id is None:
+        queue.delete_blob(blob_key)
+    return job_id
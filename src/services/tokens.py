@@ -0,0 +1,238 @@
+import base64
+import hashlib
+import hmac
+import json
+import os
+import secrets
+import time
+from src.services.cache import LocalCache
+
+JWT_BACKEND = os.getenv("JWT_BACKEND", "hmac")
+JWT_ALGORITHM = "HS256"
+# Signing keys as "kid:secret,kid:secret"; without it SECRET_KEY signs and no kid header is set.
+JWT_KEYS = os.getenv("JWT_KEYS", "")
+JWT_ACTIVE_KID = os.getenv("JWT_ACTIVE_KID")
+TOKEN_CACHE_SIZE = int(os.getenv("TOKEN_CACHE_SIZE", 10000))
+
+class InvalidToken(Exception):
+    """
+    Raised by backends when a token is malformed, badly signed or expired.
+    """
+
+def _b64decode(segment: str) -> bytes:
+    return base64.urlsafe_b64decode(segment + "=" * (-len(segment) % 4))
+
+def _b64encode(data: bytes) -> str:
+    return base64.urlsafe_b64encode(data).rstrip(b"=").decode()
+
+def token_header(token: str) -> dict:
+    """
+    Parse the JOSE header without verifying the signature.
+
+    :param token: Encoded JWT
+    :return: Header dictionary
+    """
+    try:
+        header = json.loads(_b64decode(token.split(".", 1)[0]))
+    except (ValueError, UnicodeDecodeError) as e:
+        raise InvalidToken("malformed header") from e
+    if not isinstance(header, dict):
+        raise InvalidToken("malformed header")
+    return header
+
+class JoseBackend:
+    """
+    python-jose, the library the service has always used.
+    """
+
+    name = "jose"
+
+    def __init__(self):
+        from jose import JWTError, jwt
+
+        self._jwt, self._error = jwt, JWTError
+
+    def encode(self, claims: dict, secret: str, headers: dict | None) -> str:
+        return self._jwt.encode(claims, secret, algorithm=JWT_ALGORITHM, headers=headers)
+
+    def decode(self, token: str, secret: str) -> dict:
+        try:
+            return self._jwt.decode(token, secret, algorithms=[JWT_ALGORITHM])
+        except self._error as e:
+            raise InvalidToken(str(e)) from e
+
+class PyJWTBackend:
+    """
+    PyJWT; optional, install ``PyJWT`` to use it.
+    """
+
+    name = "pyjwt"
+
+    def __init__(self):
+        import jwt
+
+        self._jwt = jwt
+
+    def encode(self, claims: dict, secret: str, headers: dict | None) -> str:
+        return self._jwt.encode(claims, secret, algorithm=JWT_ALGORITHM, headers=headers)
+
+    def decode(self, token: str, secret: str) -> dict:
+        try:
+            return self._jwt.decode(token, secret, algorithms=[JWT_ALGORITHM])
+        except self._jwt.PyJWTError as e:
+            raise InvalidToken(str(e)) from e
+
+class HmacBackend:
+    """
+    HS256 done directly with the stdlib ``hmac`` module.
+
+    Keys are turned into HMAC objects once and copied per token, so the key
+    padding is not re-derived on every verification.
+    """
+
+    name = "hmac"
+
+    def __init__(self):
+        self._macs = {}
+
+    def _mac(self, secret: str):
+        mac = self._macs.get(secret)
+        if mac is None:
+            mac = self._macs[secret] = hmac.new(secret.encode(), digestmod=hashlib.sha256)
+        return mac.copy()
+
+    def encode(self, claims: dict, secret: str, headers: dict | None) -> str:
+        header = {"alg": JWT_ALGORITHM, "typ": "JWT", **(headers or {})}
+        signing_input = (
+            _b64encode(json.dumps(header, separators=(",", ":")).encode()) + "."
+            + _b64encode(json.dumps(claims, separators=(",", ":")).encode())
+        )
+        mac = self._mac(secret)
+        mac.update(signing_input.encode())
+        return f"{signing_input}.{_b64encode(mac.digest())}"
+
+    def decode(self, token: str, secret: str) -> dict:
+        try:
+            signing_input, signature = token.encode().rsplit(b".", 1)
+            header_segment, payload_segment = signing_input.split(b".")
+            header = json.loads(_b64decode(header_segment.decode()))
+            if header.get("alg") != JWT_ALGORITHM:
+                raise InvalidToken("unexpected algorithm")
+            mac = self._mac(secret)
+            mac.update(signing_input)
+            if not hmac.compare_digest(mac.digest(), _b64decode(signature.decode())):
+                raise InvalidToken("signature mismatch")
+            claims = json.loads(_b64decode(payload_segment.decode()))
+        except (ValueError, UnicodeDecodeError, AttributeError) as e:
+            raise InvalidToken("malformed token") from e
+        if not isinstance(claims, dict):
+            raise InvalidToken("malformed claims")
+        now = time.time()
+        try:
+            if "exp" in claims and float(claims["exp"]) <= now:
+                raise InvalidToken("expired")
+            if "nbf" in claims and float(claims["nbf"]) > now:
+                raise InvalidToken("not yet valid")
+        except (TypeError, ValueError) as e:
+            raise InvalidToken("malformed time claim") from e
+        return claims
+
+BACKENDS = {
+    "jose": JoseBackend,
+    "pyjwt": PyJWTBackend,
+    "hmac": HmacBackend,
+}
+
+def parse_keys(value: str) -> dict:
+    """
+    Parse JWT_KEYS.
+
+    :param value: "kid:secret" pairs separated by commas
+    :return: Dictionary of kid to secret
+    """
+    keys = {}
+    for item in filter(None, (part.strip() for part in value.split(","))):
+        kid, sep, secret = item.partition(":")
+        if not sep or not kid or not secret:
+            raise ValueError(f"JWT_KEYS entry {item!r} is not in kid:secret form")
+        keys[kid] = secret
+    return keys
+
+class TokenVerifier:
+    """
+    Issues and verifies HS256 tokens, remembering verified tokens until they expire.
+
+    Keys are looked up by the ``kid`` header, so tokens signed with a retired
+    key keep working for as long as that key stays in JWT_KEYS. Cache entries
+    are keyed by the SHA-256 of the token and never outlive its ``exp``.
+    """
+
+    def __init__(self, backend: str = JWT_BACKEND, keys: dict | None = None, active_kid: str | None = None,
+                 default_secret: str | None = None, cache_size: int = TOKEN_CACHE_SIZE):
+        """
+        :param backend: "hmac", "jose" or "pyjwt"
+        :param keys: kid to secret
+        :param active_kid: kid used for new tokens, defaults to the first key
+        :param default_secret: Secret for tokens without a kid header
+        :param cache_size: Maximum number of verified tokens remembered
+        """
+        self.backend = BACKENDS[backend]()
+        self.keys = dict(keys or {})
+        self.active_kid = active_kid or next(iter(self.keys), None)
+        if self.active_kid is not None and self.active_kid not in self.keys:
+            raise ValueError(f"active kid {self.active_kid!r} is not among the configured keys")
+        self.default_secret = default_secret
+        self.cache = LocalCache(cache_size, 0) if cache_size else None
+
+    def issue(self, claims: dict, expires_in: float) -> str:
+        """
+        Sign claims with the active key.
+
+        Every token gets a random ``jti`` (unless one is given) and a fractional
+        ``iat``, which the revocation list uses to tell tokens apart.
+
+        :param claims: Claims to encode
+        :param expires_in: Lifetime in seconds
+        :return: Encoded JWT
+        """
+        now = time.time()
+        to_encode = {"jti": secrets.token_urlsafe(12), **claims, "iat": now, "exp": int(now + expires_in)}
+        if self.active_kid is not None:
+            return self.backend.encode(to_encode, self.keys[self.active_kid], {"kid": self.active_kid})
+        if not self.default_secret:
+            raise RuntimeError("no signing key configured; set SECRET_KEY or JWT_KEYS")
+        return self.backend.encode(to_encode, self.default_secret, None)
+
+    def verify(self, token: str, scope: str | None = None) -> dict | None:
+        """
+        Verify a token and return its claims.
+
+        :param token: Encoded JWT
+        :param scope: Required ``scope`` claim; None accepts only tokens without one
+        :return: Claims if the token is valid for the scope, otherwise None
+        """
+        cache_key = hashlib.sha256(token.encode()).digest() if self.cache else None
+        claims = self.cache.get(cache_key) if self.cache else None
+        if claims is None:
+            claims = self._decode(token)
+            if claims is None:
+                return None
+            if self.cache and "exp" in claims:
+                self.cache.set(cache_key, claims, ttl=float(claims["exp"]) - time.time())
+        if claims.get("scope") != scope:
+            return None
+        return dict(claims)
+
+    def _decode(self, token: str) -> dict | None:
+        try:
+            kid = token_header(token).get("kid")
+            secret = self.keys.get(kid) if kid is not None else self.default_secret
+            if not secret:
+                return None
+            return self.backend.decode(token, secret)
+        except InvalidToken:
+            return None
+
+token_verifier = TokenVerifier(
+    keys=parse_keys(JWT_KEYS), active_kid=JWT_ACTIVE_KID, default_secret=os.getenv("SECRET_KEY")
+)
@@ -1,15 +1,22 @@
 import pytest
 from fastapi.testclient import TestClient
 from sqlalchemy import create_engine
+from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
 from sqlalchemy.orm import sessionmaker
-from src.repository.database.models import Base
-from src.repository.database.db import get_db
+from src.repository.database.models import Base, User
+from src.repository.database.db import get_db, get_async_db
 from main import app
+from src.services import tasks
+from src.services.auth import get_current_user
+from src.services.jobs import InMemoryQueue, get_job_queue
 
 SQLALCHEMY_DATABASE_URL = "sqlite:///./test.db"
 engine = create_engine(SQLALCHEMY_DATABASE_URL, connect_args={"check_same_thread": False})
 TestingSessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
 
+async_engine = create_async_engine("sqlite+aiosqlite:///./test.db")
+AsyncTestingSessionLocal = async_sessionmaker(async_engine, autoflush=False, expire_on_commit=False)
+
 Base.metadata.create_all(bind=engine)
 
 
@@ -20,9 +27,64 @@ def override_get_db():
     finally:
         db.close()
 
+async def override_get_async_db():
+    async with AsyncTestingSessionLocal() as db:
+        yield db
+
 app.dependency_overrides[get_db] = override_get_db
+app.dependency_overrides[get_async_db] = override_get_async_db
 
 @pytest.fixture(scope="module")
 def client():
     with TestClient(app) as c:
         yield c
+
+@pytest.fixture
+def session():
+    with TestingSessionLocal() as db:
+        yield db
+
+@pytest.fixture
+def current_user(session):
+    user = session.query(User).filter(User.email == "current@example.com").first()
+    if user is None:
+        user = User(username="current", email="current@example.com", hashed_password="x")
+        session.add(user)
+        session.commit()
+        session.refresh(user)
+    session.expunge(user)
+    app.dependency_overrides[get_current_user] = lambda: user
+    yield user
+    del app.dependency_overrides[get_current_user]
+
+@pytest.fixture
+def job_queue(monkeypatch):
+    queue = InMemoryQueue()
+    app.dependency_overrides[get_job_queue] = lambda: queue
+    monkeypatch.setattr(tasks, "session_factory", TestingSessionLocal)
+    yield queue
+    del app.dependency_overrides[get_job_queue]
+
+
+@pytest.fixture
+def make_sqlite_engine(tmp_path):
+    engines = []
+
+    def make(name="test"):
+        engine = create_engine(f"sqlite:///{tmp_path}/{name}.db")
+        Base.metadata.create_all(bind=engine)
+        engines.append(engine)
+        return engine
+
+    yield make
+    for engine in engines:
+        engine.dispose()
+
+@pytest.fixture
+def sqlite_engine(make_sqlite_engine):
+    return make_sqlite_engine()
+
+@pytest.fixture
+def sqlite_session(sqlite_engine):
+    with sessionmaker(bind=sqlite_engine)() as db:
+        yield db
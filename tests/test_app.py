@@ -0,0 +1,27 @@
+import os
+import subprocess
+import sys
+from fastapi.testclient import TestClient
+from main import create_app
+from src.conf.config import Settings
+from src.repository.database import db as database
+
+
+def test_import_leaves_optional_libraries_unloaded():
+    code = "import sys, main; print(sorted(m for m in ('jose', 'passlib', 'PIL') if m in sys.modules))"
+    out = subprocess.check_output([sys.executable, "-c", code], env=os.environ, text=True)
+    assert out.strip() == "[]"
+
+
+def test_schema_is_created_on_startup_only_when_enabled(monkeypatch):
+    calls = []
+    monkeypatch.setattr(database.Base.metadata, "create_all", lambda bind: calls.append(bind))
+
+    with TestClient(create_app(Settings(create_schema=False))) as client:
+        assert client.get("/health/db").status_code == 200
+    assert calls == []
+
+    # A second app in the same process must not register its metrics twice.
+    with TestClient(create_app(Settings(create_schema=True))) as client:
+        assert client.get("/health/db").status_code == 200
+    assert calls == [database.engine]
@@ -0,0 +1,33 @@
+import asyncio
+from datetime import date
+from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
+from src.repository import contacts, users
+from src.repository.database.models import Base
+from src.schemas import ContactCreate, ContactUpdate, UserCreate
+
+
+async def _roundtrip():
+    engine = create_async_engine("sqlite+aiosqlite:///:memory:")
+    async with engine.begin() as conn:
+        await conn.run_sync(Base.metadata.create_all)
+    Session = async_sessionmaker(engine, expire_on_commit=False)
+    async with Session() as db:
+        user = await users.create_user_async(db, UserCreate(id=0, username="u", email="u@example.com", password="pw"))
+        assert (await users.get_user_by_email_async(db, "u@example.com")).id == user.id
+
+        contact = await contacts.create_contact_async(db, ContactCreate(
+            first_name="Ada", last_name="Lovelace", email="ada@example.com",
+            phone="123", birthday=date(1815, 12, 10)), user.id)
+        found = await contacts.get_contacts_async(db, user.id, name="ada")
+        assert [c.id for c in found] == [contact.id]
+
+        updated = await contacts.update_contact_async(db, contact.id, ContactUpdate(phone="456"), user.id)
+        assert updated.phone == "456"
+
+        assert await contacts.delete_contact_async(db, contact.id, user.id)
+        assert await contacts.get_contact_async(db, contact.id, user.id) is None
+    await engine.dispose()
+
+
+def test_async_repository_roundtrip():
+    asyncio.run(_roundtrip())
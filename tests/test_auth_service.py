@@ -1,3 +1,4 @@
+import asyncio
 from src.services import auth
 from src.services.security import get_password_hash, verify_password
 
@@ -13,4 +14,26 @@ def test_create_access_token():
 def test_decode_token():
     token = auth.create_access_token({"sub": "testuser"})
     data = auth.decode_token(token)
-    assert data["sub"] == "testuser"
\ No newline at end of file
+    assert data["sub"] == "testuser"
+
+def test_verify_and_update_rehashes_low_cost_hash():
+    import asyncio
+    from passlib.hash import bcrypt
+    from src.services.security import hashing_stats, verify_and_update_async
+
+    weak = bcrypt.using(rounds=4).hash("strongpass")
+    valid, new_hash = asyncio.run(verify_and_update_async("strongpass", weak))
+    assert valid and new_hash and verify_password("strongpass", new_hash)
+    assert asyncio.run(verify_and_update_async("wrong", weak)) == (False, None)
+    stats = hashing_stats()
+    assert stats["pending"] == 0 and stats["completed"] >= 2
+
+def test_hashing_processes_are_not_forked(monkeypatch):
+    from src.services import security
+
+    monkeypatch.setattr(security, "PASSWORD_HASH_EXECUTOR", "process")
+    security.shutdown_hashing_executor()
+    executor = security.get_hashing_executor()
+    assert executor._mp_context.get_start_method() in ("forkserver", "spawn")
+    assert asyncio.run(security.verify_password_async("x", get_password_hash("x")))
+    security.shutdown_hashing_executor()
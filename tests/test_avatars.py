@@ -0,0 +1,121 @@
+import asyncio
+import io
+import urllib.error
+import urllib.request
+import pytest
+from fastapi import HTTPException, Request, UploadFile
+from PIL import Image
+from src.repository.database.models import User
+from src.services import avatars, tasks
+from src.services.jobs import Worker
+from src.services.storage import CloudinaryStorage, LocalStorage
+
+READ_CHUNK = 64 * 1024
+
+
+def _jpeg(size=(400, 300)) -> bytes:
+    image = Image.new("RGB", size, "blue")
+    exif = Image.Exif()
+    exif[0x010F] = "PhoneMaker"
+    out = io.BytesIO()
+    image.save(out, "JPEG", exif=exif)
+    return out.getvalue()
+
+
+def test_read_limited_stops_at_the_limit():
+    upload = UploadFile(io.BytesIO(b"x" * 200_000))
+    with pytest.raises(HTTPException) as exc:
+        asyncio.run(avatars.read_limited(upload, max_bytes=100_000))
+    assert exc.value.status_code == 413
+    assert len(asyncio.run(avatars.read_limited(UploadFile(io.BytesIO(b"ok")), max_bytes=10))) == 2
+
+
+def test_renditions_are_square_and_without_metadata():
+    renditions = avatars.render_avatars(_jpeg())
+    assert set(renditions) == set(avatars.AVATAR_SIZES)
+    for size, body in renditions.items():
+        image = Image.open(io.BytesIO(body))
+        assert image.size == (size, size)
+        assert not image.getexif()
+
+
+def test_rejects_non_images():
+    with pytest.raises(avatars.InvalidImage):
+        avatars.check_image(b"GIF89a not really")
+
+
+def test_identical_upload_is_not_stored_twice(tmp_path, monkeypatch):
+    storage = LocalStorage(str(tmp_path), "/media")
+    data = _jpeg()
+    url = avatars.store_avatar(storage, data)
+    assert url.endswith("/256.jpg")
+    monkeypatch.setattr(avatars, "render_avatars", lambda data: pytest.fail("rendered again"))
+    assert avatars.store_avatar(storage, data) == url
+
+
+def test_cloudinary_url_checks_the_cdn_not_the_admin_api(monkeypatch):
+    import cloudinary.api
+
+    monkeypatch.setenv("CLOUDINARY_CLOUD_NAME", "demo")
+    monkeypatch.setattr(cloudinary.api, "resource", lambda *a, **kw: pytest.fail("admin API called"))
+    storage = CloudinaryStorage()
+    requests = []
+
+    def urlopen(request, timeout):
+        requests.append((request.get_method(), request.full_url))
+        if "missing" in request.full_url:
+            raise urllib.error.HTTPError(request.full_url, 404, "Not Found", {}, None)
+        return io.BytesIO()
+
+    monkeypatch.setattr(urllib.request, "urlopen", urlopen)
+    assert storage.url("avatars/abc/256.jpg") == "https://res.cloudinary.com/demo/image/upload/v1/avatars/abc/256.jpg"
+    assert storage.url("avatars/missing/256.jpg") is None
+    assert [method for method, _ in requests] == ["HEAD", "HEAD"]
+
+
+def test_avatar_upload_returns_202_and_runs_in_worker(client, current_user, job_queue, session, monkeypatch, tmp_path):
+    monkeypatch.setattr(tasks, "get_avatar_storage", lambda: LocalStorage(str(tmp_path), "https://img.example.com"))
+    monkeypatch.setattr(tasks, "invalidate_user", lambda email: None)
+    headers = {"Idempotency-Key": "upload-1"}
+    png = io.BytesIO()
+    Image.new("RGB", (300, 200), "red").save(png, "PNG")
+    files = {"file": ("a.png", png.getvalue(), "image/png")}
+    response = client.post("/auth/avatar", files=files, headers=headers)
+    assert response.status_code == 202 and response.json()["job_id"]
+    assert client.post("/auth/avatar", files=files, headers=headers).json()["job_id"] is None
+
+    asyncio.run(Worker(job_queue, worker_id="test", backoff=0).run(burst=True))
+    assert not job_queue.blobs
+    avatar_url = session.get(User, current_user.id).avatar_url
+    assert avatar_url.startswith("https://img.example.com/avatars/") and avatar_url.endswith("/256.jpg")
+
+
+def test_oversized_upload_is_refused_from_content_length(client, current_user, monkeypatch):
+    monkeypatch.setattr(avatars, "AVATAR_MAX_BYTES", 1000)
+    monkeypatch.setattr(avatars, "AVATAR_FORM_OVERHEAD", 100)
+    monkeypatch.setattr(avatars.Request, "form", lambda *a, **kw: pytest.fail("body parsed"))
+    response = client.post("/auth/avatar", files={"file": ("a.jpg", b"x" * 5000, "image/jpeg")})
+    assert response.status_code == 413
+
+
+def test_oversized_stream_is_refused_without_reading_it_all(monkeypatch):
+    monkeypatch.setattr(avatars, "AVATAR_MAX_BYTES", 100_000)
+    received = []
+    head = b'--b\r\nContent-Disposition: form-data; name="file"; filename="a.jpg"\r\n\r\n'
+
+    async def receive():
+        received.append(1)
+        body = head if len(received) == 1 else b"x" * READ_CHUNK
+        return {"type": "http.request", "body": body, "more_body": len(received) < 1000}
+
+    scope = {"type": "http", "method": "POST", "path": "/auth/avatar", "query_string": b"",
+             "headers": [(b"content-type", b"multipart/form-data; boundary=b")]}
+
+    async def parse():
+        async for _ in avatars.avatar_upload(Request(scope, receive)):
+            pass
+
+    with pytest.raises(HTTPException) as exc:
+        asyncio.run(parse())
+    assert exc.value.status_code == 413
+    assert len(received) <= (100_000 + avatars.AVATAR_FORM_OVERHEAD) // READ_CHUNK + 2
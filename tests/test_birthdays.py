@@ -0,0 +1,38 @@
+from datetime import date
+import pytest
+from src.repository import contacts
+from src.repository.database.models import Contact
+from src.schemas import ContactUpdate
+
+
+@pytest.fixture
+def db(sqlite_session):
+    birthdays = {"dec30": date(1980, 12, 30), "jan02": date(1975, 1, 2), "feb29": date(2000, 2, 29),
+                 "mar01": date(1990, 3, 1), "jun15": date(1985, 6, 15)}
+    for name, birthday in birthdays.items():
+        sqlite_session.add(Contact(first_name=name, last_name="X", email=f"{name}@example.com",
+                                   phone="1", birthday=birthday, user_id=1))
+    sqlite_session.commit()
+    return sqlite_session
+
+
+def _names(result):
+    return [c.first_name for c in result]
+
+
+def test_window_wraps_across_year_end_in_order(db):
+    result = contacts.get_upcoming_birthdays(db, 1, days=7, today=date(2026, 12, 28))
+    assert _names(result) == ["dec30", "jan02"]
+
+
+def test_feb29_celebrated_on_feb28_in_non_leap_years(db):
+    assert _names(contacts.get_upcoming_birthdays(db, 1, days=0, today=date(2027, 2, 28))) == ["feb29"]
+    assert _names(contacts.get_upcoming_birthdays(db, 1, days=0, today=date(2028, 2, 28))) == []
+    assert _names(contacts.get_upcoming_birthdays(db, 1, days=1, today=date(2028, 2, 28))) == ["feb29"]
+
+
+def test_birthday_md_follows_updates(db):
+    june = contacts.get_upcoming_birthdays(db, 1, days=0, today=date(2026, 6, 15))[0]
+    contacts.update_contact(db, june.id, ContactUpdate(birthday=date(1985, 7, 1)), 1)
+    assert contacts.get_upcoming_birthdays(db, 1, days=0, today=date(2026, 6, 15)) == []
+    assert _names(contacts.get_upcoming_birthdays(db, 1, days=20, today=date(2026, 6, 15))) == ["jun15"]
@@ -0,0 +1,130 @@
+import asyncio
+import time
+import fakeredis
+import pytest
+import redis
+from redis.backoff import NoBackoff
+from redis.retry import Retry
+from sqlalchemy.orm import sessionmaker
+from starlette.responses import Response
+from src.repository.database.db import ReplicaSet, RoutingSession
+from src.repository.database.models import Contact, User, UserRole
+from src.services import cache
+from src.services.cache import LocalCache, deserialize_user, serialize_user
+
+
+def test_local_cache_counts_hits_misses_and_evictions():
+    cache = LocalCache(maxsize=2, ttl=60)
+    cache.set("a", 1)
+    cache.set("b", 2)
+    assert cache.get("a") == 1
+    cache.set("c", 3)
+    assert cache.get("b") is None
+    assert cache.stats() == {"hits": 1, "misses": 1, "evictions": 1, "size": 2}
+
+
+def test_local_cache_expires_entries():
+    cache = LocalCache(maxsize=10, ttl=0.01)
+    cache.set("a", 1)
+    time.sleep(0.02)
+    assert cache.get("a") is None
+    assert cache.stats()["size"] == 0
+
+
+def test_user_serializer_roundtrip_without_password():
+    user = User(id=7, username="u", email="u@example.com", hashed_password="x",
+                is_active=True, avatar_url=None, confirmed=True, role=UserRole.admin)
+    data = serialize_user(user)
+    assert "hashed_password" not in data
+    restored = deserialize_user(data)
+    assert restored.id == 7 and restored.role == UserRole.admin and restored.confirmed
+
+
+@pytest.fixture
+def fake_redis(monkeypatch):
+    client = fakeredis.FakeRedis(decode_responses=True)
+    monkeypatch.setattr(cache, "results_r", client)
+    monkeypatch.setattr(cache, "_result_cache_down_until", 0.0)
+    return client
+
+
+def _builder(calls, body=b'[{"id": 1}]', delay=0.0):
+    async def build():
+        calls.append(1)
+        await asyncio.sleep(delay)
+        return Response(body, headers={"ETag": 'W/"x"'}, media_type="application/json")
+    return build
+
+
+def test_result_cache_serves_until_generation_bump(fake_redis):
+    calls = []
+    first = asyncio.run(cache.cached_response(1, "list", {"name": "bob"}, _builder(calls)))
+    second = asyncio.run(cache.cached_response(1, "list", {"name": "bob"}, _builder(calls)))
+    assert len(calls) == 1
+    assert second.body == first.body and second.headers["etag"] == 'W/"x"'
+
+    asyncio.run(cache.cached_response(2, "list", {"name": "bob"}, _builder(calls)))
+    cache.bump_generation(1)
+    asyncio.run(cache.cached_response(1, "list", {"name": "bob"}, _builder(calls)))
+    asyncio.run(cache.cached_response(2, "list", {"name": "bob"}, _builder(calls)))
+    assert len(calls) == 3
+
+
+def test_result_cache_skips_large_and_uncacheable_responses(fake_redis, monkeypatch):
+    monkeypatch.setattr(cache, "RESULT_CACHE_MAX_BYTES", 8)
+    calls = []
+    for _ in range(2):
+        asyncio.run(cache.cached_response(1, "list", {}, _builder(calls, body=b"[" + b"0," * 10 + b"0]")))
+    assert len(calls) == 2
+
+    async def not_modified():
+        calls.append(1)
+        return Response(status_code=304)
+    for _ in range(2):
+        asyncio.run(cache.cached_response(1, "search", {}, not_modified))
+    assert len(calls) == 4
+
+
+def test_result_cache_single_flight(fake_redis):
+    calls = []
+
+    async def burst():
+        return await asyncio.gather(*(
+            cache.cached_response(1, "list", {}, _builder(calls, delay=0.2)) for _ in range(10)
+        ))
+    responses = asyncio.run(burst())
+    assert len(calls) == 1
+    assert {r.body for r in responses} == {b'[{"id": 1}]'}
+
+
+def test_result_cache_fills_from_the_primary(fake_redis, monkeypatch, make_sqlite_engine):
+    engines = {}
+    for name in ("primary", "replica"):
+        engines[name] = make_sqlite_engine(name)
+        with sessionmaker(bind=engines[name])() as db:
+            db.add(Contact(first_name=name, last_name="L", email=f"{name}@example.com", user_id=1))
+            db.commit()
+    Session = sessionmaker(class_=RoutingSession, bind=engines["primary"])
+
+    def read_name(db):
+        async def build():
+            return Response(db.query(Contact.first_name).scalar().encode())
+        return build
+
+    with Session(replicas=ReplicaSet([engines["replica"]])) as db:
+        assert asyncio.run(cache.cached_response(1, "list", {}, read_name(db), db)).body == b"primary"
+    # Nothing is stored without the cache, so the read may stay on the replica.
+    monkeypatch.setattr(cache, "RESULT_CACHE_ENABLED", False)
+    with Session(replicas=ReplicaSet([engines["replica"]])) as db:
+        assert asyncio.run(cache.cached_response(1, "list", {}, read_name(db), db)).body == b"replica"
+
+
+def test_result_cache_without_redis(monkeypatch):
+    monkeypatch.setattr(cache, "results_r", redis.Redis(port=1, retry=Retry(NoBackoff(), 0)))
+    monkeypatch.setattr(cache, "_result_cache_down_until", 0.0)
+    calls = []
+    for _ in range(2):
+        response = asyncio.run(cache.cached_response(1, "list", {}, _builder(calls)))
+        assert response.status_code == 200
+    assert len(calls) == 2
+    cache.bump_generation(1)
@@ -0,0 +1,95 @@
+from datetime import date
+from src.repository import contacts
+from src.schemas import ContactBatchUpdateItem, ContactCreate, ContactUpdate
+
+
+def _new(i):
+    return ContactCreate(first_name=f"F{i}", last_name="L", email=f"c{i}@example.com",
+                         phone=str(i), birthday=date(1990, 1, 1))
+
+
+def _sync(db, user_id, since, limit=2):
+    upserted, deleted = {}, set()
+    while True:
+        page, gone, since, has_more = contacts.get_changes(db, user_id, since, limit)
+        for c in page:
+            upserted[c.id] = c.phone
+        for contact_id in gone:
+            upserted.pop(contact_id, None)
+            deleted.add(contact_id)
+        if not has_more:
+            return upserted, deleted, since
+
+
+def test_feed_reports_creates_updates_and_deletes(sqlite_session):
+    for i in range(3):
+        contacts.create_contact(sqlite_session, _new(i), 1)
+    contacts.bulk_insert_contacts(sqlite_session, 1, [_new(i) for i in range(3, 6)])
+    contacts.create_contact(sqlite_session, _new(99), 2)
+
+    state, deleted, since = _sync(sqlite_session, 1, 0)
+    assert len(state) == 6 and not deleted
+
+    contacts.update_contact(sqlite_session, 2, ContactUpdate(phone="updated"), 1)
+    contacts.delete_contact(sqlite_session, 3, 1)
+    changed, deleted, since = _sync(sqlite_session, 1, since)
+    assert changed == {2: "updated"}
+    assert deleted == {3}
+
+    assert contacts.get_changes(sqlite_session, 1, since) == ([], [], since, False)
+
+
+def test_sequence_increases_per_user(sqlite_session):
+    a = contacts.create_contact(sqlite_session, _new(0), 1)
+    b = contacts.create_contact(sqlite_session, _new(1), 1)
+    other = contacts.create_contact(sqlite_session, _new(2), 2)
+    assert b.change_seq == a.change_seq + 1
+    assert other.change_seq == 1
+    updated = contacts.update_contact(sqlite_session, a.id, ContactUpdate(phone="x"), 1)
+    assert updated.change_seq == b.change_seq + 1
+
+
+def test_batch_update_is_set_based_and_reported_per_item(sqlite_session):
+    for i in range(4):
+        contacts.create_contact(sqlite_session, _new(i), 1)
+    contacts.create_contact(sqlite_session, _new(9), 2)
+    state, _, since = _sync(sqlite_session, 1, 0)
+
+    items = [ContactBatchUpdateItem(id=i, additional_info="vip") for i in (1, 2, 3)]
+    items += [ContactBatchUpdateItem(id=4, email="c0@example.com"), ContactBatchUpdateItem(id=5, phone="x"),
+              ContactBatchUpdateItem(id=1, phone="again")]
+    results = contacts.update_contacts_batch(sqlite_session, 1, items)
+    assert [r["status"] for r in results] == ["updated"] * 3 + ["conflict", "not_found", "duplicate"]
+
+    sqlite_session.expire_all()
+    rows = {c.id: c for c in contacts.get_contacts(sqlite_session, 1)}
+    assert [rows[i].additional_info for i in (1, 2, 3)] == ["vip"] * 3
+    assert rows[1].version == 2 and rows[4].version == 1
+    changed, _, _ = _sync(sqlite_session, 1, since)
+    assert set(changed) == {1, 2, 3}
+
+
+def test_batch_delete_writes_tombstones(sqlite_session):
+    for i in range(3):
+        contacts.create_contact(sqlite_session, _new(i), 1)
+    other = contacts.create_contact(sqlite_session, _new(9), 2)
+    _, _, since = _sync(sqlite_session, 1, 0)
+
+    results = contacts.delete_contacts_batch(sqlite_session, 1, [1, 3, other.id, 1])
+    assert [r["status"] for r in results] == ["deleted", "deleted", "not_found", "duplicate"]
+    assert [c.id for c in contacts.get_contacts(sqlite_session, 1)] == [2]
+    _, deleted, _ = _sync(sqlite_session, 1, since)
+    assert deleted == {1, 3}
+
+
+def test_batch_update_reserves_one_number_per_row(sqlite_session):
+    first = contacts.create_contact(sqlite_session, _new(0), 1)
+    contacts.bulk_insert_contacts(sqlite_session, 2, [_new(i) for i in range(1, 200)])
+    last = contacts.create_contact(sqlite_session, _new(200), 1)
+    top = last.change_seq
+
+    items = [ContactBatchUpdateItem(id=last.id, phone="b"), ContactBatchUpdateItem(id=first.id, phone="a")]
+    contacts.update_contacts_batch(sqlite_session, 1, items)
+    sqlite_session.expire_all()
+    assert [c.change_seq for c in contacts.get_contacts(sqlite_session, 1)] == [top + 1, top + 2]
+    assert contacts.create_contact(sqlite_session, _new(201), 1).change_seq == top + 3
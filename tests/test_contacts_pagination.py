@@ -0,0 +1,62 @@
+import base64
+import json
+from datetime import date
+import pytest
+from src.repository import contacts
+from src.repository.database.models import Contact
+from src.schemas import ContactUpdate
+
+
+@pytest.fixture
+def db(sqlite_session):
+    names = [("Smith", "Anna"), ("Smith", "Bob"), ("Adams", "Zoe"), ("Brown", "Carl"), ("Smith", "Anna")]
+    for i, (last, first) in enumerate(names):
+        sqlite_session.add(Contact(first_name=first, last_name=last, email=f"c{i}@example.com",
+                                   phone=str(i), birthday=date(1990, 1, 1), user_id=1))
+    sqlite_session.add(Contact(first_name="Other", last_name="Owner", email="o@example.com",
+                               phone="9", birthday=date(1990, 1, 1), user_id=2))
+    sqlite_session.commit()
+    return sqlite_session
+
+
+def test_pages_follow_keyset_order(db):
+    seen, cursor = [], None
+    while True:
+        items, cursor = contacts.get_contacts_page(db, 1, limit=2, cursor=cursor)
+        seen += [(c.last_name, c.first_name, c.id) for c in items]
+        if not cursor:
+            break
+    assert seen == sorted(seen)
+    assert len(seen) == 5
+
+
+def test_projection_returns_only_requested_fields(db):
+    items, next_cursor = contacts.get_contacts_page(db, 1, limit=10, fields=["email"])
+    assert next_cursor is None
+    assert items[0] == {"email": "c2@example.com"}
+
+
+def test_invalid_field_and_cursor_rejected(db):
+    with pytest.raises(ValueError):
+        contacts.get_contacts_page(db, 1, fields=["hashed_password"])
+    with pytest.raises(ValueError):
+        contacts.get_contacts_page(db, 1, cursor="not-a-cursor")
+
+
+@pytest.mark.parametrize("key", [[{"a": 1}, [1], 3], ["Smith", "Anna", True], ["Smith", 5, 3], ["Smith", "Anna", "3"]])
+def test_cursor_values_are_type_checked(db, key):
+    cursor = base64.urlsafe_b64encode(json.dumps(key).encode()).decode()
+    with pytest.raises(ValueError):
+        contacts.get_contacts_page(db, 1, cursor=cursor)
+
+
+def test_missing_names_do_not_end_pagination(db):
+    contacts.update_contact(db, 2, ContactUpdate(last_name=None), 1)
+    contacts.update_contact(db, 4, ContactUpdate(last_name=None, first_name=None), 1)
+    seen, cursor = [], None
+    while True:
+        items, cursor = contacts.get_contacts_page(db, 1, limit=1, cursor=cursor)
+        seen += [c.id for c in items]
+        if not cursor:
+            break
+    assert seen == [4, 2, 3, 1, 5]
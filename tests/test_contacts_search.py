@@ -0,0 +1,35 @@
+from datetime import date
+import pytest
+from src.repository import contacts
+from src.repository.database.models import Contact
+from src.schemas import ContactUpdate
+
+
+@pytest.fixture
+def db(sqlite_session):
+    people = [("Alexander", "Hamilton", "alex@treasury.gov"), ("Alexandra", "Stone", "astone@example.com"),
+              ("Bob", "Alexis", "bob@example.com"), ("Carol", "King", "carol@example.com")]
+    for first, last, email in people:
+        sqlite_session.add(Contact(first_name=first, last_name=last, email=email,
+                                   phone="1", birthday=date(1990, 1, 1), user_id=1))
+    sqlite_session.add(Contact(first_name="Alex", last_name="Elsewhere", email="alex@other.com",
+                               phone="1", birthday=date(1990, 1, 1), user_id=2))
+    sqlite_session.commit()
+    return sqlite_session
+
+
+def test_prefix_search_uses_fts_and_scopes_by_user(db):
+    found = contacts.search_contacts(db, 1, "alex")
+    assert {c.last_name for c in found} == {"Hamilton", "Stone", "Alexis"}
+
+
+def test_search_matches_email_and_follows_updates(db):
+    assert [c.first_name for c in contacts.search_contacts(db, 1, "treasury")] == ["Alexander"]
+    carol = contacts.search_contacts(db, 1, "carol")[0]
+    contacts.update_contact(db, carol.id, ContactUpdate(first_name="Caroline", last_name="Queen"), 1)
+    assert contacts.search_contacts(db, 1, "king") == []
+    assert [c.id for c in contacts.search_contacts(db, 1, "queen")] == [carol.id]
+
+
+def test_search_quotes_user_input(db):
+    assert contacts.search_contacts(db, 1, 'al"ex OR *') == []
@@ -0,0 +1,64 @@
+from datetime import date
+import pytest
+from sqlalchemy.orm import sessionmaker
+from sqlalchemy.orm.exc import StaleDataError
+from src.repository import contacts
+from src.repository.database.models import Contact
+from src.schemas import ContactUpdate
+from src.services import etags
+
+
+@pytest.fixture
+def Session(sqlite_engine, sqlite_session):
+    for i in range(3):
+        sqlite_session.add(Contact(first_name=f"F{i}", last_name="L", email=f"c{i}@example.com",
+                                   phone=str(i), birthday=date(1990, 1, 1), user_id=1))
+    sqlite_session.commit()
+    return sessionmaker(bind=sqlite_engine)
+
+
+def test_update_bumps_version_and_list_etag(Session):
+    with Session() as db:
+        before = contacts.get_contacts_version(db, 1)
+        assert before[0] == 3
+        updated = contacts.update_contact(db, 1, ContactUpdate(phone="555"), 1)
+        assert updated.version == 2
+        after = contacts.get_contacts_version(db, 1)
+        assert after[0] == 3 and after[1] >= before[1]
+        assert etags.list_etag(1, *before) != etags.list_etag(1, *after)
+        assert contacts.get_contacts_version(db, 2) == (0, None)
+
+
+def test_if_match_rejects_stale_version(Session):
+    with Session() as db:
+        with pytest.raises(contacts.StaleContact):
+            contacts.update_contact(db, 1, ContactUpdate(phone="1"), 1, expected_versions={7})
+        assert contacts.update_contact(db, 1, ContactUpdate(phone="1"), 1, expected_versions={1}).version == 2
+        with pytest.raises(contacts.StaleContact):
+            contacts.delete_contact(db, 1, 1, expected_versions={1})
+        assert contacts.delete_contact(db, 1, 1, expected_versions={2}) is not None
+
+
+def test_concurrent_update_is_detected(Session):
+    with Session() as first, Session() as second:
+        contact = first.get(Contact, (1, 2))
+        contacts.update_contact(second, 2, ContactUpdate(phone="second"), 1)
+        contact.phone = "first"
+        with pytest.raises(StaleDataError):
+            first.commit()
+
+
+def test_header_matching():
+    etag = etags.contact_etag(5, 3)
+    assert etag == '"5-3"'
+    assert etags.none_match('"5-3"', etag)
+    assert etags.none_match('W/"1-1", W/"5-3"', etag)
+    assert etags.none_match("*", etag)
+    assert not etags.none_match('W/"5-2"', etag)
+    assert not etags.none_match(None, etag)
+    assert etags.match_versions(None, 5) is None
+    assert etags.match_versions("*", 5) is None
+    assert etags.match_versions('"5-3", "5-4", "6-1"', 5) == {3, 4}
+    assert etags.match_versions('W/"5-3", "5-4"', 5) == {4}
+    assert etags.match_versions('W/"5-3"', 5) == set()
+    assert etags.match_versions('"junk"', 5) == set()
@@ -0,0 +1,42 @@
+import asyncio
+from datetime import date
+from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
+from src.repository import contacts
+from src.repository.database.models import Base, Contact
+from src.services import exporter
+
+
+async def _export(format: str) -> str:
+    engine = create_async_engine("sqlite+aiosqlite:///:memory:")
+    async with engine.begin() as conn:
+        await conn.run_sync(Base.metadata.create_all)
+    async with async_sessionmaker(engine)() as db:
+        db.add_all([
+            Contact(first_name="Ada", last_name="Lovelace", email="ada@example.com", phone="1",
+                    birthday=date(1815, 12, 10), additional_info="Notes; with, commas", user_id=1),
+            Contact(first_name="Alan", last_name="Turing", email="alan@example.com", phone="2",
+                    birthday=date(1912, 6, 23), user_id=1),
+            Contact(first_name="Other", last_name="User", email="o@example.com", phone="3",
+                    birthday=date(1990, 1, 1), user_id=2),
+        ])
+        await db.commit()
+    rows = contacts.stream_contacts_async(engine, 1, batch_size=1)
+    body = "".join([chunk async for chunk in exporter.export_chunks_async(rows, format)])
+    await engine.dispose()
+    return body
+
+
+def test_csv_export_streams_only_user_rows():
+    lines = asyncio.run(_export("csv")).splitlines()
+    assert lines[0] == ",".join(contacts.EXPORT_FIELDS)
+    assert len(lines) == 3
+    assert "o@example.com" not in "".join(lines)
+
+
+def test_ndjson_and_vcard_export():
+    ndjson = asyncio.run(_export("ndjson")).splitlines()
+    assert '"birthday": "1815-12-10"' in ndjson[0]
+    vcf = asyncio.run(_export("vcf"))
+    assert vcf.count("BEGIN:VCARD") == 2
+    assert "NOTE:Notes\\; with\\, commas" in vcf
+    assert "N:Turing;Alan;;;" in vcf
@@ -0,0 +1,25 @@
+from sqlalchemy.pool import NullPool
+from src.repository.database import db
+
+
+def test_db_health_reports_pool_usage(client):
+    response = client.get("/health/db")
+    assert response.status_code == 200
+    body = response.json()
+    assert body["status"] == "ok"
+    assert body["capacity"] == body["size"] + 10
+    assert 0 <= body["saturation"] < 1
+
+
+def test_engine_options_pgbouncer_mode(monkeypatch):
+    monkeypatch.setattr(db, "DB_PGBOUNCER", True)
+    monkeypatch.setattr(db, "DB_STATEMENT_TIMEOUT_MS", 5000)
+    options = db.engine_options("postgresql+asyncpg://u:p@host/db")
+    assert options["poolclass"] is NullPool
+    assert "pool_size" not in options
+    assert options["connect_args"] == {
+        "statement_cache_size": 0,
+        "prepared_statement_cache_size": 0,
+        "server_settings": {"statement_timeout": "5000"},
+    }
+    assert db.engine_options("postgresql://u:p@host/db")["connect_args"] == {"options": "-c statement_timeout=5000"}
@@ -0,0 +1,85 @@
+import asyncio
+from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
+from src.repository import contacts
+from src.repository.database.models import Base
+from src.services import importer
+
+
+async def _chunks(data: bytes, size: int = 7):
+    for i in range(0, len(data), size):
+        yield data[i:i + size]
+
+
+async def _run(parse, body: bytes, batch_size: int = 2):
+    engine = create_async_engine("sqlite+aiosqlite:///:memory:")
+    async with engine.begin() as conn:
+        await conn.run_sync(Base.metadata.create_all)
+    async with async_sessionmaker(engine, expire_on_commit=False)() as db:
+        report = await importer.import_contacts(db, 1, parse(_chunks(body)), batch_size=batch_size)
+        stored = await contacts.get_contacts_async(db, 1)
+    await engine.dispose()
+    return report, stored
+
+
+def test_csv_import_reports_bad_rows_and_duplicates():
+    body = (
+        "first_name,last_name,email,phone,birthday,additional_info\n"
+        "Ada,Lovelace,ada@example.com,1,1815-12-10,\"Wrote the first\nprogram\"\n"
+        "Bad,Row,not-an-email,2,1990-01-01,\n"
+        "Alan,Turing,alan@example.com,3,1912-06-23,\n"
+        "Ada,Again,ada@example.com,4,1990-01-01,\n"
+    ).encode()
+    report, stored = asyncio.run(_run(importer.iter_csv_records, body))
+    assert report["inserted"] == 2
+    assert [e["row"] for e in report["errors"]] == [2, 4]
+    assert {c.email for c in stored} == {"ada@example.com", "alan@example.com"}
+    assert next(c for c in stored if c.last_name == "Lovelace").additional_info == "Wrote the first\nprogram"
+
+
+def test_ndjson_import_flags_malformed_lines():
+    body = (
+        b'{"first_name":"Ada","last_name":"L","email":"ada@example.com","phone":"1","birthday":"1815-12-10"}\n'
+        b'not json\n'
+        b'{"first_name":"Alan","last_name":"T","email":"alan@example.com","phone":"3"}\n'
+    )
+    report, stored = asyncio.run(_run(importer.iter_ndjson_records, body))
+    assert report["inserted"] == 1 and report["failed"] == 2
+    assert report["errors"][0] == {"row": 2, "error": "Malformed row"}
+    assert "birthday" in report["errors"][1]["error"]
+
+
+def test_csv_stray_quote_does_not_swallow_following_rows():
+    body = (
+        "first_name,last_name,email,phone,birthday,additional_info\n"
+        'Tall,One,tall@example.com,1,1990-01-01,height 5ft 10"\n'
+        "Alan,Turing,alan@example.com,3,1912-06-23,\n"
+        "Grace,Hopper,grace@example.com,4,1906-12-09,\n"
+    ).encode()
+    report, stored = asyncio.run(_run(importer.iter_csv_records, body))
+    assert report["inserted"] == 3 and report["failed"] == 0
+    assert next(c for c in stored if c.last_name == "One").additional_info == 'height 5ft 10"'
+
+
+def test_csv_unterminated_quote_is_bounded():
+    body = (
+        "first_name,last_name,email,phone,birthday,additional_info\n"
+        'Open,Quote,open@example.com,1,1990-01-01,"never closed\n'
+        "Alan,Turing,alan@example.com,3,1912-06-23,\n"
+        "Grace,Hopper,grace@example.com,4,1906-12-09,\n"
+    ).encode()
+    report, stored = asyncio.run(_run(importer.iter_csv_records, body))
+    assert report["inserted"] == 2
+    assert report["errors"] == [{"row": 1, "error": "Malformed row"}]
+
+    async def records(max_bytes):
+        return [r async for r in importer.iter_csv_records(_chunks(body), max_record_bytes=max_bytes)]
+    rows = asyncio.run(records(80))
+    assert [record is None for _, record in rows] == [True, False, False]
+
+
+def test_overlong_line_is_dropped_not_buffered():
+    body = b'{"a": "' + b"x" * 5000 + b'"}\n{"first_name": "Ada"}\n'
+
+    async def lines():
+        return [line async for line in importer.iter_lines(_chunks(body, 100), max_line_bytes=1000)]
+    assert asyncio.run(lines()) == [None, '{"first_name": "Ada"}\n']
@@ -0,0 +1,76 @@
+import asyncio
+import json
+import time
+import fakeredis
+import pytest
+from src.services.jobs import InMemoryQueue, RedisQueue, Worker, enqueue, task
+
+calls = []
+
+
+@task("test_record")
+async def record(value):
+    calls.append(value)
+
+
+@task("test_flaky")
+def flaky(failures):
+    calls.append("try")
+    if calls.count("try") <= failures:
+        raise RuntimeError("boom")
+
+
+def _drain(queue, rounds=1):
+    for _ in range(rounds):
+        asyncio.run(Worker(queue, concurrency=2, worker_id="test", backoff=0).run(burst=True))
+
+
+def test_jobs_run_once_per_idempotency_key():
+    calls.clear()
+    queue = InMemoryQueue()
+    assert enqueue(queue, "test_record", 1, idempotency_key="k")
+    assert enqueue(queue, "test_record", 1, idempotency_key="k") is None
+    enqueue(queue, "test_record", 2)
+    _drain(queue)
+    assert sorted(calls) == [1, 2]
+    assert not queue.ready and not any(queue.processing.values())
+
+
+def test_failed_jobs_are_retried_then_dead_lettered():
+    calls.clear()
+    queue = InMemoryQueue()
+    enqueue(queue, "test_flaky", 2, max_attempts=5)
+    _drain(queue, rounds=3)
+    assert calls == ["try"] * 3 and not queue.dead
+
+    calls.clear()
+    enqueue(queue, "test_flaky", 10, max_attempts=2)
+    _drain(queue, rounds=3)
+    assert calls == ["try"] * 2
+    assert json.loads(queue.dead[0])["attempts"] == 2
+
+
+def test_unfinished_jobs_are_recovered():
+    calls.clear()
+    queue = InMemoryQueue()
+    enqueue(queue, "test_record", 3)
+    queue.reserve("test", 0)
+    _drain(queue)
+    assert calls == [3]
+
+
+@pytest.mark.parametrize("make_queue", [InMemoryQueue, lambda: RedisQueue(fakeredis.FakeRedis())])
+def test_jobs_of_a_dead_worker_are_recovered_by_another(make_queue):
+    calls.clear()
+    queue = make_queue()
+    enqueue(queue, "test_record", "dead")
+    enqueue(queue, "test_record", "alive")
+    queue.heartbeat("crashed", 0.05)
+    queue.reserve("crashed", 0)
+    queue.heartbeat("busy", 60)
+    queue.reserve("busy", 0)
+    time.sleep(0.1)
+
+    _drain(queue)
+    assert calls == ["dead"]
+    assert queue.recover("busy") == 1
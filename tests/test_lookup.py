@@ -0,0 +1,83 @@
+from datetime import date
+import pytest
+from sqlalchemy import text
+from src.repository import contacts
+from src.repository.database.backfill import backfill_normalized
+from src.repository.database.models import normalize_phone
+from src.schemas import ContactBatchUpdateItem, ContactCreate, ContactUpdate
+
+
+def _new(i, phone, email=None):
+    return ContactCreate(first_name=f"F{i}", last_name="L", email=email or f"c{i}@example.com",
+                         phone=phone, birthday=date(1990, 1, 1))
+
+
+@pytest.mark.parametrize("raw, expected", [
+    ("+1 (555) 010-2000", "+15550102000"),
+    ("15550102000", "+15550102000"),
+    ("555.010.2000", "+15550102000"),
+    ("+1 555 010 2000 ext. 12", "+15550102000"),
+    ("00380 50 123 4567", "+380501234567"),
+    ("+44 20 7946 0958", "+442079460958"),
+    ("911", None),
+    ("n/a", None),
+    (None, None),
+])
+def test_normalize_phone(raw, expected):
+    assert normalize_phone(raw) == expected
+
+
+def test_trunk_prefix_uses_default_country_code():
+    assert normalize_phone("050 123 4567", "380") == "+380501234567"
+
+
+def test_every_write_path_keeps_normalized_columns(sqlite_session):
+    created = contacts.create_contact(sqlite_session, _new(1, "(555) 010-0001", "Ann@Example.com"), 1)
+    assert (created.phone_e164, created.email_lower) == ("+15550100001", "ann@example.com")
+
+    updated = contacts.update_contact(sqlite_session, created.id, ContactUpdate(phone="+1 555 010 0009"), 1)
+    assert updated.phone_e164 == "+15550100009"
+
+    contacts.bulk_insert_contacts(sqlite_session, 1, [_new(2, "555-010-0002", "Bob@Example.com")])
+    contacts.update_contacts_batch(sqlite_session, 1, [
+        ContactBatchUpdateItem(id=2, phone="15550100003", email="BOB2@example.com")])
+    sqlite_session.expire_all()
+    bob = contacts.get_contact(sqlite_session, 2, 1)
+    assert (bob.phone_e164, bob.email_lower) == ("+15550100003", "bob2@example.com")
+
+
+def test_lookup_matches_any_formatting(sqlite_session):
+    contacts.create_contact(sqlite_session, _new(1, "15550102000", "Ann@Example.com"), 1)
+    contacts.create_contact(sqlite_session, _new(2, "+1 555 010 2000"), 1)
+    contacts.create_contact(sqlite_session, _new(3, "555 010 2000"), 2)
+
+    assert [c.id for c in contacts.lookup_contacts(sqlite_session, 1, phone="+1 (555) 010-2000")] == [1, 2]
+    assert [c.id for c in contacts.lookup_contacts(sqlite_session, 1, email=" ANN@example.COM")] == [1]
+    assert contacts.lookup_contacts(sqlite_session, 1, phone="not a number") == []
+
+
+def test_batch_lookup_keys_results_by_input(sqlite_session):
+    for i in range(5):
+        contacts.create_contact(sqlite_session, _new(i, f"555-010-{i:04d}"), 1)
+    contacts.create_contact(sqlite_session, _new(9, "555-010-0001"), 2)
+
+    phones, emails = contacts.lookup_contacts_batch(
+        sqlite_session, 1, phones=["+15550100001", "(555) 010-0003", "555 999 9999", "x"], emails=["C4@example.com"]
+    )
+    assert {k: [c.id for c in v] for k, v in phones.items()} == {
+        "+15550100001": [2], "(555) 010-0003": [4], "555 999 9999": [], "x": [],
+    }
+    assert [c.id for c in emails["C4@example.com"]] == [5]
+
+
+def test_backfill_fills_and_skips_current_rows(sqlite_engine, sqlite_session):
+    for i in range(7):
+        contacts.create_contact(sqlite_session, _new(i, f"555-010-{i:04d}", f"User{i}@Example.com"), 1)
+    with sqlite_engine.begin() as conn:
+        conn.execute(text("UPDATE contacts SET phone_e164 = NULL, email_lower = NULL WHERE id > 3"))
+
+    with sqlite_engine.connect() as conn:
+        assert backfill_normalized(conn, batch_size=2, commit=True) == 4
+        assert backfill_normalized(conn, batch_size=2, commit=True) == 0
+        assert conn.execute(text("SELECT phone_e164, email_lower FROM contacts WHERE id = 7")).one() == (
+            "+15550100006", "user6@example.com")
@@ -0,0 +1,26 @@
+from sqlalchemy import create_engine, text
+from src.services import metrics
+
+
+def test_metrics_endpoint_reports_route_templates(client):
+    client.get("/contacts/123")
+    body = client.get("/metrics").text
+    assert 'route="/contacts/{contact_id}"' in body
+    assert "user_cache_l1_hits" in body
+    assert "db_queries_per_request_count" in body
+
+
+def test_queries_are_counted_per_request():
+    engine = create_engine("sqlite://")
+    metrics.instrument_engine(engine)
+    metrics.instrument_engine(engine)
+    stats = {"queries": 0, "seconds": 0.0}
+    token = metrics._request_stats.set(stats)
+    try:
+        with engine.connect() as conn:
+            conn.execute(text("SELECT 1"))
+            conn.execute(text("SELECT 2"))
+    finally:
+        metrics._request_stats.reset(token)
+    assert stats["queries"] == 2
+    assert stats["seconds"] > 0
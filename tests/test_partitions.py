@@ -0,0 +1,132 @@
+import importlib.util
+import os
+import re
+from datetime import date
+from pathlib import Path
+import pytest
+from sqlalchemy import create_engine, text
+from sqlalchemy.orm import sessionmaker
+from src.conf.config import CONTACTS_PARTITIONS
+from src.repository import contacts
+from src.repository.database.backfill import backfill_normalized
+from src.repository.database.models import Base, ContactChangeCounter, ContactTombstone, User
+from src.repository.database.partitions import partition_stats, skew_report
+from src.schemas import ContactCreate, ContactUpdate
+
+POSTGRES_URL = os.getenv("TEST_POSTGRES_URL")
+MIGRATION = Path(__file__).parent.parent / "alembic" / "versions" / "d9c3f1a6b8e4_contacts_hash_partitioning.py"
+
+# contacts as it was before the partitioning revision.
+OLD_LAYOUT = [
+    "DROP TABLE IF EXISTS contacts, contact_tombstones, contact_change_counters, users CASCADE",
+    "CREATE TABLE users (id serial PRIMARY KEY, username varchar UNIQUE, email varchar NOT NULL, "
+    "hashed_password varchar NOT NULL, is_active boolean, avatar_url varchar, confirmed boolean, role varchar)",
+    "CREATE TABLE contacts (id serial PRIMARY KEY, first_name varchar, last_name varchar, email varchar, "
+    "phone varchar, birthday date, birthday_md smallint, additional_info varchar, "
+    "user_id integer REFERENCES users (id), updated_at timestamptz NOT NULL DEFAULT now(), "
+    "version integer NOT NULL DEFAULT 1, change_seq bigint)",
+    "CREATE UNIQUE INDEX ix_contacts_email ON contacts (email)",
+]
+# Added by later revisions; the ORM below expects them.
+LATER_COLUMNS = "ALTER TABLE contacts ADD COLUMN phone_e164 varchar, ADD COLUMN email_lower varchar"
+
+
+def test_skew_report():
+    stats = [{"name": f"contacts_p{i:02d}", "rows": rows, "bytes": 8192} for i, rows in enumerate([10, 10, 10, 30])]
+    report = skew_report(stats)
+    assert report["rows"] == 60 and report["partitions"] == 4
+    assert report["skew"] == 2.0
+    assert report["max_rows"] == 30 and report["min_rows"] == 10
+    assert skew_report([])["skew"] is None
+
+
+@pytest.fixture
+def pg():
+    if not POSTGRES_URL:
+        pytest.skip("TEST_POSTGRES_URL is not set")
+    pytest.importorskip("alembic")
+    spec = importlib.util.spec_from_file_location("partition_migration", MIGRATION)
+    migration = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(migration)
+    engine = create_engine(POSTGRES_URL)
+    with engine.begin() as conn:
+        for statement in OLD_LAYOUT:
+            conn.exec_driver_sql(statement)
+        conn.exec_driver_sql(
+            "INSERT INTO users (username, email, hashed_password) "
+            "SELECT 'u' || i, 'u' || i || '@example.com', 'x' FROM generate_series(1, 20) AS i"
+        )
+        conn.exec_driver_sql(
+            "INSERT INTO contacts (first_name, last_name, email, user_id, change_seq) "
+            "SELECT 'F' || i, 'L' || i, 'c' || i || '@example.com', 1 + mod(i, 20), i FROM generate_series(1, 2000) AS i"
+        )
+    ContactChangeCounter.__table__.create(engine)
+    ContactTombstone.__table__.create(engine)
+    yield engine, migration
+    engine.dispose()
+
+
+def test_data_moves_into_partitions_and_back(pg):
+    engine, migration = pg
+    with engine.begin() as conn:
+        migration.move_to_partitioned(conn, 4)
+        conn.exec_driver_sql(LATER_COLUMNS)
+        assert backfill_normalized(conn, batch_size=300) == 2000
+
+    with engine.connect() as conn:
+        assert conn.scalar(text("SELECT relkind FROM pg_class WHERE relname = 'contacts'")) == "p"
+        stats = partition_stats(conn, exact=True)
+        assert [p["name"] for p in stats] == ["contacts_p00", "contacts_p01", "contacts_p02", "contacts_p03"]
+        assert skew_report(stats)["rows"] == 2000
+        plan = "\n".join(conn.scalars(text("EXPLAIN SELECT * FROM contacts WHERE user_id = 3 AND id = 10")))
+        assert len(set(re.findall(r" on (contacts_p\d+)", plan))) == 1
+
+    with sessionmaker(bind=engine)() as db:
+        created = contacts.create_contact(db, ContactCreate(
+            first_name="New", last_name="One", email="c5@example.com", phone="1", birthday=date(1990, 1, 1)), 2)
+        assert created.id == 2001
+        assert contacts.update_contact(db, created.id, ContactUpdate(phone="2"), 2, expected_versions={1}).version == 2
+        assert contacts.bulk_insert_contacts(db, 2, [ContactCreate(
+            first_name="Dup", last_name="One", email="c5@example.com", phone="1", birthday=date(1990, 1, 1))]) == set()
+        assert contacts.delete_contact(db, created.id, 2) is not None
+
+    with engine.begin() as conn:
+        migration.move_to_unpartitioned(conn)
+    with engine.connect() as conn:
+        assert conn.scalar(text("SELECT relkind FROM pg_class WHERE relname = 'contacts'")) == "r"
+        assert conn.scalar(text("SELECT count(*) FROM contacts")) == 2000
+
+
+def test_move_refuses_contacts_without_owner(pg):
+    engine, migration = pg
+    with engine.begin() as conn:
+        conn.exec_driver_sql("UPDATE contacts SET user_id = NULL WHERE id = 1")
+    with pytest.raises(RuntimeError, match="no user_id"):
+        with engine.begin() as conn:
+            migration.move_to_partitioned(conn, 4)
+
+
+def test_create_all_builds_the_partitioned_table():
+    if not POSTGRES_URL:
+        pytest.skip("TEST_POSTGRES_URL is not set")
+    engine = create_engine(POSTGRES_URL)
+    with engine.begin() as conn:
+        if not conn.scalar(text("SELECT count(*) FROM pg_available_extensions WHERE name = 'pg_trgm'")):
+            pytest.skip("create_all needs pg_trgm")
+        conn.exec_driver_sql(OLD_LAYOUT[0])
+        conn.exec_driver_sql("DROP TYPE IF EXISTS userrole")
+    Base.metadata.create_all(bind=engine)
+    try:
+        with engine.connect() as conn:
+            assert conn.scalar(text("SELECT relkind FROM pg_class WHERE relname = 'contacts'")) == "p"
+            assert len(partition_stats(conn)) == CONTACTS_PARTITIONS
+        with sessionmaker(bind=engine)() as db:
+            user = User(username="p", email="p@example.com", hashed_password="x")
+            db.add(user)
+            db.commit()
+            created = contacts.create_contact(db, ContactCreate(
+                first_name="A", last_name="B", email="a@example.com", phone="1", birthday=date(1990, 1, 1)), user.id)
+            assert contacts.get_contact(db, created.id, user.id).email == "a@example.com"
+    finally:
+        Base.metadata.drop_all(bind=engine)
+        engine.dispose()
@@ -0,0 +1,43 @@
+import socket
+import time
+import pytest
+import redis
+from limits.storage import RedisStorage
+from starlette.requests import Request
+from src.services import auth
+from src.services.limiter import storage_options, user_key
+
+
+def _request(headers):
+    scope = {"type": "http", "headers": [(k.lower().encode(), v.encode()) for k, v in headers.items()],
+             "client": ("10.0.0.1", 1234)}
+    return Request(scope)
+
+
+def test_user_key_prefers_jwt_subject_over_ip():
+    token = auth.create_access_token({"sub": "a@example.com"})
+    assert user_key(_request({"Authorization": f"Bearer {token}"})) == "user:a@example.com"
+    assert user_key(_request({"Authorization": "Bearer garbage"})) == "ip:10.0.0.1"
+    assert user_key(_request({})) == "ip:10.0.0.1"
+
+
+def test_login_is_rate_limited(client):
+    codes = [client.post("/auth/login", data={"username": "nobody@example.com", "password": "x"}).status_code
+             for _ in range(15)]
+    assert codes[0] == 401
+    assert 429 in codes
+
+
+def test_limiter_storage_fails_fast_on_a_stalled_redis():
+    # The server accepts connections but never answers.
+    with socket.socket() as server:
+        server.bind(("127.0.0.1", 0))
+        server.listen()
+        uri = f"redis://127.0.0.1:{server.getsockname()[1]}"
+        storage = RedisStorage(uri, **storage_options(uri, timeout=0.1))
+        start = time.monotonic()
+        with pytest.raises(redis.RedisError):
+            storage.incr("key", 60)
+        assert time.monotonic() - start < 0.5
+    assert storage_options("memory://") == {}
+
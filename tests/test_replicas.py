@@ -0,0 +1,66 @@
+import asyncio
+import pytest
+from sqlalchemy import create_engine, select
+from sqlalchemy.exc import OperationalError
+from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
+from sqlalchemy.orm import sessionmaker
+from src.repository.database.db import ReplicaSet, RoutingSession, read_bind
+from src.repository.database.models import Contact
+
+
+@pytest.fixture
+def seeded_engine(make_sqlite_engine):
+    def make(name):
+        engine = make_sqlite_engine(name)
+        with sessionmaker(bind=engine)() as db:
+            db.add(Contact(first_name=name, last_name="Seed", email=f"{name}@example.com", user_id=1))
+            db.commit()
+        return engine
+    return make
+
+
+def test_reads_use_replica_until_the_session_writes(seeded_engine):
+    primary, replica = seeded_engine("primary"), seeded_engine("replica")
+    Session = sessionmaker(class_=RoutingSession, bind=primary)
+
+    with Session(replicas=ReplicaSet([replica])) as db:
+        assert db.query(Contact.first_name).scalar() == "replica"
+        db.add(Contact(first_name="New", last_name="Row", email="new@example.com", user_id=1))
+        db.commit()
+        assert db.query(Contact).filter(Contact.email == "new@example.com").one().first_name == "New"
+        assert db.query(Contact.first_name).order_by(Contact.id).first()[0] == "primary"
+
+    with Session() as db:
+        assert db.query(Contact.first_name).order_by(Contact.id).first()[0] == "primary"
+
+
+def test_failing_replica_is_ejected(tmp_path, seeded_engine):
+    broken = create_engine(f"sqlite:///{tmp_path}/missing/dir.db")
+    healthy = seeded_engine("healthy")
+    replica_set = ReplicaSet([broken, healthy], eject_seconds=60)
+    assert replica_set.choose() is broken
+
+    with pytest.raises(OperationalError):
+        with broken.connect():
+            pass
+    assert replica_set.is_ejected(broken)
+    assert {replica_set.choose() for _ in range(4)} == {healthy}
+
+
+def test_async_session_streams_from_its_replica(tmp_path, seeded_engine):
+    seeded_engine("primary"), seeded_engine("replica")
+    primary = create_async_engine(f"sqlite+aiosqlite:///{tmp_path}/primary.db")
+    replica = create_async_engine(f"sqlite+aiosqlite:///{tmp_path}/replica.db")
+    Session = async_sessionmaker(primary, sync_session_class=RoutingSession)
+
+    async def run():
+        async with Session(replicas=ReplicaSet([replica])) as db:
+            name = (await db.execute(select(Contact.first_name))).scalar()
+            bind = read_bind(db)
+        await primary.dispose()
+        await replica.dispose()
+        return name, bind
+
+    name, bind = asyncio.run(run())
+    assert name == "replica"
+    assert bind.sync_engine is replica.sync_engine
@@ -0,0 +1,48 @@
+import fakeredis
+import pytest
+from src.services import auth
+from src.services.revocation import BloomFilter, RevocationList
+from src.services.tokens import token_verifier
+
+
+@pytest.fixture
+def revocations(monkeypatch):
+    revocation_list = RevocationList(fakeredis.FakeRedis(decode_responses=True), capacity=1000)
+    revocation_list.rebuild()
+    monkeypatch.setattr(auth, "revocations", revocation_list)
+    return revocation_list
+
+
+def test_bloom_filter_has_no_false_negatives():
+    bloom = BloomFilter(1000, 0.01)
+    for i in range(1000):
+        bloom.add(f"jti:{i}")
+    assert all(f"jti:{i}" in bloom for i in range(1000))
+    assert sum(f"other:{i}" in bloom for i in range(10000)) < 300
+
+
+def test_revoked_token_and_user(revocations):
+    claims = token_verifier.verify(auth.create_access_token({"sub": "a@example.com"}))
+    assert not revocations.might_be_revoked(claims)
+
+    assert revocations.revoke_token(claims)
+    assert not revocations.revoke_token(claims)
+    assert revocations.might_be_revoked(claims) and revocations.is_revoked(claims)
+
+    other = token_verifier.verify(auth.create_access_token({"sub": "b@example.com"}))
+    revocations.revoke_user("b@example.com", ttl=60)
+    assert revocations.is_revoked(other)
+    newer = token_verifier.verify(auth.create_access_token({"sub": "b@example.com"}))
+    assert revocations.might_be_revoked(newer) and not revocations.is_revoked(newer)
+
+
+def test_refresh_rotation_and_reuse_detection(revocations):
+    first = auth.issue_token_pair("a@example.com")
+    second = auth.rotate_refresh_token(first["refresh_token"])
+    assert second and second["refresh_token"] != first["refresh_token"]
+    assert token_verifier.verify(second["access_token"])["sub"] == "a@example.com"
+    assert auth.rotate_refresh_token(second["access_token"]) is None
+
+    assert auth.rotate_refresh_token(first["refresh_token"]) is None
+    assert auth.rotate_refresh_token(second["refresh_token"]) is None
+    assert revocations.is_revoked(token_verifier.verify(second["access_token"]))
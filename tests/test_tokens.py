@@ -0,0 +1,57 @@
+import time
+import fakeredis
+import pytest
+from src.services import reset_password
+from src.services.revocation import RevocationList
+from src.services.tokens import BACKENDS, TokenVerifier, _b64encode
+
+
+@pytest.mark.parametrize("issuer", sorted(BACKENDS))
+@pytest.mark.parametrize("verifier", sorted(BACKENDS))
+def test_backends_interoperate(issuer, verifier):
+    if "pyjwt" in (issuer, verifier):
+        pytest.importorskip("jwt")
+    token = TokenVerifier(issuer, keys={"k1": "secret"}).issue({"sub": "a@example.com"}, 60)
+    assert TokenVerifier(verifier, keys={"k1": "secret"}).verify(token)["sub"] == "a@example.com"
+
+
+def test_key_rotation_by_kid():
+    old = TokenVerifier(keys={"old": "s1"}).issue({"sub": "a"}, 60)
+    rotated = TokenVerifier(keys={"old": "s1", "new": "s2"}, active_kid="new")
+    assert rotated.verify(old)["sub"] == "a"
+    assert TokenVerifier(keys={"new": "s2"}).verify(old) is None
+    assert TokenVerifier(keys={"old": "wrong"}).verify(old) is None
+
+
+def test_rejects_expired_tampered_and_unsigned_tokens():
+    verifier = TokenVerifier(default_secret="secret", cache_size=0)
+    assert verifier.verify(verifier.issue({"sub": "a"}, -1)) is None
+    header, payload, signature = verifier.issue({"sub": "a"}, 60).split(".")
+    forged = _b64encode(b'{"sub":"admin","exp":9999999999}')
+    assert verifier.verify(f"{header}.{forged}.{signature}") is None
+    unsigned = _b64encode(b'{"alg":"none"}')
+    assert verifier.verify(f"{unsigned}.{payload}.") is None
+    assert verifier.verify("not-a-token") is None
+
+
+def test_verified_tokens_are_cached_until_exp(monkeypatch):
+    verifier = TokenVerifier(default_secret="secret")
+    token = verifier.issue({"sub": "a"}, 60)
+    assert verifier.verify(token)["sub"] == "a"
+    monkeypatch.setattr(verifier.backend, "decode", lambda *args: pytest.fail("cache miss"))
+    assert verifier.verify(token)["sub"] == "a"
+
+    short = TokenVerifier(default_secret="secret")
+    token = short.issue({"sub": "a"}, 1)
+    assert short.verify(token) is not None
+    time.sleep(1.1)
+    assert short.verify(token) is None
+
+
+def test_reset_tokens_are_not_access_tokens(monkeypatch):
+    monkeypatch.setattr(reset_password, "revocations", RevocationList(fakeredis.FakeRedis(decode_responses=True)))
+    token = reset_password.generate_reset_token("a@example.com")
+    assert reset_password.verify_reset_token(token) == "a@example.com"
+    from src.services import auth
+    assert auth.decode_token(token) is None
+    assert reset_password.verify_reset_token(auth.create_access_token({"sub": "a@example.com"})) is None
@@ -0,0 +1,20 @@
+import asyncio
+import logging
+import signal
+from dotenv import load_dotenv
+
+load_dotenv()
+
+from src.services import tasks  # noqa: F401  (registers the task handlers)
+from src.services.jobs import Worker, job_queue
+
+async def main():
+    stop = asyncio.Event()
+    loop = asyncio.get_running_loop()
+    for sig in (signal.SIGINT, signal.SIGTERM):
+        loop.add_signal_handler(sig, stop.set)
+    await Worker(job_queue).run(stop)
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s %(levelname)s %(name)s %(message)s")
+    asyncio.run(main())